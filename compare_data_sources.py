@@ -506,7 +506,8 @@ def main():
     print("="*80)
     
     # Ścieżka do pliku CSV
-    csv_file = "/workspaces/produkcja-energii/electricity_production_entsoe_all (2).csv"
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "electricity_production_entsoe_all (2).csv")
     
     # 1. Wczytaj i przeanalizuj CSV
     df_csv = load_csv_file(csv_file)
@@ -33,6 +33,21 @@ show_help() {
     echo "      Tworzy szereg czasowy z wybraną agregacją (1H/1D/1W/1M)"
     echo "      Przykład: ./run.sh szereg 2026-01-01 2026-01-31 1D"
     echo ""
+    echo "      Flaga --store (suma/miesieczne/szereg): lokalny magazyn danych (data/store)"
+    echo "      Przykład: ./run.sh miesieczne 2020 2026 --store"
+    echo ""
+    echo "  ${GREEN}./run.sh sync <data_od> [data_do]${NC}"
+    echo "      Uzupełnia lokalny magazyn (data/store) - pobiera tylko brakujące i ulotne dni"
+    echo "      Przykład: ./run.sh sync 2024-01-01"
+    echo ""
+    echo "  ${GREEN}./run.sh tail [interwał_s]${NC}"
+    echo "      Śledzi bieżącą dobę PSE - nowe kwadranse jako linie JSON (stdout)"
+    echo "      Przykład: ./run.sh tail 60 >> dzisiaj.jsonl"
+    echo ""
+    echo "  ${GREEN}./run.sh bench [--scales 1d,30d,1y,6y] [--compare plik.json]${NC}"
+    echo "      Pomiary wydajności offline (dane syntetyczne) - wyniki w benchmark_results.json"
+    echo "      Przykład: ./run.sh bench --scales 1d,1y --compare wyniki_poprzednie.json"
+    echo ""
     echo "  ${GREEN}./run.sh examples${NC}"
     echo "      Uruchamia przykładowe analizy"
     echo ""
@@ -133,7 +148,7 @@ case "$1" in
             echo "Przykład: ./run.sh suma 2026-01-01 2026-01-31"
             exit 1
         fi
-        python3 scripts/quick.py suma "$2" "$3"
+        python3 scripts/quick.py suma "$2" "$3" "${@:4}"
         ;;
     miesieczne|m)
         check_python
@@ -142,7 +157,7 @@ case "$1" in
             echo "Przykład: ./run.sh miesieczne 2020 2026"
             exit 1
         fi
-        python3 scripts/quick.py miesieczne "$2" "$3"
+        python3 scripts/quick.py miesieczne "$2" "$3" "${@:4}"
         ;;
     szereg|series)
         check_python
@@ -152,7 +167,24 @@ case "$1" in
             echo "Przykład: ./run.sh szereg 2026-01-01 2026-01-31 1D"
             exit 1
         fi
-        python3 scripts/quick.py szereg "$2" "$3" "$4"
+        python3 scripts/quick.py szereg "$2" "$3" "$4" "${@:5}"
+        ;;
+    sync)
+        check_python
+        if [ -z "$2" ]; then
+            echo -e "${YELLOW}⚠️  Użycie: ./run.sh sync <data_od> [data_do]${NC}"
+            echo "Przykład (cron co 15 min): */15 * * * * cd /ścieżka/do/projektu && ./run.sh sync 2024-01-01"
+            exit 1
+        fi
+        python3 scripts/quick.py sync "${@:2}"
+        ;;
+    tail|follow)
+        check_python
+        python3 scripts/quick.py tail "${@:2}"
+        ;;
+    bench|benchmark)
+        check_python
+        python3 scripts/benchmark.py "${@:2}"
         ;;
     examples|e)
         check_python
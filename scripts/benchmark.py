@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Pomiary wydajności najważniejszych ścieżek przetwarzania (offline, dane syntetyczne).
+
+Dane wejściowe budowane są z PSEEnergyDataFetcher.generate_sample_data (JSON PSE
+w formacie /his-wlk-cal) oraz generowanych dokumentów XML A75 ENTSO-E,
+w skalach od 1 dnia do 6 lat danych 15-minutowych. Wyniki zapisywane są do
+pliku JSON, który można porównać z wynikami innego commita (--compare).
+
+Użycie:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --scales 1d,1y --repeat 5 --output wyniki.json
+    python scripts/benchmark.py --compare wyniki_poprzednie.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Dodaj ścieżkę do src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pse_energy_scraper import PSEEnergyDataFetcher
+from entsoe_data_fetcher import ENTSOEDataFetcher
+from combined_energy_data import (CombinedEnergyDataFetcher, CombinedEnergyDataAnalyzer,
+                                  validate_data_continuity)
+from frame_dtypes import compact_frame, frame_memory_mb
+
+
+SCALES = {'1d': 1, '30d': 30, '1y': 365, '6y': 6 * 365 + 1}
+DEFAULT_SCALES = '1d,30d,1y,6y'
+START_DATE = '2020-01-01'
+
+# Dokumenty ENTSO-E pobierane są we fragmentach do 350 dni - większych XML nie parsujemy
+MAX_XML_DAYS = 366
+
+# Kolumny PSE /his-wlk-cal odpowiadające kolumnom generate_sample_data
+PSE_FIELDS = {
+    'wi': 'Sumaryczna generacja źródeł wiatrowych [MW]',
+    'pv': 'Sumaryczna generacja źródeł fotowoltaicznych [MW]',
+    'demand': 'Zapotrzebowanie na moc [MW]',
+    'swm_p': 'Krajowe saldo wymiany międzysystemowej - równoległa [MW]',
+    'swm_np': 'Krajowe saldo wymiany międzysystemowej - nierównoległa [MW]',
+}
+
+# Typy produkcji A75 z udziałem w syntetycznym zapotrzebowaniu
+PSR_SHARES = {'B01': 0.03, 'B02': 0.22, 'B04': 0.10, 'B05': 0.35, 'B10': 0.01,
+              'B11': 0.01, 'B12': 0.01, 'B16': 0.08, 'B19': 0.15}
+
+
+def build_inputs(days: int) -> dict:
+    """Buduje syntetyczne dane wejściowe dla skali (liczby dni)."""
+    date_from = pd.Timestamp(START_DATE)
+    date_to = date_from + pd.Timedelta(days=days - 1)
+
+    np.random.seed(days)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sample = PSEEnergyDataFetcher(use_cache=False).generate_sample_data(
+            date_from.strftime('%Y-%m-%d'),
+            (date_to + pd.Timedelta(hours=23, minutes=45)).strftime('%Y-%m-%d %H:%M'))
+
+    # Odpowiedź /his-wlk-cal: dtime to koniec przedziału w czasie lokalnym
+    ends = sample['Data'] + pd.Timedelta(minutes=15)
+    records = pd.DataFrame({
+        'business_date': sample['Data'].dt.strftime('%Y-%m-%d'),
+        'dtime': ends.dt.strftime('%Y-%m-%d %H:%M:%S'),
+        **{field: sample[column].round(3) for field, column in PSE_FIELDS.items()},
+        'publication_ts': (ends + pd.Timedelta(minutes=17)).dt.strftime('%Y-%m-%d %H:%M:%S.000'),
+    })
+
+    return {
+        'date_from': date_from.strftime('%Y-%m-%d'),
+        'date_to': date_to.strftime('%Y-%m-%d'),
+        'pse_json': {'value': records.to_dict('records')},
+        'demand': sample['Zapotrzebowanie na moc [MW]'].to_numpy(),
+    }
+
+
+def build_a75_xml(date_from: str, days: int, demand: np.ndarray) -> bytes:
+    """Dokument A75 (PT15M, jeden Period na dobę, jak w odpowiedziach API) dla okresu."""
+    start = pd.Timestamp(date_from, tz='Europe/Warsaw').tz_convert('UTC')
+    day_starts = pd.date_range(start, periods=days, freq='D')
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<GL_MarketDocument xmlns="urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0">'
+             '<type>A75</type><process.processType>A16</process.processType>']
+    for psr_type, share in PSR_SHARES.items():
+        parts.append(f"<TimeSeries><MktPSRType><psrType>{psr_type}</psrType></MktPSRType>")
+        for day, day_start in enumerate(day_starts):
+            values = demand[day * 96:(day + 1) * 96] * share
+            points = ''.join(f"<Point><position>{pos}</position><quantity>{value:.0f}</quantity></Point>"
+                             for pos, value in enumerate(values, 1))
+            parts.append(f"<Period><timeInterval><start>{day_start:%Y-%m-%dT%H:%MZ}</start>"
+                         f"<end>{day_start + pd.Timedelta(days=1):%Y-%m-%dT%H:%MZ}</end></timeInterval>"
+                         f"<resolution>PT15M</resolution>{points}</Period>")
+        parts.append('</TimeSeries>')
+    parts.append('</GL_MarketDocument>')
+    return ''.join(parts).encode('utf-8')
+
+
+def build_entsoe_frame(df_pse: pd.DataFrame) -> pd.DataFrame:
+    """Ramka ENTSO-E w formacie _parse_xml_response (czas Europe/Warsaw) dla czasu danych PSE."""
+    demand = df_pse['Zapotrzebowanie na moc [MW]'].to_numpy()
+    df = pd.DataFrame({'Data': df_pse['Data_UTC'].dt.tz_convert('Europe/Warsaw')})
+    for psr_type, share in PSR_SHARES.items():
+        df[ENTSOEDataFetcher._get_type_name(psr_type)] = demand * share
+    df['Woda [MW]'] = df['Woda (przepływowa) [MW]'] + df['Woda (zbiornikowa) [MW]']
+    return df
+
+
+def measure(fn, setup=None, repeat: int = 3) -> list:
+    """Mierzy czas fn(*setup()) repeat razy (przygotowanie poza pomiarem, wyjście wyciszone)."""
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_scale(name: str, days: int, repeat: int) -> list:
+    """Uruchamia wszystkie pomiary dla jednej skali."""
+    inputs = build_inputs(days)
+    date_from, date_to = inputs['date_from'], inputs['date_to']
+    pse = PSEEnergyDataFetcher(use_cache=False)
+
+    df_pse = pse._parse_data(inputs['pse_json'])
+    df_entsoe = build_entsoe_frame(df_pse)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        combined = CombinedEnergyDataFetcher(entsoe_api_key='benchmark')
+    combined.store = None
+    combined._fetch_sources = lambda *_: (df_pse.copy(), df_entsoe.copy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_combined = combined.fetch_combined_data(date_from, date_to)
+
+    compact_mb = frame_memory_mb(compact_frame(
+        df_combined, PSEEnergyDataFetcher.COMPACT_DROP_COLUMNS + ENTSOEDataFetcher.COMPACT_DROP_COLUMNS))
+    print(f"   pamięć ramki połączonej: {frame_memory_mb(df_combined):.1f} MB, "
+          f"układ kompaktowy (compact_dtypes=True): {compact_mb:.1f} MB")
+
+    month_from = (pd.Timestamp(date_to) - pd.Timedelta(days=29)).strftime('%Y-%m-%d')
+    years = (pd.Timestamp(date_from).year, pd.Timestamp(date_to).year)
+
+    def analyzer():
+        return (CombinedEnergyDataAnalyzer(df_combined),)
+
+    def indexed_analyzer():
+        return (CombinedEnergyDataAnalyzer(df_combined, build_index=True),)
+
+    benchmarks = {
+        'pse_parse_data': (lambda: pse._parse_data(inputs['pse_json']), None),
+        'combined_merge': (lambda: combined.fetch_combined_data(date_from, date_to), None),
+        'validate_data_continuity': (lambda: validate_data_continuity(df_combined, date_from, date_to), None),
+        'sum_period': (lambda a: a.sum_period(month_from, date_to), analyzer),
+        'sum_period_indexed': (lambda a: a.sum_period(month_from, date_to), indexed_analyzer),
+        'get_time_series_hourly': (lambda a: a.get_time_series('h'), analyzer),
+        'get_time_series_daily': (lambda a: a.get_time_series('1D'), analyzer),
+        'monthly_sums': (lambda a: a.monthly_sums(*years), analyzer),
+    }
+    if days <= MAX_XML_DAYS:
+        xml = build_a75_xml(date_from, days, inputs['demand'])
+        benchmarks['entsoe_parse_xml_response'] = (
+            lambda: ENTSOEDataFetcher._parse_xml_response(xml, date_from, date_to), None)
+
+    results = []
+    for bench, (fn, setup) in benchmarks.items():
+        timings = measure(fn, setup, repeat)
+        results.append({
+            'benchmark': bench,
+            'scale': name,
+            'days': days,
+            'rows': len(df_pse),
+            'repeat': repeat,
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+            'mean_s': statistics.mean(timings),
+        })
+        print(f"   {bench:<28} {name:>4}  min {min(timings) * 1000:10.2f} ms  "
+              f"mediana {statistics.median(timings) * 1000:10.2f} ms")
+    return results
+
+
+def git_commit() -> str:
+    """Skrót bieżącego commita (lub 'unknown' poza repozytorium git)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: list, baseline_path: str):
+    """Wypisuje stosunek median względem wyników z pliku bazowego."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['benchmark'], r['scale']): r for r in baseline['results']}
+
+    print()
+    print(f"📊 Porównanie z {baseline_path} (commit {baseline.get('commit', '?')}):")
+    for result in results:
+        old = previous.get((result['benchmark'], result['scale']))
+        if old is None:
+            continue
+        ratio = result['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        marker = '⚠️ ' if ratio > 1.1 else '✅' if ratio < 0.9 else '  '
+        print(f"   {marker} {result['benchmark']:<28} {result['scale']:>4}  "
+              f"{old['median_s'] * 1000:10.2f} → {result['median_s'] * 1000:10.2f} ms  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiary wydajności (offline, dane syntetyczne)")
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help=f"Skale danych, spośród: {', '.join(SCALES)} (domyślnie {DEFAULT_SCALES})")
+    parser.add_argument('--repeat', type=int, default=3, help="Liczba powtórzeń każdego pomiaru")
+    parser.add_argument('--output', default='benchmark_results.json', help="Plik wyników JSON")
+    parser.add_argument('--compare', default=None, help="Plik wyników do porównania (np. z innego commita)")
+    args = parser.parse_args()
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"nieznane skale: {', '.join(unknown)}")
+
+    print(f"⏱️  Pomiary wydajności: skale {', '.join(scales)}, {args.repeat} powtórzeń")
+    results = []
+    for scale in scales:
+        print(f"\n📏 Skala {scale} ({SCALES[scale]} dni)")
+        results.extend(run_scale(scale, SCALES[scale], args.repeat))
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Wyniki zapisano w {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
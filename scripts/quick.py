@@ -6,15 +6,24 @@ Użycie:
     python scripts/quick.py suma 2026-01-01 2026-01-31 --full  # Z danymi ENTSO-E
     python scripts/quick.py miesieczne 2020 2026
     python scripts/quick.py szereg 2026-01-01 2026-01-31 1D
+    python scripts/quick.py miesieczne 2020 2026 --store  # Lokalny magazyn danych
+    python scripts/quick.py sync 2024-01-01  # Uzupełnij magazyn o brakujące dni
+    python scripts/quick.py tail 60  # Nowe kwadranse bieżącej doby jako JSON
+    python scripts/quick.py suma 2026-01-01 2026-01-31 --metrics pomiary.prom  # Czasy etapów
+    python scripts/quick.py suma 2026-01-01 2026-01-31 --quiet  # Tylko wyniki, bez komunikatów
 """
 
 import sys
 import os
+from datetime import datetime
 
 # Dodaj ścieżkę do src
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from pse_energy_scraper import PSEEnergyDataFetcher, EnergyDataAnalyzer
+from energy_store import EnergyDataStore
+from instrumentation import metrics
+from log_output import configure_output
 import json
 
 # Spróbuj zaimportować moduły ENTSO-E (opcjonalne)
@@ -25,27 +34,73 @@ except ImportError:
     ENTSOE_AVAILABLE = False
 
 
-def suma_okresu(data_od, data_do, use_combined=True):
-    """Szybkie policzenie sumy dla okresu."""
-    print(f"📊 Pobieranie danych dla okresu {data_od} do {data_do}...\n")
+def pobierz_dane(data_od, data_do, use_combined=True, use_store=False):
+    """
+    Pobiera dane dla okresu - z API lub z lokalnego magazynu.
+    
+    Przy magazynie pobierane są tylko dni brakujące, niekompletne i ulotne
+    (dzisiaj, wczoraj), a cały okres wczytywany jest z dysku.
+    
+    Returns:
+        Krotka (df, klasa analizatora, fetcher)
+    """
+    # Dni przyszłe nie mają danych - nie odpytuj o nie API przy każdym uruchomieniu
+    # (np. miesieczne 2020 2026 w trakcie roku 2026)
+    dzisiaj = datetime.now().strftime('%Y-%m-%d')
+    if data_od <= dzisiaj < data_do:
+        print(f"ℹ️  Okres ograniczony do dzisiaj ({dzisiaj})\n")
+        data_do = dzisiaj
+    
+    store = EnergyDataStore() if use_store else None
+    
+    if store is not None:
+        return pobierz_z_magazynu(store, data_od, data_do, use_combined)
     
     # Tryb combined (PSE + ENTSO-E) lub tylko PSE
     if use_combined and ENTSOE_AVAILABLE:
         try:
             fetcher = CombinedEnergyDataFetcher()
             df = fetcher.fetch_combined_data(data_od, data_do)
-            analyzer_class = CombinedEnergyDataAnalyzer
             print()
+            return df, CombinedEnergyDataAnalyzer, fetcher
         except Exception as e:
             print(f"⚠️  Błąd trybu combined: {e}")
             print("   Używam tylko danych PSE\n")
-            use_combined = False
     
-    if not use_combined or not ENTSOE_AVAILABLE:
+    fetcher = PSEEnergyDataFetcher()
+    df = fetcher.fetch_data(data_od, data_do)
+    return df, EnergyDataAnalyzer, fetcher
+
+
+def pobierz_z_magazynu(store, data_od, data_do, use_combined=True):
+    """
+    Uzupełnia magazyn o brakujące dni okresu i wczytuje cały okres z dysku.
+    
+    Returns:
+        Krotka (df, klasa analizatora, fetcher)
+    """
+    if use_combined and ENTSOE_AVAILABLE:
+        fetcher = CombinedEnergyDataFetcher(store=store)
+        fetcher.sync_store(data_od, data_do)
+        analyzer_class = CombinedEnergyDataAnalyzer
+    else:
         fetcher = PSEEnergyDataFetcher()
-        df = fetcher.fetch_data(data_od, data_do)
+        for range_from, range_to in store.day_ranges(store.missing_days(data_od, data_do)):
+            df = fetcher.fetch_data(range_from, range_to)
+            if df is not None and not df.empty:
+                store.write(df, sources=['pse'])
         analyzer_class = EnergyDataAnalyzer
     
+    print(f"💾 Dane z lokalnego magazynu ({store.store_dir})\n")
+    return store.read(data_od, data_do), analyzer_class, fetcher
+
+
+def suma_okresu(data_od, data_do, use_combined=True, use_store=False):
+    """Szybkie policzenie sumy dla okresu."""
+    print(f"📊 Pobieranie danych dla okresu {data_od} do {data_do}...\n")
+    
+    df, analyzer_class, fetcher = pobierz_dane(data_od, data_do, use_combined, use_store)
+    
     if df is None or df.empty:
         print("⚠️  Brak danych\n")
         return
@@ -123,26 +178,11 @@ def suma_okresu(data_od, data_do, use_combined=True):
 
 
 
-def miesieczne_sumy(rok_od, rok_do, use_combined=True):
+def miesieczne_sumy(rok_od, rok_do, use_combined=True, use_store=False):
     """Miesięczne sumy dla podanych lat."""
     print(f"📊 Miesięczne sumy dla lat {rok_od}-{rok_do}...\n")
     
-    # Tryb combined (PSE + ENTSO-E) lub tylko PSE
-    if use_combined and ENTSOE_AVAILABLE:
-        try:
-            fetcher = CombinedEnergyDataFetcher()
-            df = fetcher.fetch_combined_data(f"{rok_od}-01-01", f"{rok_do}-12-31")
-            analyzer_class = CombinedEnergyDataAnalyzer
-            print()
-        except Exception as e:
-            print(f"⚠️  Błąd trybu combined: {e}")
-            print("   Używam tylko danych PSE\n")
-            use_combined = False
-    
-    if not use_combined or not ENTSOE_AVAILABLE:
-        fetcher = PSEEnergyDataFetcher()
-        df = fetcher.fetch_data(f"{rok_od}-01-01", f"{rok_do}-12-31")
-        analyzer_class = EnergyDataAnalyzer
+    df, analyzer_class, fetcher = pobierz_dane(f"{rok_od}-01-01", f"{rok_do}-12-31", use_combined, use_store)
     
     if df is None or df.empty:
         print("⚠️  Używam przykładowych danych\n")
@@ -164,26 +204,11 @@ def miesieczne_sumy(rok_od, rok_do, use_combined=True):
     print(f"\n💾 Zapisano: {filename}")
 
 
-def szereg_czasowy(data_od, data_do, agregacja='1D', use_combined=True):
+def szereg_czasowy(data_od, data_do, agregacja='1D', use_combined=True, use_store=False):
     """Szereg czasowy z wybraną agregacją."""
     print(f"📊 Szereg czasowy dla okresu {data_od} do {data_do} (agregacja: {agregacja})...\n")
     
-    # Tryb combined (PSE + ENTSO-E) lub tylko PSE
-    if use_combined and ENTSOE_AVAILABLE:
-        try:
-            fetcher = CombinedEnergyDataFetcher()
-            df = fetcher.fetch_combined_data(data_od, data_do)
-            analyzer_class = CombinedEnergyDataAnalyzer
-            print()
-        except Exception as e:
-            print(f"⚠️  Błąd trybu combined: {e}")
-            print("   Używam tylko danych PSE\n")
-            use_combined = False
-    
-    if not use_combined or not ENTSOE_AVAILABLE:
-        fetcher = PSEEnergyDataFetcher()
-        df = fetcher.fetch_data(data_od, data_do)
-        analyzer_class = EnergyDataAnalyzer
+    df, analyzer_class, fetcher = pobierz_dane(data_od, data_do, use_combined, use_store)
     
     if df is None or df.empty:
         print("⚠️  Używam przykładowych danych\n")
@@ -204,6 +229,31 @@ def szereg_czasowy(data_od, data_do, agregacja='1D', use_combined=True):
     print(f"\n💾 Zapisano: {filename}")
 
 
+def synchronizuj(data_od, data_do=None):
+    """Uzupełnia lokalny magazyn - pobiera tylko brakujące i ulotne dni."""
+    if not ENTSOE_AVAILABLE:
+        print("❌ Synchronizacja wymaga modułu combined_energy_data")
+        return
+    
+    store = EnergyDataStore()
+    fetcher = CombinedEnergyDataFetcher(store=store)
+    wynik = fetcher.sync_store(data_od, data_do)
+    
+    print()
+    print(f"💾 Magazyn: {store.store_dir}")
+    print(f"   Pobrane dni: {wynik['brakujące_dni']} (z lukami źródeł: {wynik['luki_źródeł']}), "
+          f"zakresy: {len(wynik['zakresy'])}, nieudane: {len(wynik['nieudane_zakresy'])}, "
+          f"tylko PSE: {len(wynik['tylko_pse'])}")
+
+
+def sledz_dane(interwal=60):
+    """Śledzenie bieżącej doby PSE - nowe kwadranse jako linie JSON na stdout."""
+    from pse_live_tail import PSELiveTail
+    # stdout niesie linie JSON - komunikaty (poziom, --quiet bez zmian) na stderr
+    configure_output(stream=sys.stderr)
+    PSELiveTail().run(interval=float(interwal))
+
+
 def pomoc():
     """Wyświetl pomoc."""
     print("""
@@ -244,6 +294,28 @@ UŻYCIE:
 
   ────────────────────────────────────────────────────────────────
 
+  Synchronizacja lokalnego magazynu (np. z crona co 15 minut):
+    python quick.py sync <data_od> [data_do]
+    
+    Pobiera tylko dni brakujące w magazynie oraz dni ulotne (dzisiaj, wczoraj).
+    Domyślnie data_do = dzisiaj.
+    
+    Przykład:
+    python quick.py sync 2024-01-01
+
+  ────────────────────────────────────────────────────────────────
+
+  Śledzenie bieżącej doby PSE (linie JSON na stdout):
+    python quick.py tail [interwał_s]
+    
+    Co interwał sekund (domyślnie 60) pobiera tylko nowe publikacje PSE
+    i wypisuje nowe kwadranse. Komunikaty trafiają na stderr.
+    
+    Przykład:
+    python quick.py tail 30 >> dzisiaj.jsonl
+
+  ────────────────────────────────────────────────────────────────
+
 ŹRÓDŁA DANYCH:
 
   Domyślnie (PSE + ENTSO-E - wymaga klucza API):
@@ -260,6 +332,18 @@ UŻYCIE:
     Konfiguracja ENTSO-E: docs/ENTSOE_API_SETUP.md
   
   Flaga --pse-only: tylko dane PSE (bez ENTSO-E)
+  
+  Flaga --store: lokalny magazyn danych (partycje miesięczne w data/store
+  lub katalogu ENERGY_STORE_DIR) - okresy zapisane w magazynie są czytane
+  z dysku, pozostałe pobierane z API i zapisywane w magazynie
+  
+  Flaga --metrics <plik>: po zakończeniu wypisuje czasy etapów (zapytania HTTP,
+  parsowanie, łączenie, walidacja) i liczniki (ponowienia, bajty, trafienia
+  cache) oraz zapisuje je do pliku - .prom (Prometheus) lub JSON
+  
+  Flaga --quiet: bez komunikatów pobierania (postęp, ostrzeżenia, raport
+  jakości danych) - wypisywane są tylko wyniki. Poziom komunikatów można
+  też ustawić zmienną ENERGY_LOG_LEVEL (np. WARNING)
 
   ────────────────────────────────────────────────────────────────
 
@@ -282,6 +366,23 @@ def main():
     
     komenda = sys.argv[1].lower()
     
+    # Flaga --store: czytaj z lokalnego magazynu (data/store), a pobrane dane zapisuj w nim
+    use_store = '--store' in sys.argv
+    if use_store:
+        sys.argv.remove('--store')
+    
+    # Flaga --metrics <plik>: podsumowanie pomiarów (stderr) i zapis do pliku
+    metrics_file = None
+    if '--metrics' in sys.argv:
+        index = sys.argv.index('--metrics')
+        metrics_file = sys.argv[index + 1] if index + 1 < len(sys.argv) else 'metrics.json'
+        del sys.argv[index:index + 2]
+    
+    # Flaga --quiet: komunikaty fetcherów wyłączone, zostają tylko wyniki
+    if '--quiet' in sys.argv:
+        sys.argv.remove('--quiet')
+        configure_output(quiet=True)
+    
     try:
         if komenda == 'suma':
             if len(sys.argv) < 4:
@@ -293,14 +394,14 @@ def main():
             
             # Sprawdź czy jest flaga --pse-only (domyślnie używamy combined)
             use_full = '--pse-only' not in sys.argv
-            suma_okresu(sys.argv[2], sys.argv[3], use_combined=use_full)
+            suma_okresu(sys.argv[2], sys.argv[3], use_combined=use_full, use_store=use_store)
         
         elif komenda == 'miesieczne' or komenda == 'miesięczne':
             if len(sys.argv) < 4:
                 print("❌ Błąd: Brakuje parametrów")
                 print("Użycie: python quick.py miesieczne <rok_od> <rok_do>")
                 return
-            miesieczne_sumy(sys.argv[2], sys.argv[3])
+            miesieczne_sumy(sys.argv[2], sys.argv[3], use_store=use_store)
         
         elif komenda == 'szereg':
             if len(sys.argv) < 4:
@@ -308,7 +409,17 @@ def main():
                 print("Użycie: python quick.py szereg <data_od> <data_do> [agregacja]")
                 return
             agregacja = sys.argv[4] if len(sys.argv) > 4 else '1D'
-            szereg_czasowy(sys.argv[2], sys.argv[3], agregacja)
+            szereg_czasowy(sys.argv[2], sys.argv[3], agregacja, use_store=use_store)
+        
+        elif komenda == 'sync':
+            if len(sys.argv) < 3:
+                print("❌ Błąd: Brakuje parametrów")
+                print("Użycie: python quick.py sync <data_od> [data_do]")
+                return
+            synchronizuj(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        
+        elif komenda == 'tail':
+            sledz_dane(sys.argv[2] if len(sys.argv) > 2 else 60)
         
         elif komenda in ['help', 'pomoc', '-h', '--help']:
             pomoc()
@@ -321,6 +432,12 @@ def main():
         print(f"❌ Błąd: {e}")
         import traceback
         traceback.print_exc()
+    
+    finally:
+        if metrics_file:
+            print(metrics.summary_table(), file=sys.stderr)
+            metrics.write(metrics_file)
+            print(f"💾 Pomiary zapisano w {metrics_file}", file=sys.stderr)
 
 
 if __name__ == "__main__":
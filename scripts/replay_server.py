@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Lokalny serwer odtwarzający odpowiedzi API PSE i ENTSO-E z nagranych fixture'ów.
+
+Pozwala uruchamiać fetchery, testy i pomiary wydajności bez sieci i w sposób
+powtarzalny. Nagrana doba (scripts/fixtures) jest odtwarzana dla dowolnego
+zakresu dat - wartości przypisywane są według lokalnej pory dnia, a liczba
+kwadransów uwzględnia zmianę czasu (92/100 w dniach DST). Serwer może
+symulować opóźnienie sieci, błędy 5xx i limit zapytań (429 + Retry-After).
+
+Użycie:
+    python scripts/replay_server.py --port 8765
+    python scripts/replay_server.py --port 8765 --latency 120 --jitter 40 --error-rate 0.05
+
+Fetchery kieruje się na serwer zmiennymi środowiskowymi (lub argumentami
+konstruktorów base_url / api_endpoint):
+    PSE_API_BASE_URL=http://127.0.0.1:8765/pse/api
+    ENTSOE_API_ENDPOINT=http://127.0.0.1:8765/entsoe/api
+    ENTSOE_API_KEY=replay
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Zapytania OData obsługiwane przez /his-wlk-cal
+BUSINESS_DATE_PATTERN = re.compile(r"business_date\s+(eq|ge|le)\s+'(\d{4}-\d{2}-\d{2})'")
+PUBLICATION_PATTERN = re.compile(r"publication_ts\s+gt\s+'([^']+)'")
+
+SLOTS_PER_DAY = 96
+
+
+def _slot(local_start: pd.DatetimeIndex) -> pd.Index:
+    """Numer kwadransu lokalnej doby (0-95) dla początków przedziałów."""
+    return local_start.hour * 4 + local_start.minute // 15
+
+
+class ReplayFixtures:
+    """
+    Nagrane odpowiedzi PSE (JSON /his-wlk-cal) i ENTSO-E (XML A75) jako profile dobowe.
+
+    Profil to wartości każdego pola w 96 kwadransach lokalnej doby, z których
+    budowane są odpowiedzi dla dowolnych dat.
+    """
+
+    def __init__(self, fixtures_dir: str = DEFAULT_FIXTURES_DIR):
+        pse_files = sorted(glob.glob(os.path.join(fixtures_dir, 'pse_*.json')))
+        entsoe_files = sorted(glob.glob(os.path.join(fixtures_dir, 'entsoe_*.xml')))
+        if not pse_files or not entsoe_files:
+            raise FileNotFoundError(f"Brak fixture'ów pse_*.json / entsoe_*.xml w {fixtures_dir}")
+
+        self.pse_profile = self._load_pse(pse_files[0])
+        self.entsoe_profile = self._load_entsoe(entsoe_files[0])
+
+    @staticmethod
+    def _load_pse(path: str) -> pd.DataFrame:
+        """Profil PSE: wartości liczbowe pól odpowiedzi według kwadransu doby."""
+        with open(path, 'r', encoding='utf-8') as f:
+            df = pd.DataFrame(json.load(f)['value'])
+        # dtime to koniec przedziału w czasie lokalnym ("02a"/"02b" w dniach zmiany czasu)
+        ends = pd.to_datetime(df['dtime'].str.replace(r'(\d{2})[ab]:', r'\1:', regex=True))
+        df.index = _slot(pd.DatetimeIndex(ends - pd.Timedelta(minutes=15)))
+        numeric = df.select_dtypes('number')
+        return numeric.groupby(level=0).first().reindex(range(SLOTS_PER_DAY)).ffill().bfill()
+
+    @staticmethod
+    def _load_entsoe(path: str) -> pd.DataFrame:
+        """Profil ENTSO-E: moc każdego psrType według lokalnego kwadransu doby."""
+        series = {}
+        with open(path, 'rb') as f:
+            root = ET.parse(f).getroot()
+        for time_series in root.iter():
+            if not time_series.tag.endswith('TimeSeries'):
+                continue
+            values = {}
+            psr_type = start = None
+            minutes = 60
+            for elem in time_series.iter():
+                tag = elem.tag.rpartition('}')[2]
+                if tag == 'psrType':
+                    psr_type = elem.text
+                elif tag == 'start' and start is None:
+                    start = pd.Timestamp(elem.text)
+                elif tag == 'resolution':
+                    minutes = int(re.sub(r'\D', '', elem.text)) * (60 if elem.text.endswith('H') else 1)
+                elif tag == 'Point':
+                    fields = {child.tag.rpartition('}')[2]: child.text for child in elem}
+                    values[int(fields['position'])] = float(fields['quantity'])
+            if psr_type is None or start is None:
+                continue
+            times = start + pd.to_timedelta([(pos - 1) * minutes for pos in values], unit='min')
+            local = pd.DatetimeIndex(times).tz_convert('Europe/Warsaw')
+            series[psr_type] = pd.Series(list(values.values()), index=_slot(local))
+
+        profile = pd.DataFrame({psr: s.groupby(level=0).first() for psr, s in series.items()})
+        return profile.reindex(range(SLOTS_PER_DAY)).ffill().bfill()
+
+    def pse_rows(self, date_from: str, date_to: str, published_after: Optional[str] = None,
+                 select: Optional[list] = None) -> list:
+        """Rekordy /his-wlk-cal dla dób date_from..date_to (opublikowane do teraz)."""
+        rows = []
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S.000')
+        for day in pd.date_range(date_from, date_to, freq='D'):
+            start = day.tz_localize('Europe/Warsaw')
+            starts = pd.date_range(start, start + pd.DateOffset(days=1), freq='15min', inclusive='left')
+            ends = starts + pd.Timedelta(minutes=15)
+            values = self.pse_profile.iloc[_slot(starts)]
+            publication = (ends + pd.Timedelta(minutes=17)).strftime('%Y-%m-%d %H:%M:%S.000')
+            # Powtórzona godzina w dniu zmiany czasu zimowego: "02a" (czas letni) / "02b" (zimowy)
+            repeated = ends.tz_localize(None).duplicated(keep=False)
+            summer = max(end.utcoffset() for end in ends)
+
+            for end, (_, record), published, is_repeated in zip(ends, values.iterrows(), publication, repeated):
+                dtime = end.strftime('%Y-%m-%d %H:%M:%S')
+                if is_repeated:
+                    marker = 'a' if end.utcoffset() == summer else 'b'
+                    dtime = f"{dtime[:13]}{marker}{dtime[13:]}"
+                if published > now or (published_after and published <= published_after):
+                    continue
+                row = {
+                    'business_date': day.strftime('%Y-%m-%d'),
+                    'dtime': dtime,
+                    'dtime_utc': end.tz_convert('UTC').strftime('%Y-%m-%d %H:%M:%S'),
+                    'publication_ts': published,
+                    **{key: round(float(value), 3) for key, value in record.items()},
+                }
+                if select:
+                    row = {key: value for key, value in row.items() if key in select}
+                rows.append(row)
+        return rows
+
+    def entsoe_xml(self, period_start: str, period_end: str) -> bytes:
+        """Dokument A75 (PT15M) dla okresu periodStart..periodEnd (UTC, YYYYMMDDHHMM)."""
+        start = pd.Timestamp(datetime.strptime(period_start, '%Y%m%d%H%M'), tz='UTC')
+        end = pd.Timestamp(datetime.strptime(period_end, '%Y%m%d%H%M'), tz='UTC')
+        starts = pd.date_range(start, end, freq='15min', inclusive='left')
+        slots = _slot(starts.tz_convert('Europe/Warsaw'))
+
+        def interval(tag):
+            return (f"<{tag}><start>{start:%Y-%m-%dT%H:%MZ}</start>"
+                    f"<end>{end:%Y-%m-%dT%H:%MZ}</end></{tag}>")
+
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<GL_MarketDocument xmlns="urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0">'
+                 '<type>A75</type><process.processType>A16</process.processType>',
+                 interval('time_Period.timeInterval')]
+        for number, psr_type in enumerate(self.entsoe_profile.columns, 1):
+            values = self.entsoe_profile[psr_type].to_numpy()[slots]
+            points = ''.join(f"<Point><position>{pos}</position><quantity>{value:.0f}</quantity></Point>"
+                             for pos, value in enumerate(values, 1))
+            parts.append(f"<TimeSeries><mRID>{number}</mRID><MktPSRType><psrType>{psr_type}</psrType>"
+                         f"</MktPSRType><Period>{interval('timeInterval')}"
+                         f"<resolution>PT15M</resolution>{points}</Period></TimeSeries>")
+        parts.append('</GL_MarketDocument>')
+        return ''.join(parts).encode('utf-8')
+
+
+class ReplayServer:
+    """
+    Serwer HTTP odtwarzający API (wątek w tle lub proces - patrz main).
+
+    Trasy:
+        /pse/api/his-wlk-cal   - JSON PSE ($filter business_date eq/ge/le, publication_ts gt, $select)
+        /entsoe/api            - XML ENTSO-E A75 (periodStart, periodEnd)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 error_status: int = 503, rate_limit: Optional[float] = None, seed: Optional[int] = None):
+        """
+        Args:
+            host: Adres nasłuchu
+            port: Port (0 - dowolny wolny)
+            fixtures_dir: Katalog z nagranymi odpowiedziami
+            latency_ms: Opóźnienie każdej odpowiedzi (ms)
+            jitter_ms: Losowy rozrzut opóźnienia +/- (ms)
+            error_rate: Odsetek zapytań kończonych błędem error_status (0-1)
+            error_status: Status wstrzykiwanych błędów (np. 500, 503)
+            rate_limit: Limit zapytań na sekundę - nadmiarowe dostają 429 z Retry-After
+            seed: Ziarno generatora losowego (powtarzalne opóźnienia i błędy)
+        """
+        self.fixtures = ReplayFixtures(fixtures_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.stats = {'pse': 0, 'entsoe': 0, 'errors': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+        self._window = []
+        self._thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def pse_base_url(self) -> str:
+        return f"{self.url}/pse/api"
+
+    @property
+    def entsoe_endpoint(self) -> str:
+        return f"{self.url}/entsoe/api"
+
+    def start(self) -> 'ReplayServer':
+        """Uruchamia serwer w wątku w tle."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _inject(self) -> Optional[tuple]:
+        """Decyduje o opóźnieniu i ewentualnym błędzie: zwraca (status, nagłówki) lub None."""
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            failed = self.error_rate and self.random.random() < self.error_rate
+
+            throttled = False
+            if self.rate_limit:
+                now = time.monotonic()
+                self._window = [t for t in self._window if now - t < 1.0]
+                throttled = len(self._window) >= self.rate_limit
+                if not throttled:
+                    self._window.append(now)
+
+            if throttled:
+                self.stats['throttled'] += 1
+            elif failed:
+                self.stats['errors'] += 1
+
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            return 429, {'Retry-After': '1'}
+        if failed:
+            return self.error_status, {}
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', content_type: str = 'text/plain',
+                      headers: Optional[dict] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+                if url.path.endswith('/his-wlk-cal'):
+                    kind = 'pse'
+                elif url.path.rstrip('/').endswith('/entsoe/api'):
+                    kind = 'entsoe'
+                else:
+                    return self._send(404, b'Unknown route')
+
+                with server._lock:
+                    server.stats[kind] += 1
+
+                injected = server._inject()
+                if injected:
+                    return self._send(injected[0], b'Injected error', headers=injected[1])
+
+                try:
+                    if kind == 'pse':
+                        self._pse(query)
+                    else:
+                        self._entsoe(query)
+                except (KeyError, ValueError) as e:
+                    self._send(400, f"Bad request: {e}".encode('utf-8'))
+
+            def _pse(self, query: dict):
+                odata_filter = query.get('$filter', '')
+                bounds = {op: date for op, date in BUSINESS_DATE_PATTERN.findall(odata_filter)}
+                if 'eq' in bounds:
+                    date_from = date_to = bounds['eq']
+                elif 'ge' in bounds and 'le' in bounds:
+                    date_from, date_to = bounds['ge'], bounds['le']
+                else:
+                    raise ValueError("wymagany filtr business_date")
+
+                published = PUBLICATION_PATTERN.search(odata_filter)
+                select = query['$select'].split(',') if query.get('$select') else None
+                rows = server.fixtures.pse_rows(date_from, date_to,
+                                                published.group(1) if published else None, select)
+                body = json.dumps({'value': rows}, ensure_ascii=False).encode('utf-8')
+                self._send(200, body, 'application/json; charset=utf-8')
+
+            def _entsoe(self, query: dict):
+                if query.get('documentType') != 'A75':
+                    raise ValueError("obsługiwany jest tylko documentType=A75")
+                body = server.fixtures.entsoe_xml(query['periodStart'], query['periodEnd'])
+                self._send(200, body, 'application/xml')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serwer odtwarzający API PSE i ENTSO-E z fixture'ów")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Katalog z nagranymi odpowiedziami")
+    parser.add_argument('--latency', type=float, default=0, help="Opóźnienie odpowiedzi w ms")
+    parser.add_argument('--jitter', type=float, default=0, help="Losowy rozrzut opóźnienia +/- w ms")
+    parser.add_argument('--error-rate', type=float, default=0, help="Odsetek zapytań z błędem (0-1)")
+    parser.add_argument('--error-status', type=int, default=503, help="Status wstrzykiwanych błędów")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Limit zapytań/s (nadmiar: 429)")
+    parser.add_argument('--seed', type=int, default=None, help="Ziarno losowości (powtarzalne błędy)")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.host, args.port, args.fixtures, args.latency, args.jitter,
+                          args.error_rate, args.error_status, args.rate_limit, args.seed)
+    print(f"🔁 Serwer odtwarzający działa na {server.url}")
+    print(f"   export PSE_API_BASE_URL={server.pse_base_url}")
+    print(f"   export ENTSOE_API_ENDPOINT={server.entsoe_endpoint}")
+    print(f"   export ENTSOE_API_KEY=replay")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Zatrzymano - zapytania: {server.stats}")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,20 @@ Moduł łączący dane z PSE i ENTSO-E w jeden kompleksowy analizator.
 import pandas as pd
 from typing import Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import json
+import time
 
-from pse_energy_scraper import PSEEnergyDataFetcher, EnergyDataAnalyzer
+from pse_energy_scraper import PSEEnergyDataFetcher, EnergyDataAnalyzer, PeriodSumIndex, RollupCube, compute_period_stats
 from entsoe_data_fetcher import ENTSOEDataFetcher
+from energy_store import EnergyDataStore
+from instrumentation import metrics
+from log_output import get_logger, emit_progress, is_quiet, ProgressCallback, SourceLogBuffer
+from frame_dtypes import compact_frame
+
+
+logger = get_logger('combined')
+entsoe_logger = get_logger('entsoe')
 
 # Eksportowane klasy i funkcje
 __all__ = [
@@ -23,126 +33,93 @@ __all__ = [
 class CombinedEnergyDataFetcher:
     """Klasa łącząca dane z PSE i ENTSO-E."""
     
-    def __init__(self, entsoe_api_key: Optional[str] = None):
+    def __init__(self, entsoe_api_key: Optional[str] = None, store: Optional[EnergyDataStore] = None,
+                 progress_callback: Optional[ProgressCallback] = None, compact_dtypes: bool = False):
         """
         Inicjalizacja fetcher'a łączącego oba źródła danych.
         
         Args:
             entsoe_api_key: Klucz API ENTSO-E (opcjonalny, może być w .env)
+            store: Lokalny magazyn danych - połączone dane są w nim zapisywane
+                   po każdym pobraniu (opcjonalny)
+            progress_callback: Funkcja otrzymująca zdarzenia postępu - dni PSE, fragmenty
+                               ENTSO-E oraz etapy {'source': 'combined', 'event': 'stage',
+                               'stage': 'merge' | 'validate' | 'done'} (patrz log_output)
+            compact_dtypes: Kompaktowy układ typów w obu źródłach i w połączonej ramce
+                            (float32, marker DST int8 - patrz frame_dtypes)
         """
-        self.pse_fetcher = PSEEnergyDataFetcher()
+        self.progress_callback = progress_callback
+        self.compact_dtypes = compact_dtypes
+        self.pse_fetcher = PSEEnergyDataFetcher(progress_callback=progress_callback, compact_dtypes=compact_dtypes)
+        self.store = store
         
         try:
-            self.entsoe_fetcher = ENTSOEDataFetcher(api_key=entsoe_api_key)
+            self.entsoe_fetcher = ENTSOEDataFetcher(api_key=entsoe_api_key, progress_callback=progress_callback,
+                                                    compact_dtypes=compact_dtypes)
             self.entsoe_available = True
         except ValueError as e:
-            print(f"⚠️  ENTSO-E nie jest dostępne: {e}")
+            logger.warning(f"⚠️  ENTSO-E nie jest dostępne: {e}")
             self.entsoe_available = False
     
-    def fetch_combined_data(self, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    @metrics.timed('fetch', source='combined')
+    def fetch_combined_data(self, date_from: str, date_to: str,
+                            columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera i łączy dane z PSE i ENTSO-E.
         
         Args:
             date_from: Data początkowa w formacie YYYY-MM-DD
             date_to: Data końcowa w formacie YYYY-MM-DD
+            columns: Potrzebne kolumny PSE i ENTSO-E (domyślnie wszystkie). Każde źródło
+                     pobiera i parsuje tylko swoje kolumny, a ENTSO-E nie jest pobierane,
+                     gdy żadna z jego kolumn nie jest potrzebna. Dane z projekcją nie są
+                     zapisywane w magazynie (pokrycie dni dotyczy pełnych danych).
             
         Returns:
             DataFrame z połączonymi danymi lub None w przypadku błędu
+            
+        Raises:
+            ValueError: gdy columns zawiera kolumnę nieznaną w obu źródłach
         """
-        print("=" * 70)
-        print(f"📊 Pobieranie danych dla okresu {date_from} - {date_to}")
-        print("=" * 70)
-        print()
+        pse_columns, entsoe_columns = self._split_columns(columns)
+        
+        logger.info("=" * 70)
+        logger.info(f"📊 Pobieranie danych dla okresu {date_from} - {date_to}")
+        logger.info("=" * 70)
+        logger.info('')
         
-        # Pobierz dane z PSE
-        print("🔌 PSE - Dane rynkowe...")
-        df_pse = self.pse_fetcher.fetch_data(date_from, date_to)
+        # Pobierz dane z PSE i ENTSO-E (jeśli dostępne) równolegle
+        df_pse, df_entsoe = self._fetch_sources(date_from, date_to, pse_columns, entsoe_columns)
         
         if df_pse is None or df_pse.empty:
-            print("⚠️  Brak danych z PSE")
+            logger.warning("⚠️  Brak danych z PSE")
             return None
         
-        # Pobierz dane z ENTSO-E (jeśli dostępne)
-        df_entsoe = None
-        if self.entsoe_available:
-            print()
-            print("⚡ ENTSO-E - Dane o produkcji...")
-            df_entsoe = self.entsoe_fetcher.fetch_generation_data(date_from, date_to)
-        
         # Połącz dane
         if df_entsoe is not None and not df_entsoe.empty:
-            print()
-            print("🔗 Łączenie danych PSE + ENTSO-E...")
-            
-            # Upewnij się że oba DataFrame mają kolumnę Data jako index
-            if 'Data' not in df_pse.index.names:
-                if 'Data' in df_pse.columns:
-                    df_pse.set_index('Data', inplace=True)
-            
-            if 'Data' not in df_entsoe.index.names:
-                if 'Data' in df_entsoe.columns:
-                    df_entsoe.set_index('Data', inplace=True)
-            
-            # Konwertuj strefy czasowe do jednolitego formatu
-            # PSE używa czasu lokalnego bez tz, ENTSO-E ma timezone
-            
-            # Jeśli PSE nie ma tz, dodaj tz lokalną i od razu usuń (dla porównań bez tz)
-            if df_pse.index.tz is None:
-                # Sprawdź czy mamy markery DST (kolumna _dst_marker)
-                if '_dst_marker' in df_pse.columns and (df_pse['_dst_marker'] != '').any():
-                    # Użyj markera do określenia czy timestamp jest przed (False) czy po (True) zmianie czasu
-                    # 'first' = przed zmianą (DST=True), 'second' = po zmianie (DST=False)
-                    ambiguous_array = df_pse['_dst_marker'].map({'first': True, 'second': False, '': 'infer'})
-                    df_pse.index = df_pse.index.tz_localize('Europe/Warsaw', ambiguous=ambiguous_array.tolist(), nonexistent='shift_forward')
-                    # Usuń kolumnę pomocniczą
-                    df_pse.drop(columns=['_dst_marker'], inplace=True)
-                else:
-                    # Brak markerów DST - użyj 'NaT' dla niejednoznacznych (usuniemy je później)
-                    try:
-                        df_pse.index = df_pse.index.tz_localize('Europe/Warsaw', ambiguous='infer', nonexistent='shift_forward')
-                    except Exception:
-                        # Jeśli 'infer' nie działa, użyj 'NaT' aby oznaczyć niejednoznaczne jako brakujące
-                        df_pse.index = df_pse.index.tz_localize('Europe/Warsaw', ambiguous='NaT', nonexistent='shift_forward')
-                    # Zapisz liczbę rekordów przed usunięciem
-                    before_removal = len(df_pse)
-                    # Znajdź daty z NaT (to są dni DST)
-                    nat_mask = df_pse.index.isna()
-                    if nat_mask.any():
-                        # Znajdź datę z pierwszym NaT (to jest dzień DST)
-                        # Sprawdź kolumnę Data jeśli istnieje
-                        if 'Data' in df_pse.columns:
-                            problem_dates = df_pse[nat_mask]['Data'].dt.date.unique()
-                            problem_date = problem_dates[0].strftime('%Y-%m-%d') if len(problem_dates) > 0 else 'nieznana'
-                        else:
-                            # Spróbuj znaleźć z sąsiednich timestampów
-                            valid_dates = df_pse[~nat_mask].index
-                            problem_date = valid_dates.min().strftime('%Y-%m-%d') if len(valid_dates) > 0 else 'nieznana'
-                    else:
-                        problem_date = 'nieznana'
-                    
-                    # Usuń wiersze z NaT
-                    df_pse = df_pse[df_pse.index.notna()]
-                    removed_count = before_removal - len(df_pse)
-                    
-                    if removed_count > 0:
-                        print(f"   ⏰ Dzień zmiany czasu ({problem_date}): usunięto {removed_count} niejednoznaczych pomiarów")
-                # Usuń timezone od razu przez konwersję na naive datetime
-                df_pse.index = pd.DatetimeIndex(df_pse.index.tz_localize(None))
-            
-            # Jeśli ENTSO-E ma inną tz, konwertuj do Europe/Warsaw i usuń tz
-            if df_entsoe.index.tz is not None:
-                df_entsoe.index = df_entsoe.index.tz_convert('Europe/Warsaw')
-                # Usuń timezone przez konwersję na naive datetime
-                df_entsoe.index = pd.DatetimeIndex(df_entsoe.index.tz_localize(None))
-            else:
-                # Jeśli nie ma tz, dodaj Europe/Warsaw i usuń
-                try:
-                    df_entsoe.index = df_entsoe.index.tz_localize('Europe/Warsaw', ambiguous='infer', nonexistent='shift_forward')
-                except Exception:
-                    df_entsoe.index = df_entsoe.index.tz_localize('Europe/Warsaw', ambiguous='NaT', nonexistent='shift_forward')
-                    df_entsoe = df_entsoe[df_entsoe.index.notna()]
-                df_entsoe.index = pd.DatetimeIndex(df_entsoe.index.tz_localize(None))
+            logger.info('')
+            logger.info("🔗 Łączenie danych PSE + ENTSO-E...")
+            emit_progress(self.progress_callback, source='combined', event='stage', stage='merge')
+            merge_start = time.perf_counter()
+            
+            # Oba źródła łączone po kanonicznym czasie UTC (początek przedziału):
+            # PSE ma kolumnę Data_UTC z parsera (markery 02a/02b rozstrzygnięte przy
+            # parsowaniu), ENTSO-E zwraca czas ze strefą - bez ponownej lokalizacji
+            # i bez usuwania niejednoznacznych pomiarów z dnia zmiany czasu
+            time_key = PSEEnergyDataFetcher.TIME_KEY
+            if 'Data' not in df_pse.columns:
+                df_pse = df_pse.reset_index()
+            if time_key not in df_pse.columns:
+                markers = df_pse['_dst_marker'] if '_dst_marker' in df_pse.columns else None
+                df_pse.insert(df_pse.columns.get_loc('Data') + 1, time_key,
+                              PSEEnergyDataFetcher.local_to_utc(pd.to_datetime(df_pse['Data']), markers))
+            df_pse = df_pse.drop(columns=['_dst_marker'], errors='ignore').set_index(time_key)
+            
+            entsoe_times = pd.DatetimeIndex(df_entsoe['Data'] if 'Data' in df_entsoe.columns else df_entsoe.index)
+            if entsoe_times.tz is None:
+                entsoe_times = entsoe_times.tz_localize('Europe/Warsaw', ambiguous='NaT', nonexistent='shift_forward')
+            df_entsoe = df_entsoe.drop(columns=['Data'], errors='ignore').set_axis(entsoe_times.tz_convert('UTC'))
+            df_entsoe = df_entsoe[df_entsoe.index.notna()]
             
             # Filtruj ENTSO-E do tego samego zakresu dat co PSE
             # ENTSO-E może mieć dane wykraczające poza żądany okres (pobranie od poprzedniego dnia)
@@ -154,9 +131,9 @@ class CombinedEnergyDataFetcher:
             # WAŻNE: Usuń duplikaty z ENTSO-E PRZED łączeniem
             # ENTSO-E może mieć duplikaty dla tego samego timestampu
             if df_entsoe.index.duplicated().any():
-                print(f"   ⚠️  ENTSO-E: wykryto {df_entsoe.index.duplicated().sum()} duplikatów")
+                logger.warning(f"   ⚠️  ENTSO-E: wykryto {df_entsoe.index.duplicated().sum()} duplikatów")
                 df_entsoe = df_entsoe[~df_entsoe.index.duplicated(keep='first')]
-                print(f"   ✓ Usunięto duplikaty ENTSO-E, pozostało {len(df_entsoe)} rekordów")
+                logger.warning(f"   ✓ Usunięto duplikaty ENTSO-E, pozostało {len(df_entsoe)} rekordów")
             
             # Diagnostyka przed merge
             pse_count = len(df_pse)
@@ -176,44 +153,231 @@ class CombinedEnergyDataFetcher:
             )
             
             # Nie wypełniaj NaN zerami - zostaw jako NaN aby średnia była poprawna
+            # Kolumna Data_UTC wraca na miejsce tuż za lokalną kolumną Data
             df_combined.reset_index(inplace=True)
-            
-            # Przetwarzanie dat
-            df_combined['Data'] = pd.to_datetime(df_combined['Data'])
+            utc_column = df_combined.pop(time_key)
+            df_combined.insert(df_combined.columns.get_loc('Data') + 1, time_key, utc_column)
             
             # Sprawdź duplikaty przed usunięciem
             duplicates_before = len(df_combined)
-            duplicate_timestamps = df_combined['Data'].duplicated().sum()
+            duplicate_timestamps = df_combined[time_key].duplicated().sum()
             
             # USUŃ DUPLIKATY - zachowaj pierwszy wystąpienie
             if duplicate_timestamps > 0:
-                print(f"\n⚠️  Wykryto {duplicate_timestamps} zduplikowanych timestampów")
-                df_combined = df_combined.drop_duplicates(subset=['Data'], keep='first')
-                print(f"   Usunięto {duplicates_before - len(df_combined)} duplikatów")
+                logger.warning(f"\n⚠️  Wykryto {duplicate_timestamps} zduplikowanych timestampów")
+                df_combined = df_combined.drop_duplicates(subset=[time_key], keep='first')
+                logger.warning(f"   Usunięto {duplicates_before - len(df_combined)} duplikatów")
+            
+            if self.compact_dtypes:
+                # Źródła są już kompaktowe - tu tylko kolumny, które powstały przy łączeniu
+                df_combined = compact_frame(df_combined)
+            
+            metrics.record('merge', time.perf_counter() - merge_start, source='combined')
             
             # Statystyki łączenia
             merged_count = len(df_combined)
             entsoe_matched = df_combined.iloc[:, -1].notna().sum()  # Ostatnia kolumna z ENTSO-E
             
-            print(f"✓ Połączono {merged_count} rekordów (po usunięciu duplikatów)")
-            print(f"   PSE: {pse_count}, ENTSO-E: {entsoe_count}")
-            print(f"   Wspólne timestampy: {common_timestamps}")
-            print(f"   Dopasowano ENTSO-E: {entsoe_matched} / {merged_count} ({entsoe_matched/merged_count*100:.1f}%)")
+            logger.info(f"✓ Połączono {merged_count} rekordów (po usunięciu duplikatów)")
+            logger.info(f"   PSE: {pse_count}, ENTSO-E: {entsoe_count}")
+            logger.info(f"   Wspólne timestampy: {common_timestamps}")
+            logger.info(f"   Dopasowano ENTSO-E: {entsoe_matched} / {merged_count} ({entsoe_matched/merged_count*100:.1f}%)")
             
             # Walidacja ciągłości danych
-            validation = validate_data_continuity(df_combined, date_from, date_to)
+            emit_progress(self.progress_callback, source='combined', event='stage', stage='validate')
+            with metrics.span('validate', source='combined'):
+                validation = validate_data_continuity(df_combined, date_from, date_to)
             print_data_quality_report(validation)
             
+            # Źródła dnia w magazynie wyznaczane z danych - dni z lukami ENTSO-E
+            # nie są oznaczane jako kompletne
+            pse_value_columns = [col for col in df_pse.columns if col != 'Data']
+            self._save_to_store(df_combined, columns, {
+                'pse': pse_value_columns,
+                'entsoe': [col for col in df_combined.columns
+                           if col not in pse_value_columns and col not in ('Data', time_key)],
+            }, attempted=['pse', 'entsoe'])
+            emit_progress(self.progress_callback, source='combined', event='stage', stage='done',
+                          records=len(df_combined))
             return df_combined
         else:
-            print()
-            print("⚠️  Używam tylko danych PSE")
+            logger.info('')
+            if entsoe_columns == []:
+                logger.info("ℹ️  Wybrano tylko kolumny PSE - ENTSO-E nie jest pobierane")
+            else:
+                logger.warning("⚠️  Używam tylko danych PSE")
             
             # Walidacja dla samych danych PSE
-            validation = validate_data_continuity(df_pse, date_from, date_to)
+            emit_progress(self.progress_callback, source='combined', event='stage', stage='validate')
+            with metrics.span('validate', source='combined'):
+                validation = validate_data_continuity(df_pse, date_from, date_to)
             print_data_quality_report(validation)
             
+            self._save_to_store(df_pse, columns, {
+                'pse': [col for col in df_pse.columns
+                        if col not in ('Data', PSEEnergyDataFetcher.TIME_KEY, '_dst_marker')],
+            }, attempted=['pse', 'entsoe'] if self.entsoe_available and entsoe_columns != [] else ['pse'])
+            emit_progress(self.progress_callback, source='combined', event='stage', stage='done',
+                          records=len(df_pse))
             return df_pse
+    
+    def sync_store(self, date_from: str, date_to: Optional[str] = None) -> dict:
+        """
+        Uzupełnia lokalny magazyn - pobiera tylko dni brakujące, ulotne lub z lukami źródeł.
+        
+        Pokrycie magazynu (manifest) porównywane jest dzień po dniu z zadanym okresem
+        i wymaganymi źródłami; dni do pobrania (także zapisane bez danych ENTSO-E)
+        grupowane są w ciągłe zakresy i pobierane przez fetch_combined_data, który
+        scala je z magazynem i aktualizuje manifest. Dni już zapisane w komplecie
+        i zamknięte nie są pobierane ponownie, a źródło pobrane dla zamkniętego dnia
+        bez danych - tylko ograniczoną liczbę razy (patrz EnergyDataStore).
+        
+        Args:
+            date_from: Data początkowa w formacie YYYY-MM-DD
+            date_to: Data końcowa w formacie YYYY-MM-DD (domyślnie dzisiaj)
+            
+        Returns:
+            Słownik z podsumowaniem: 'brakujące_dni', 'luki_źródeł' (dni zapisane bez części
+            źródeł), 'zakresy', 'nieudane_zakresy', 'tylko_pse' (zakresy zapisane po
+            synchronizacji bez danych ENTSO-E - ponawiane ograniczoną liczbę razy)
+        """
+        if self.store is None:
+            raise ValueError("Synchronizacja wymaga magazynu danych (CombinedEnergyDataFetcher(store=...))")
+        
+        date_to = date_to or datetime.now().strftime('%Y-%m-%d')
+        sources = ['pse', 'entsoe'] if self.entsoe_available else ['pse']
+        
+        missing = self.store.missing_sources(date_from, date_to, sources)
+        source_gaps = [day for day in missing
+                       if self.store.day_info(day) is not None and not self.store.is_volatile(day)]
+        ranges = self.store.day_ranges(list(missing))
+        
+        logger.info(f"🔄 Synchronizacja magazynu {date_from} - {date_to}: "
+                    f"{len(missing)} dni do pobrania w {len(ranges)} zakresach")
+        if source_gaps:
+            logger.info(f"   w tym {len(source_gaps)} dni zapisanych z lukami źródeł "
+                        f"(np. bez danych ENTSO-E)")
+        
+        failed = []
+        pse_only = []
+        for range_from, range_to in ranges:
+            df = self.fetch_combined_data(range_from, range_to)
+            if df is None or df.empty:
+                failed.append((range_from, range_to))
+                continue
+            if 'entsoe' in sources:
+                gaps = self.store.missing_sources(range_from, range_to, sources, include_volatile=False,
+                                                  include_attempted=True)
+                pse_only.extend(self.store.day_ranges([day for day, absent in gaps.items() if absent == ['entsoe']]))
+        
+        if failed:
+            logger.warning(f"⚠️  Nie udało się pobrać {len(failed)} zakresów: "
+                           f"{', '.join(f'{start} - {end}' for start, end in failed)}")
+        if pse_only:
+            logger.warning(f"⚠️  Zapisano tylko dane PSE (brak ENTSO-E) dla {len(pse_only)} zakresów: "
+                           f"{', '.join(f'{start} - {end}' for start, end in pse_only)} "
+                           f"- ponawiane przy kolejnych synchronizacjach, najwyżej "
+                           f"{self.store.MAX_SOURCE_ATTEMPTS} razy")
+        if not failed and not pse_only:
+            logger.info("✅ Magazyn zsynchronizowany")
+        
+        return {
+            'brakujące_dni': len(missing),
+            'luki_źródeł': len(source_gaps),
+            'zakresy': ranges,
+            'nieudane_zakresy': failed,
+            'tylko_pse': pse_only,
+        }
+    
+    def _save_to_store(self, df: pd.DataFrame, columns: Optional[list], source_columns: dict,
+                       attempted: list):
+        """
+        Zapisuje pobrane dane w lokalnym magazynie (jeśli skonfigurowany).
+        
+        Args:
+            df: Pobrane dane
+            columns: Projekcja kolumn z fetch_combined_data (dane z projekcją nie są zapisywane)
+            source_columns: Kolumny źródeł {'pse': [...], 'entsoe': [...]} - źródła dnia
+                            w manifeście wyznaczane są z ich wartości
+            attempted: Pobierane źródła - źródło bez danych zamkniętego dnia zapisywane
+                       jest jako próba i ponawiane ograniczoną liczbę razy
+        """
+        if self.store is None:
+            return
+        if columns is not None:
+            logger.info("💾 Magazyn: dane z wybranymi kolumnami nie są zapisywane")
+            return
+        try:
+            with metrics.span('store_write', source='combined'):
+                partitions = self.store.write(df, sources=list(source_columns), source_columns=source_columns,
+                                              attempted=attempted)
+            logger.info(f"💾 Magazyn: zaktualizowano {len(partitions)} partycji ({self.store.store_dir})")
+        except Exception as e:
+            logger.warning(f"⚠️  Nie udało się zapisać danych w magazynie: {e}")
+    
+    @staticmethod
+    def _split_columns(columns: Optional[list]) -> tuple:
+        """
+        Dzieli kolumny projekcji na kolumny PSE i ENTSO-E.
+        
+        Returns:
+            Krotka (kolumny PSE, kolumny ENTSO-E) - (None, None) gdy potrzebne są wszystkie
+        """
+        if columns is None:
+            return None, None
+        time_columns = ('Data', PSEEnergyDataFetcher.TIME_KEY)
+        pse_columns = [column for column in columns if column in PSEEnergyDataFetcher.COLUMN_FIELDS]
+        entsoe_columns = [column for column in columns if column in ENTSOEDataFetcher.COLUMN_PSR_TYPES]
+        unknown = [column for column in columns
+                   if column not in pse_columns and column not in entsoe_columns and column not in time_columns]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny: {', '.join(unknown)}")
+        return pse_columns, entsoe_columns
+    
+    def _fetch_sources(self, date_from: str, date_to: str, pse_columns: Optional[list] = None,
+                       entsoe_columns: Optional[list] = None) -> tuple:
+        """
+        Pobiera dane z PSE i ENTSO-E jednocześnie.
+        
+        Oba źródła są niezależne, więc ENTSO-E pobierane jest w osobnym wątku,
+        a łączny czas jest zbliżony do czasu wolniejszego z nich. Komunikaty PSE
+        są wypisywane na bieżąco, komunikaty ENTSO-E (logger 'energia.entsoe',
+        ze wszystkich jego wątków) - zbierane i wypisywane po zakończeniu PSE.
+        
+        Args:
+            pse_columns: Kolumny PSE (None - wszystkie; PSE jest zawsze pobierane jako oś czasu)
+            entsoe_columns: Kolumny ENTSO-E (None - wszystkie, pusta lista - bez ENTSO-E)
+        
+        Returns:
+            Krotka (df_pse, df_entsoe) - df_entsoe jest None gdy ENTSO-E niedostępne lub niepotrzebne
+        """
+        if not self.entsoe_available or entsoe_columns == []:
+            logger.info("🔌 PSE - Dane rynkowe...")
+            return self.pse_fetcher.fetch_data(date_from, date_to, columns=pse_columns), None
+        
+        def fetch_entsoe():
+            entsoe_logger.info('')
+            entsoe_logger.info("⚡ ENTSO-E - Dane o produkcji...")
+            return self.entsoe_fetcher.fetch_generation_data(date_from, date_to, entsoe_columns)
+        
+        # Tryb cichy - nic nie trafia na konsolę, więc komunikaty nie są wstrzymywane
+        entsoe_log = SourceLogBuffer('entsoe')
+        if not is_quiet():
+            entsoe_log.start()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                entsoe_future = executor.submit(fetch_entsoe)
+                
+                logger.info("🔌 PSE - Dane rynkowe...")
+                df_pse = self.pse_fetcher.fetch_data(date_from, date_to, columns=pse_columns)
+                
+                # PSE zakończone - wypisz zebrane komunikaty ENTSO-E i dalej pisz na bieżąco
+                entsoe_log.release()
+                df_entsoe = entsoe_future.result()
+        finally:
+            entsoe_log.release()
+        
+        return df_pse, df_entsoe
 
 
 def validate_data_continuity(df: pd.DataFrame, date_from: str, date_to: str, expected_interval_minutes: int = 15) -> dict:
@@ -235,8 +399,6 @@ def validate_data_continuity(df: pd.DataFrame, date_from: str, date_to: str, exp
         - missing_days: list - lista dni z niekompletnymi danymi
         - records_per_day: dict - liczba rekordów dla każdego dnia
     """
-    from datetime import timedelta
-    
     # Oblicz oczekiwaną liczbę rekordów
     start_date = datetime.strptime(date_from, '%Y-%m-%d')
     end_date = datetime.strptime(date_to, '%Y-%m-%d')
@@ -247,68 +409,75 @@ def validate_data_continuity(df: pd.DataFrame, date_from: str, date_to: str, exp
     actual_total = len(df)
     missing_total = expected_total - actual_total
     
-    # Sprawdź liczbę rekordów dla każdego dnia
-    df_check = df.copy()
-    if 'Data' not in df_check.columns:
-        df_check = df_check.reset_index()
+    # Timestampy bez kopiowania całej ramki
+    if 'Data' in df.columns:
+        timestamps = pd.to_datetime(df['Data'])
+    else:
+        timestamps = pd.to_datetime(pd.Series(df.index, name='Data'))
     
-    df_check['Data'] = pd.to_datetime(df_check['Data'])
-    df_check['Date_Only'] = df_check['Data'].dt.date
+    # Dzień kalendarzowy każdego rekordu (czas lokalny, bez strefy)
+    days = timestamps.dt.normalize()
+    if days.dt.tz is not None:
+        days = days.dt.tz_localize(None)
     
-    records_by_day = df_check.groupby('Date_Only').size().to_dict()
+    counts = days.value_counts().sort_index()
+    records_by_day = {day.date(): int(count) for day, count in counts.items()}
     
-    # Sprawdź duplikaty
-    duplicate_timestamps = df_check['Data'].duplicated().sum()
+    # Sprawdź duplikaty (po czasie UTC, jeśli jest - lokalny czas powtarza
+    # godzinę 02:00-03:00 w dniu zmiany czasu zimowego)
+    keys = df['Data_UTC'] if 'Data_UTC' in df.columns else timestamps
+    duplicate_timestamps = keys.duplicated().sum()
     duplicate_days = []
     if duplicate_timestamps > 0:
         # Znajdź dni z duplikatami
-        df_check['has_duplicate'] = df_check['Data'].duplicated(keep=False)
-        days_with_dups = df_check[df_check['has_duplicate']].groupby('Date_Only').size()
-        for date, dup_count in days_with_dups.items():
+        days_with_dups = days[keys.duplicated(keep=False).to_numpy()].value_counts().sort_index()
+        for day, dup_count in days_with_dups.items():
             duplicate_days.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'duplicate_count': dup_count - records_by_day.get(date, 0)
+                'date': day.strftime('%Y-%m-%d'),
+                'duplicate_count': dup_count - records_by_day.get(day.date(), 0)
             })
     
+    # Liczba rekordów dla każdego dnia kalendarza (jeden reindex, brakujące dni = 0)
+    calendar = pd.date_range(start_date, end_date, freq='D')
+    per_day = counts.reindex(calendar, fill_value=0)
+    
     # Znajdź dni z niekompletnymi danymi
     # Uwaga: dni zmiany czasu mogą mieć 95 (czas letni) lub 97-100 (czas zimowy) rekordów
-    missing_days = []
-    dst_transition_days = []
-    days_with_excess = []  # Dni z nadmiarem danych (>100)
-    current_date = start_date.date()
-    end_date_only = end_date.date()
-    
-    while current_date <= end_date_only:
-        count = records_by_day.get(current_date, 0)
-        
-        # Tolerancja dla dni zmiany czasu:
-        # - Czas zimowy (październik): 100 rekordów (powtórzona godzina 2)
-        # - Czas zimowy z usuniętymi niejednoznacznymi: 92-96 rekordów
-        # - Czas letni (marzec): 92 rekordy (przeskoczona godzina 2)
-        if 92 <= count <= 100 and count != records_per_day:
-            # Prawdopodobnie dzień zmiany czasu
-            dst_transition_days.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'expected': records_per_day,
-                'actual': count,
-                'note': 'Prawdopodobnie dzień zmiany czasu'
-            })
-        elif count < 92:  # Wyraźnie brakuje danych (nie jest to tylko DST)
-            missing_days.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'expected': records_per_day,
-                'actual': count,
-                'missing': records_per_day - count
-            })
-        elif count > 100:  # Nadmiar danych (prawdopodobnie duplikaty)
-            days_with_excess.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'expected': records_per_day,
-                'actual': count,
-                'excess': count - records_per_day
-            })
-        
-        current_date += timedelta(days=1)
+    # Tolerancja dla dni zmiany czasu:
+    # - Czas zimowy (październik): 100 rekordów (powtórzona godzina 2)
+    # - Czas zimowy z usuniętymi niejednoznacznymi: 92-96 rekordów
+    # - Czas letni (marzec): 92 rekordy (przeskoczona godzina 2)
+    dst_mask = (per_day >= 92) & (per_day <= 100) & (per_day != records_per_day)
+    missing_mask = per_day < 92  # Wyraźnie brakuje danych (nie jest to tylko DST)
+    excess_mask = per_day > 100  # Nadmiar danych (prawdopodobnie duplikaty)
+    
+    dst_transition_days = [
+        {
+            'date': day.strftime('%Y-%m-%d'),
+            'expected': records_per_day,
+            'actual': int(count),
+            'note': 'Prawdopodobnie dzień zmiany czasu'
+        }
+        for day, count in per_day[dst_mask].items()
+    ]
+    missing_days = [
+        {
+            'date': day.strftime('%Y-%m-%d'),
+            'expected': records_per_day,
+            'actual': int(count),
+            'missing': records_per_day - int(count)
+        }
+        for day, count in per_day[missing_mask].items()
+    ]
+    days_with_excess = [
+        {
+            'date': day.strftime('%Y-%m-%d'),
+            'expected': records_per_day,
+            'actual': int(count),
+            'excess': int(count) - records_per_day
+        }
+        for day, count in per_day[excess_mask].items()
+    ]
     
     return {
         'is_complete': missing_total == 0,
@@ -334,35 +503,35 @@ def print_data_quality_report(validation_result: dict, save_to_file: Optional[st
         validation_result: Wynik z validate_data_continuity()
         save_to_file: Opcjonalna ścieżka do zapisania raportu w JSON
     """
-    print("\n" + "=" * 70)
-    print("📋 RAPORT JAKOŚCI DANYCH")
-    print("=" * 70)
+    logger.info("\n" + "=" * 70)
+    logger.info("📋 RAPORT JAKOŚCI DANYCH")
+    logger.info("=" * 70)
     
-    print(f"\nOczekiwano:     {validation_result['expected_records']:,} rekordów")
-    print(f"Pobrano:        {validation_result['actual_records']:,} rekordów")
-    print(f"Brakuje:        {validation_result['missing_records']:,} rekordów")
-    print(f"Kompletność:    {(validation_result['actual_records'] / validation_result['expected_records'] * 100):.2f}%")
+    logger.info(f"\nOczekiwano:     {validation_result['expected_records']:,} rekordów")
+    logger.info(f"Pobrano:        {validation_result['actual_records']:,} rekordów")
+    logger.info(f"Brakuje:        {validation_result['missing_records']:,} rekordów")
+    logger.info(f"Kompletność:    {(validation_result['actual_records'] / validation_result['expected_records'] * 100):.2f}%")
     
-    print(f"\nOczekiwano:     {validation_result['records_per_day_expected']} rekordów/dzień")
-    print(f"Okres:          {validation_result['days_count']} dni")
+    logger.info(f"\nOczekiwano:     {validation_result['records_per_day_expected']} rekordów/dzień")
+    logger.info(f"Okres:          {validation_result['days_count']} dni")
     
     # Informacja o duplikatach
     dup_count = validation_result.get('duplicate_timestamps', 0)
     if dup_count > 0:
-        print(f"\n🔄 Uwaga: Wykryto i usunięto {dup_count} duplikatów")
+        logger.info(f"\n🔄 Uwaga: Wykryto i usunięto {dup_count} duplikatów")
         dup_days = validation_result.get('duplicate_days', [])
         if dup_days:
-            print(f"   Dni z duplikatami:")
+            logger.info(f"   Dni z duplikatami:")
             for day_info in dup_days[:5]:
-                print(f"   - {day_info['date']}")
+                logger.info(f"   - {day_info['date']}")
             if len(dup_days) > 5:
-                print(f"   ... i {len(dup_days) - 5} więcej")
+                logger.info(f"   ... i {len(dup_days) - 5} więcej")
     
     # Informacja o dniach zmiany czasu
     dst_days = validation_result.get('dst_transition_days', [])
     if dst_days:
-        print(f"\n⏰ DZIEŃ ZMIANY CZASU - wykryto {len(dst_days)} dni:")
-        print("-" * 70)
+        logger.info(f"\n⏰ DZIEŃ ZMIANY CZASU - wykryto {len(dst_days)} dni:")
+        logger.info("-" * 70)
         for day_info in dst_days:
             actual = day_info['actual']
             expected = day_info['expected']
@@ -391,34 +560,34 @@ def print_data_quality_report(validation_result: dict, save_to_file: Optional[st
                 else:
                     explanation = f"{actual - expected} dodatkowych pomiarów"
             
-            print(f"\n📅 {day_info['date']}")
-            print(f"   Typ zmiany: {change_type}")
-            print(f"   Pomiary: {actual} z {expected} oczekiwanych")
-            print(f"   {explanation}")
-            print(f"   ℹ️  To normalne - nie jest błędem systemu")
-        print("-" * 70)
+            logger.info(f"\n📅 {day_info['date']}")
+            logger.info(f"   Typ zmiany: {change_type}")
+            logger.info(f"   Pomiary: {actual} z {expected} oczekiwanych")
+            logger.info(f"   {explanation}")
+            logger.info(f"   ℹ️  To normalne - nie jest błędem systemu")
+        logger.info("-" * 70)
     
     # Informacja o dniach z nadmiarem danych (po usunięciu duplikatów - jeśli nadal są)
     excess_days = validation_result.get('days_with_excess', [])
     if excess_days:
-        print(f"\n⚠️  Wykryto {len(excess_days)} dni z nadmiarem danych:")
+        logger.warning(f"\n⚠️  Wykryto {len(excess_days)} dni z nadmiarem danych:")
         for day_info in excess_days[:5]:
-            print(f"   {day_info['date']}: {day_info['actual']} rekordów (+{day_info['excess']})")
+            logger.warning(f"   {day_info['date']}: {day_info['actual']} rekordów (+{day_info['excess']})")
         if len(excess_days) > 5:
-            print(f"   ... i {len(excess_days) - 5} więcej")
+            logger.warning(f"   ... i {len(excess_days) - 5} więcej")
     
     if validation_result['is_complete'] and not validation_result['missing_days'] and not excess_days:
-        print("\n✅ Dane są kompletne!")
+        logger.info("\n✅ Dane są kompletne!")
     else:
         missing_days = validation_result['missing_days']
         if missing_days:
             # Sprawdź które z brakujących dni to dni DST
             dst_dates = {d['date'] for d in validation_result.get('dst_transition_days', [])}
             
-            print(f"\n⚠️  Wykryto {len(missing_days)} dni z niekompletnymi danymi:")
-            print("\n" + "-" * 70)
-            print(f"{'Data':<12} {'Oczekiwano':<12} {'Pobrano':<12} {'Brakuje':<12} {'Uwaga':<20}")
-            print("-" * 70)
+            logger.warning(f"\n⚠️  Wykryto {len(missing_days)} dni z niekompletnymi danymi:")
+            logger.warning("\n" + "-" * 70)
+            logger.warning(f"{'Data':<12} {'Oczekiwano':<12} {'Pobrano':<12} {'Brakuje':<12} {'Uwaga':<20}")
+            logger.warning("-" * 70)
             
             # Pokaż maksymalnie 20 dni, resztę zsumuj
             display_limit = 20
@@ -426,39 +595,67 @@ def print_data_quality_report(validation_result: dict, save_to_file: Optional[st
                 note = ""
                 if day_info['date'] in dst_dates:
                     note = "⏰ Zmiana czasu"
-                print(f"{day_info['date']:<12} {day_info['expected']:<12} {day_info['actual']:<12} {day_info['missing']:<12} {note:<20}")
+                logger.warning(f"{day_info['date']:<12} {day_info['expected']:<12} {day_info['actual']:<12} {day_info['missing']:<12} {note:<20}")
             
             if len(missing_days) > display_limit:
                 remaining = len(missing_days) - display_limit
                 total_missing_in_remaining = sum(d['missing'] for d in missing_days[display_limit:])
-                print(f"... i jeszcze {remaining} dni (brakuje łącznie {total_missing_in_remaining} rekordów)")
+                logger.warning(f"... i jeszcze {remaining} dni (brakuje łącznie {total_missing_in_remaining} rekordów)")
             
-            print("-" * 70)
+            logger.warning("-" * 70)
     
     # Zapis do pliku jeśli podano ścieżkę
     if save_to_file:
         try:
             with open(save_to_file, 'w', encoding='utf-8') as f:
                 json.dump(validation_result, f, indent=2, ensure_ascii=False, default=str)
-            print(f"\n💾 Raport zapisano do: {save_to_file}")
+            logger.info(f"\n💾 Raport zapisano do: {save_to_file}")
         except Exception as e:
-            print(f"\n⚠️  Nie udało się zapisać raportu: {e}")
+            logger.warning(f"\n⚠️  Nie udało się zapisać raportu: {e}")
     
-    print()
+    logger.info('')
 
 
 class CombinedEnergyDataAnalyzer:
     """Klasa do analizy połączonych danych z PSE i ENTSO-E."""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, build_index: bool = False):
         """
         Inicjalizacja analizatora.
         
         Args:
             df: DataFrame z połączonymi danymi
+            build_index: Zbuduj od razu indeks sum prefiksowych (szybkie sum_period
+                         przy wielu zapytaniach o różne okresy)
         """
         self.df = df.copy()
+        self._sum_index = None
+        self._rollup = None
         self._prepare_data()
+        if build_index:
+            self.build_sum_index()
+    
+    @classmethod
+    def from_store(cls, store, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   columns: Optional[list] = None, build_index: bool = False) -> Optional['CombinedEnergyDataAnalyzer']:
+        """
+        Tworzy analizator z danych lokalnego magazynu (EnergyDataStore) - wczytuje
+        tylko partycje miesięczne obejmujące okres.
+        
+        Args:
+            store: Magazyn danych (EnergyDataStore)
+            date_from: Data początkowa (opcjonalna)
+            date_to: Data końcowa (opcjonalna, cały dzień włącznie)
+            columns: Wczytaj tylko wybrane kolumny (opcjonalne)
+            build_index: Zbuduj od razu indeks sum prefiksowych
+            
+        Returns:
+            Analizator lub None gdy magazyn nie zawiera danych okresu
+        """
+        df = store.read(date_from, date_to, columns=columns)
+        if df is None:
+            return None
+        return cls(df, build_index=build_index)
     
     def _prepare_data(self):
         """Przygotowuje dane do analizy."""
@@ -468,7 +665,7 @@ class CombinedEnergyDataAnalyzer:
         if date_columns:
             self.df['Data'] = pd.to_datetime(self.df[date_columns[0]])
         elif 'Data' not in self.df.columns:
-            print("⚠️  Nie znaleziono kolumny z datą")
+            logger.warning("⚠️  Nie znaleziono kolumny z datą")
             return
         
         self.df.set_index('Data', inplace=True)
@@ -508,36 +705,52 @@ class CombinedEnergyDataAnalyzer:
         Returns:
             Słownik z sumami dla wszystkich wskaźników
         """
-        df_filtered = self.df
-        
-        if date_from:
-            df_filtered = df_filtered[df_filtered.index >= date_from]
-        if date_to:
-            df_filtered = df_filtered[df_filtered.index <= date_to]
+        if self._sum_index is not None:
+            period = self._sum_index.query(date_from, date_to)
+        else:
+            period = compute_period_stats(self.df, list(self._value_columns().values()), date_from, date_to)
         
-        if df_filtered.empty:
+        if period is None:
             return {'błąd': 'Brak danych dla podanego okresu'}
         
         results = {
-            'okres_od': df_filtered.index.min().strftime('%Y-%m-%d %H:%M'),
-            'okres_do': df_filtered.index.max().strftime('%Y-%m-%d %H:%M'),
-            'liczba_pomiarów': len(df_filtered),
+            'okres_od': period['okres_od'].strftime('%Y-%m-%d %H:%M'),
+            'okres_do': period['okres_do'].strftime('%Y-%m-%d %H:%M'),
+            'liczba_pomiarów': period['liczba_pomiarów'],
         }
         
         # Dodaj sumy dla wszystkich dostępnych wskaźników
         # Dane są co 15 min, więc mnożymy przez 0.25h aby uzyskać MWh
-        for name, col in self.available_columns.items():
-            if col and col in df_filtered.columns:
-                sum_mw = df_filtered[col].sum()
-                mwh = sum_mw * 0.25
-                mean_mw = df_filtered[col].mean()
-                
-                results[f'{name}_suma_MW'] = round(sum_mw, 2)
-                results[f'{name}_MWh'] = round(mwh, 2)
-                results[f'{name}_średnia_MW'] = round(mean_mw, 2)
+        for name, col in self._value_columns().items():
+            sum_mw, mean_mw = period['stats'][col]
+            
+            results[f'{name}_suma_MW'] = round(sum_mw, 2)
+            results[f'{name}_MWh'] = round(sum_mw * 0.25, 2)
+            results[f'{name}_średnia_MW'] = round(mean_mw, 2)
         
         return results
     
+    def _value_columns(self) -> dict:
+        """Zwraca dostępne wskaźniki jako {nazwa: kolumna}."""
+        return {name: col for name, col in self.available_columns.items() if col and col in self.df.columns}
+    
+    def build_sum_index(self) -> PeriodSumIndex:
+        """
+        Buduje indeks sum prefiksowych - kolejne wywołania sum_period dla dowolnych
+        okresów działają wtedy w czasie stałym (dwa wyszukiwania binarne).
+        """
+        self._sum_index = PeriodSumIndex(self.df, list(dict.fromkeys(self._value_columns().values())))
+        return self._sum_index
+    
+    def build_rollup(self) -> RollupCube:
+        """
+        Buduje kostkę agregatów (godzinowe, dzienne, miesięczne) - budowana raz,
+        przy pierwszym wywołaniu get_time_series lub monthly_sums.
+        """
+        if self._rollup is None:
+            self._rollup = RollupCube(self.df, list(self._value_columns().values()))
+        return self._rollup
+    
     def get_time_series(self, resample_freq: str = '1D') -> pd.DataFrame:
         """
         Generuje szereg czasowy z agregacją dla wszystkich wskaźników.
@@ -554,13 +767,12 @@ class CombinedEnergyDataAnalyzer:
         if not cols_to_agg:
             return pd.DataFrame()
         
+        sums, ts_mean = self.build_rollup().resample(cols_to_agg, resample_freq)
+        
         # Suma z przeliczeniem na MWh
-        ts = self.df[cols_to_agg].resample(resample_freq).agg(
-            lambda x: x.sum() * 0.25
-        )
+        ts = sums * 0.25
         
         # Dodaj również średnią moc
-        ts_mean = self.df[cols_to_agg].resample(resample_freq).mean()
         ts_mean.columns = [f'{col}_średnia' for col in ts_mean.columns]
         
         result = pd.concat([ts, ts_mean], axis=1)
@@ -577,22 +789,14 @@ class CombinedEnergyDataAnalyzer:
         Returns:
             DataFrame z miesięcznymi sumami
         """
-        # Filtruj dane dla wybranych lat
-        df_filtered = self.df[
-            (self.df.index.year >= year_from) & 
-            (self.df.index.year <= year_to)
-        ]
-        
         # Pobierz wszystkie dostępne kolumny numeryczne
-        cols_to_agg = [col for col in self.available_columns.values() if col and col in df_filtered.columns]
+        cols_to_agg = [col for col in self.available_columns.values() if col and col in self.df.columns]
         
         if not cols_to_agg:
             return pd.DataFrame()
         
-        # Grupuj po miesiącach i sumuj (konwersja MW -> MWh poprzez * 0.25)
-        monthly = df_filtered[cols_to_agg].resample('1ME').agg(
-            lambda x: x.sum() * 0.25
-        )
+        # Sumy miesięczne z kostki agregatów (konwersja MW -> MWh poprzez * 0.25)
+        monthly = self.build_rollup().monthly_sums(cols_to_agg, year_from, year_to) * 0.25
         
         # Formatuj kolumny z jednostkami
         monthly.columns = [f'{col}_suma_MW' for col in monthly.columns]
@@ -602,12 +806,12 @@ class CombinedEnergyDataAnalyzer:
     def export_to_csv(self, filename: str):
         """Eksportuje dane do CSV (format europejski)."""
         self.df.to_csv(filename, sep=';', decimal=',', encoding='utf-8-sig')
-        print(f"💾 Zapisano: {filename}")
+        logger.info(f"💾 Zapisano: {filename}")
     
     def export_to_json(self, filename: str):
         """Eksportuje dane do JSON."""
         self.df.reset_index().to_json(filename, orient='records', date_format='iso', force_ascii=False, indent=2)
-        print(f"💾 Zapisano: {filename}")
+        logger.info(f"💾 Zapisano: {filename}")
 
 
 def main():
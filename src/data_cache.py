@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Lokalny cache danych pobranych z API (PSE i ENTSO-E).
+
+Zamknięte doby biznesowe PSE nie zmieniają się, więc nie ma sensu pobierać ich
+przy każdym uruchomieniu. Cache przechowuje sparsowane dane każdego dnia
+w osobnym pliku kolumnowym (Parquet, jeśli dostępny jest pyarrow/fastparquet,
+w przeciwnym razie pickle pandas).
+
+Dla ENTSO-E przechowywane są surowe (skompresowane) odpowiedzi XML, adresowane
+skrótem parametrów zapytania - oszczędza to limit zapytań API.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from importlib.util import find_spec
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from .log_output import get_logger
+except ImportError:
+    from log_output import get_logger
+
+
+logger = get_logger('cache')
+# Komunikaty cache ENTSO-E idą loggerem źródła (buforowane razem z nim przy pobieraniu równoległym)
+entsoe_logger = get_logger('entsoe')
+
+
+# Parquet wymaga pyarrow lub fastparquet - bez nich zapisujemy pickle pandas
+PARQUET_AVAILABLE = find_spec('pyarrow') is not None or find_spec('fastparquet') is not None
+FRAME_EXTENSION = '.parquet' if PARQUET_AVAILABLE else '.pkl'
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache')
+
+
+def write_frame(df: pd.DataFrame, path: str):
+    """
+    Zapisuje DataFrame do pliku w formacie zależnym od rozszerzenia.
+
+    Zapis odbywa się przez plik tymczasowy i os.replace, więc równoległy
+    odczyt nigdy nie zobaczy niekompletnego pliku.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if path.endswith('.parquet'):
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_frame(path: str, columns: Optional[list] = None) -> pd.DataFrame:
+    """Wczytuje DataFrame zapisany przez write_frame (opcjonalnie tylko wybrane kolumny)."""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_pickle(path)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+
+class PSEDayCache:
+    """
+    Cache dni biznesowych PSE (klucz: business_date).
+
+    Polityka ważności:
+    - dzisiaj i wczoraj to dni "ulotne" - wpis jest ważny tylko przez volatile_ttl sekund
+    - starsze dni są niezmienne - wpis zapisany po zamknięciu dnia nigdy nie wygasa
+    - dzień bez danych (pusta odpowiedź API, np. dzień przyszły lub jeszcze
+      nieopublikowany) zapisywany jest jako pusty wpis ważny przez volatile_ttl sekund,
+      więc powtórzone w tym czasie pobranie nie odpytuje API ponownie
+
+    Rozmiar cache jest ograniczony (max_size_mb). Po przekroczeniu limitu usuwane
+    są najdawniej używane wpisy (LRU wg czasu ostatniego dostępu).
+    """
+
+    VOLATILE_SUFFIX = '.volatile'
+    EMPTY_SUFFIX = '.empty'
+    
+    # Wersja formatu sparsowanych danych - zmiana unieważnia wpisy zapisane przez starszy
+    # parser (stare pliki nie są już odczytywane i z czasem usuwa je limit rozmiaru LRU)
+    FORMAT_VERSION = 3
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: float = 500,
+                 volatile_days: int = 2, volatile_ttl: int = 15 * 60):
+        """
+        Inicjalizacja cache.
+
+        Args:
+            cache_dir: Katalog cache (domyślnie zmienna PSE_CACHE_DIR lub .cache/pse_days)
+            max_size_mb: Maksymalny rozmiar cache w MB (po przekroczeniu - usuwanie LRU)
+            volatile_days: Liczba ostatnich dni traktowanych jako ulotne (2 = dzisiaj i wczoraj)
+            volatile_ttl: Czas ważności wpisu dla dnia ulotnego w sekundach
+        """
+        self.cache_dir = cache_dir or os.getenv('PSE_CACHE_DIR') or os.path.join(DEFAULT_CACHE_DIR, 'pse_days')
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.volatile_days = volatile_days
+        self.volatile_ttl = volatile_ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan_entries())
+
+    def is_volatile(self, date: str) -> bool:
+        """Sprawdza czy dzień może się jeszcze zmienić (dzisiaj, wczoraj lub przyszłość)."""
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        return day > datetime.now().date() - timedelta(days=self.volatile_days)
+
+    def _path(self, date: str, volatile: bool) -> str:
+        suffix = self.VOLATILE_SUFFIX if volatile else ''
+        return os.path.join(self.cache_dir, f"{date}{suffix}.v{self.FORMAT_VERSION}{FRAME_EXTENSION}")
+
+    def _empty_path(self, date: str) -> str:
+        return os.path.join(self.cache_dir, f"{date}{self.EMPTY_SUFFIX}.v{self.FORMAT_VERSION}{FRAME_EXTENSION}")
+
+    def get(self, date: str, allow_stale: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Zwraca dane dnia z cache lub None (brak wpisu albo wpis nieaktualny).
+
+        Args:
+            date: Data biznesowa w formacie YYYY-MM-DD
+            allow_stale: Zwróć także przeterminowany wpis dnia ulotnego
+                         (baza dla pobierania przyrostowego)
+
+        Returns:
+            DataFrame dnia, pusty DataFrame dla aktualnego wpisu "brak danych" (put_empty)
+            lub None
+        """
+        volatile = self.is_volatile(date)
+        path = self._path(date, volatile)
+
+        if not os.path.exists(path):
+            # Wpis zapisany gdy dzień był jeszcze ulotny nie jest traktowany
+            # jako niezmienny - dzień zostanie pobrany ponownie
+            return self._get_empty(date)
+
+        try:
+            if volatile and not allow_stale and time.time() - os.path.getmtime(path) > self.volatile_ttl:
+                return None
+
+            df = read_frame(path)
+            # Aktualizuj czas dostępu (LRU) - mtime zostaje jako czas zapisu
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return df
+        except (OSError, ValueError):
+            return None
+        except Exception as e:
+            logger.warning(f"  ⚠️  Uszkodzony wpis cache dla {date}: {e}")
+            self._remove(path)
+            return None
+
+    def _get_empty(self, date: str) -> Optional[pd.DataFrame]:
+        """Zwraca pusty DataFrame, gdy dzień ma aktualny wpis "brak danych" (inaczej None)."""
+        try:
+            if time.time() - os.path.getmtime(self._empty_path(date)) <= self.volatile_ttl:
+                return pd.DataFrame()
+        except OSError:
+            pass
+        return None
+
+    def put_empty(self, date: str):
+        """
+        Zapamiętuje, że API nie zwróciło danych dnia (ważne przez volatile_ttl sekund).
+
+        Args:
+            date: Data biznesowa w formacie YYYY-MM-DD
+        """
+        path = self._empty_path(date)
+        try:
+            with self._lock:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                write_frame(pd.DataFrame(), path)
+                self._total_bytes += os.path.getsize(path) - old_size
+        except Exception as e:
+            logger.warning(f"  ⚠️  Nie udało się zapisać cache dla {date}: {e}")
+
+    def put(self, date: str, df: pd.DataFrame):
+        """
+        Zapisuje dane dnia do cache.
+
+        Args:
+            date: Data biznesowa w formacie YYYY-MM-DD
+            df: Sparsowane dane dnia
+        """
+        if df is None or df.empty:
+            return
+
+        volatile = self.is_volatile(date)
+        path = self._path(date, volatile)
+
+        try:
+            with self._lock:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                write_frame(df, path)
+                self._total_bytes += os.path.getsize(path) - old_size
+
+                # Po zamknięciu dnia wersja ulotna nie jest już potrzebna
+                if not volatile:
+                    self._remove(self._path(date, True), locked=True)
+                self._remove(self._empty_path(date), locked=True)
+
+                if self._total_bytes > self.max_size_bytes:
+                    self._evict()
+        except Exception as e:
+            logger.warning(f"  ⚠️  Nie udało się zapisać cache dla {date}: {e}")
+
+    def _scan_entries(self) -> list:
+        """Zwraca listę (ścieżka, rozmiar, czas dostępu) wszystkich wpisów cache."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(('.parquet', '.pkl')):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_atime))
+        return entries
+
+    def _evict(self):
+        """Usuwa najdawniej używane wpisy aż rozmiar cache spadnie poniżej limitu."""
+        entries = sorted(self._scan_entries(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if self._total_bytes <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def _remove(self, path: str, locked: bool = False):
+        """Usuwa pojedynczy wpis (jeśli istnieje) i aktualizuje licznik rozmiaru."""
+        if not locked:
+            with self._lock:
+                return self._remove(path, locked=True)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_bytes -= size
+        except OSError:
+            pass
+
+    def clear(self):
+        """Usuwa wszystkie wpisy z cache."""
+        with self._lock:
+            for path, _, _ in self._scan_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def size_bytes(self) -> int:
+        """Zwraca aktualny rozmiar cache w bajtach."""
+        return self._total_bytes
+
+
+class ENTSOEResponseCache:
+    """
+    Cache surowych odpowiedzi XML z ENTSO-E (content-addressed).
+
+    Kluczem jest skrót SHA-256 parametrów zapytania bez securityToken, więc ten sam
+    okres periodStart/periodEnd trafia do tego samego pliku niezależnie od klucza API.
+    Odpowiedzi są zapisywane skompresowane (gzip).
+
+    Polityka ważności:
+    - okna zakończone dawniej niż immutable_after są niezmienne (nigdy nie wygasają)
+    - okna obejmujące ostatnie godziny są ważne tylko przez volatile_ttl sekund
+    - odpowiedzi "brak danych" (Acknowledgement_MarketDocument) nie są zapisywane -
+      przejściowa luka publikacji nie może zostać zapamiętana jako ostateczna
+
+    Rozmiar cache jest ograniczony (max_size_mb) - jak w PSEDayCache po przekroczeniu
+    limitu usuwane są najdawniej używane odpowiedzi (LRU wg czasu ostatniego dostępu).
+    """
+
+    EXCLUDED_PARAMS = ('securityToken',)
+    ACKNOWLEDGEMENT_ROOT = b'Acknowledgement_MarketDocument'
+
+    def __init__(self, cache_dir: Optional[str] = None, volatile_ttl: int = 15 * 60,
+                 immutable_after: timedelta = timedelta(days=1), max_size_mb: float = 500):
+        """
+        Inicjalizacja cache.
+
+        Args:
+            cache_dir: Katalog cache (domyślnie zmienna ENTSOE_CACHE_DIR lub .cache/entsoe)
+            volatile_ttl: Czas ważności odpowiedzi dla okien niezamkniętych (sekundy)
+            immutable_after: Po jakim czasie od końca okna (periodEnd, UTC) dane
+                             uznajemy za ostateczne
+            max_size_mb: Maksymalny rozmiar cache w MB (po przekroczeniu - usuwanie LRU)
+        """
+        self.cache_dir = cache_dir or os.getenv('ENTSOE_CACHE_DIR') or os.path.join(DEFAULT_CACHE_DIR, 'entsoe')
+        self.volatile_ttl = volatile_ttl
+        self.immutable_after = immutable_after
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan_entries())
+
+    def key(self, params: dict) -> str:
+        """Zwraca skrót parametrów zapytania (bez tokenu bezpieczeństwa)."""
+        canonical = {k: str(v) for k, v in params.items() if k not in self.EXCLUDED_PARAMS}
+        payload = json.dumps(canonical, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def _path(self, params: dict) -> str:
+        key = self.key(params)
+        return os.path.join(self.cache_dir, key[:2], f"{key}.xml.gz")
+
+    def is_immutable(self, params: dict) -> bool:
+        """Sprawdza czy okno zapytania jest w całości w przeszłości (dane ostateczne)."""
+        try:
+            period_end = datetime.strptime(params['periodEnd'], '%Y%m%d%H%M')
+        except (KeyError, ValueError):
+            return False
+        return period_end + self.immutable_after <= datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def get(self, params: dict, allow_stale: bool = False) -> Optional[bytes]:
+        """
+        Zwraca zapisaną odpowiedź XML lub None (brak wpisu albo wpis nieaktualny).
+
+        Args:
+            params: Parametry zapytania do API ENTSO-E
+            allow_stale: Zwróć także przeterminowaną odpowiedź (tryb offline)
+        """
+        path = self._path(params)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            if not allow_stale and not self.is_immutable(params):
+                if time.time() - os.path.getmtime(path) > self.volatile_ttl:
+                    return None
+            with gzip.open(path, 'rb') as f:
+                content = f.read()
+            # Aktualizuj czas dostępu (LRU) - mtime zostaje jako czas zapisu
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return content
+        except (OSError, EOFError):
+            return None
+
+    def put(self, params: dict, content: bytes):
+        """
+        Zapisuje odpowiedź XML.
+
+        Args:
+            params: Parametry zapytania do API ENTSO-E
+            content: Surowa zawartość odpowiedzi (odpowiedź "brak danych" jest pomijana)
+        """
+        # Element główny dokumentu jest na początku odpowiedzi (po deklaracji XML)
+        if self.ACKNOWLEDGEMENT_ROOT in content[:1024]:
+            return
+
+        path = self._path(params)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with gzip.open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+                self._total_bytes += os.path.getsize(path) - old_size
+
+                if self._total_bytes > self.max_size_bytes:
+                    self._evict()
+        except OSError as e:
+            entsoe_logger.warning(f"  ⚠️  Nie udało się zapisać odpowiedzi ENTSO-E w cache: {e}")
+
+    def _scan_entries(self) -> list:
+        """Zwraca listę (ścieżka, rozmiar, czas dostępu) wszystkich zapisanych odpowiedzi."""
+        entries = []
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.xml.gz'):
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_atime))
+        return entries
+
+    def _evict(self):
+        """Usuwa najdawniej używane odpowiedzi aż rozmiar cache spadnie poniżej limitu."""
+        entries = sorted(self._scan_entries(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if self._total_bytes <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def size_bytes(self) -> int:
+        """Zwraca aktualny rozmiar cache w bajtach."""
+        return self._total_bytes
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Lokalny magazyn połączonych danych PSE + ENTSO-E.
+
+Dane (wynik CombinedEnergyDataFetcher.fetch_combined_data) zapisywane są w plikach
+kolumnowych podzielonych na miesiące (partycje). Plik manifest.json opisuje
+pokrycie - które dni są zapisane, z jakich źródeł i w jakiej wersji
+(najnowszy publication_ts PSE). Odczyt okresu wczytuje tylko partycje,
+których ten okres dotyczy, więc analizy wieloletnie nie wymagają sieci.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from .data_cache import FRAME_EXTENSION, read_frame, write_frame
+    from .log_output import get_logger
+except ImportError:
+    from data_cache import FRAME_EXTENSION, read_frame, write_frame
+    from log_output import get_logger
+
+
+logger = get_logger('store')
+
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'store')
+
+
+class EnergyDataStore:
+    """
+    Magazyn danych podzielony na partycje miesięczne (klucz: YYYY-MM).
+
+    Manifest (manifest.json) zawiera dla każdej partycji plik, liczbę rekordów,
+    zakres czasu, kolumny oraz pokrycie dzienne: liczbę rekordów dnia, źródła
+    (np. ['pse', 'entsoe']), najnowszy publication_ts PSE i czas zapisu.
+
+    Źródło jest przypisane do dnia tylko wtedy, gdy każdy rekord dnia ma wartość
+    w co najmniej jednej kolumnie tego źródła (kolumny źródeł zapisywane są
+    w manifeście - 'source_columns'), więc dzień z lukami ENTSO-E nie jest
+    uznawany za kompletny.
+
+    Rekordy identyfikowane są czasem UTC (kolumna Data_UTC), więc oba przejścia
+    powtórzonej godziny w dniu zmiany czasu są przechowywane osobno. Partycje
+    wyznacza lokalna kolumna 'Data'.
+
+    Dzisiaj i wczoraj to dni ulotne (jak w PSEDayCache) - nigdy nie są uznawane
+    za kompletne, nawet jeśli są zapisane.
+
+    Źródło pobrane dla zamkniętego dnia bez kompletnych danych (np. trwała luka
+    ENTSO-E) zapisywane jest w manifeście jako próba ('source_attempts': liczba
+    i czas ostatniej). Takie źródło jest ponownie uznawane za brakujące dopiero
+    po SOURCE_RETRY_INTERVAL, a po MAX_SOURCE_ATTEMPTS próbach wcale.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    FORMAT_VERSION = 2
+
+    MAX_SOURCE_ATTEMPTS = 3
+    SOURCE_RETRY_INTERVAL = timedelta(hours=6)
+
+    def __init__(self, store_dir: Optional[str] = None, volatile_days: int = 2):
+        """
+        Inicjalizacja magazynu.
+
+        Args:
+            store_dir: Katalog magazynu (domyślnie zmienna ENERGY_STORE_DIR lub data/store)
+            volatile_days: Liczba ostatnich dni traktowanych jako niekompletne
+        """
+        self.store_dir = store_dir or os.getenv('ENERGY_STORE_DIR') or DEFAULT_STORE_DIR
+        self.volatile_days = volatile_days
+        self._lock = threading.Lock()
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.store_dir, self.MANIFEST_FILE)
+
+    def _load_manifest(self) -> dict:
+        """Wczytuje manifest (lub tworzy pusty)."""
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format_version') == self.FORMAT_VERSION:
+                return manifest
+            logger.warning(f"⚠️  Nieobsługiwana wersja manifestu magazynu: {manifest.get('format_version')} "
+                           f"- magazyn zostanie zapełniony od nowa (np. przez sync)")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Uszkodzony manifest magazynu: {e}")
+
+        return {'format_version': self.FORMAT_VERSION, 'partitions': {}}
+
+    def _save_manifest(self):
+        """Zapisuje manifest atomowo (plik tymczasowy + os.replace)."""
+        path = self._manifest_path()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _time_key(df: pd.DataFrame) -> str:
+        """Klucz rekordu: czas UTC (jednoznaczny w dniu zmiany czasu), a bez niego 'Data'."""
+        return 'Data_UTC' if 'Data_UTC' in df.columns else 'Data'
+
+    def _partition_path(self, partition: str) -> str:
+        return os.path.join(self.store_dir, f"{partition}{FRAME_EXTENSION}")
+
+    @staticmethod
+    def _partitions_between(date_from: str, date_to: str) -> list:
+        """Zwraca klucze partycji (YYYY-MM) obejmujące okres."""
+        months = pd.period_range(pd.Timestamp(date_from).to_period('M'),
+                                 pd.Timestamp(date_to).to_period('M'), freq='M')
+        return [str(month) for month in months]
+
+    def is_volatile(self, date: str) -> bool:
+        """Sprawdza czy dzień może się jeszcze zmienić (dzisiaj, wczoraj lub przyszłość)."""
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        return day > datetime.now().date() - timedelta(days=self.volatile_days)
+
+    def write(self, df: pd.DataFrame, sources: Optional[list] = None,
+              source_columns: Optional[dict] = None, attempted: Optional[list] = None) -> list:
+        """
+        Zapisuje dane do partycji miesięcznych i aktualizuje manifest.
+
+        Nowe wartości zastępują zapisane dla tych samych timestampów; brakujące (NaN)
+        wartości nowych danych nie nadpisują zapisanych (np. zapis samego PSE
+        nie usuwa wcześniej zapisanych danych ENTSO-E).
+
+        Args:
+            df: DataFrame z kolumną (lub indeksem) 'Data'
+            sources: Źródła danych, np. ['pse', 'entsoe'] (domyślnie ['pse']) - przypisywane
+                     wszystkim zapisanym dniom, gdy źródła nie mają znanych kolumn
+            source_columns: Kolumny źródeł, np. {'pse': [...], 'entsoe': [...]} - źródła
+                            dnia wyznaczane są wtedy z danych dnia (patrz opis klasy)
+            attempted: Źródła pobierane dla zapisywanych dni - te bez kompletnych danych
+                       zamkniętego dnia zapisywane są jako próby (patrz opis klasy)
+
+        Returns:
+            Lista zaktualizowanych partycji
+        """
+        if df is None or df.empty:
+            return []
+
+        sources = sorted(sources or ['pse'])
+        if 'Data' not in df.columns:
+            df = df.reset_index()
+        key = self._time_key(df)
+        df = df.drop_duplicates(subset=[key], keep='last')
+
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        updated = []
+
+        with self._lock:
+            known_columns = self.manifest.setdefault('source_columns', {})
+            for source, columns in (source_columns or {}).items():
+                known_columns[source] = list(dict.fromkeys([*known_columns.get(source, []), *columns]))
+
+            for period, part in df.groupby(df['Data'].dt.to_period('M'), sort=True):
+                partition = str(period)
+                path = self._partition_path(partition)
+                new = part.set_index(key)
+
+                if partition in self.manifest['partitions'] and os.path.exists(path):
+                    old = read_frame(path).set_index(key)
+                    new = new.combine_first(old)[list(dict.fromkeys([*new.columns, *old.columns]))]
+
+                new = new.sort_index().reset_index()
+                new = new[['Data', *[col for col in new.columns if col != 'Data']]]
+                write_frame(new, path)
+
+                entry = self.manifest['partitions'].get(partition, {})
+                days = entry.get('days', {})
+                part_days = part['Data'].dt.strftime('%Y-%m-%d')
+                all_days = new['Data'].dt.strftime('%Y-%m-%d')
+                rows_per_day = all_days.value_counts()
+
+                publication = None
+                if 'publication_ts' in part.columns:
+                    publication = part['publication_ts'].groupby(part_days).max()
+
+                complete = self._complete_sources(new, all_days, known_columns)
+
+                for day in part_days.unique():
+                    day_entry = days.get(day, {})
+                    day_entry['rows'] = int(rows_per_day[day])
+                    day_sources = set(day_entry.get('sources', [])) | set(sources)
+                    for source, is_complete in complete.items():
+                        day_sources.discard(source)
+                        if is_complete.get(day, False):
+                            day_sources.add(source)
+                    day_entry['sources'] = sorted(day_sources)
+                    self._record_attempts(day, day_entry, attempted or [], updated_at)
+                    if publication is not None and pd.notna(publication.get(day)):
+                        day_entry['pse_publication_ts'] = str(publication[day])
+                    day_entry['updated_at'] = updated_at
+                    days[day] = day_entry
+
+                self.manifest['partitions'][partition] = {
+                    'file': os.path.basename(path),
+                    'rows': len(new),
+                    'first': new['Data'].min().isoformat(),
+                    'last': new['Data'].max().isoformat(),
+                    'columns': [col for col in new.columns if col != 'Data'],
+                    'days': dict(sorted(days.items())),
+                }
+                updated.append(partition)
+
+            self._save_manifest()
+
+        return updated
+
+    def _record_attempts(self, day: str, day_entry: dict, attempted: list, updated_at: str):
+        """Aktualizuje próby pobrania źródeł dnia (źródła kompletne są usuwane)."""
+        attempts = day_entry.pop('source_attempts', {})
+        for source in list(attempts):
+            if source in day_entry['sources']:
+                del attempts[source]
+        if not self.is_volatile(day):
+            for source in attempted:
+                if source not in day_entry['sources']:
+                    count = attempts.get(source, {}).get('count', 0) + 1
+                    attempts[source] = {'count': count, 'last': updated_at}
+        if attempts:
+            day_entry['source_attempts'] = attempts
+
+    def _retry_due(self, info: dict, source: str, now: datetime) -> bool:
+        """Sprawdza czy brakujące źródło zamkniętego dnia należy pobrać ponownie."""
+        attempt = info.get('source_attempts', {}).get(source)
+        if attempt is None:
+            return True
+        if attempt['count'] >= self.MAX_SOURCE_ATTEMPTS:
+            return False
+        return now - datetime.fromisoformat(attempt['last']) >= self.SOURCE_RETRY_INTERVAL
+
+    @staticmethod
+    def _complete_sources(df: pd.DataFrame, days: pd.Series, source_columns: dict) -> dict:
+        """
+        Sprawdza, w których dniach dane źródeł są kompletne.
+
+        Returns:
+            Słownik {źródło: Series dzień -> bool} - True gdy każdy rekord dnia ma wartość
+            w co najmniej jednej kolumnie źródła (źródła bez kolumn w df są pomijane)
+        """
+        complete = {}
+        for source, columns in source_columns.items():
+            columns = [col for col in columns if col in df.columns]
+            if columns:
+                complete[source] = df[columns].notna().any(axis=1).groupby(days.to_numpy()).all()
+        return complete
+
+    def read(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+             columns: Optional[list] = None) -> Optional[pd.DataFrame]:
+        """
+        Wczytuje dane okresu - tylko partycje, których okres dotyczy.
+
+        Args:
+            date_from: Data początkowa YYYY-MM-DD (opcjonalna)
+            date_to: Data końcowa YYYY-MM-DD, cały dzień włącznie (opcjonalna)
+            columns: Wczytaj tylko wybrane kolumny (kolumna 'Data' zawsze); kolumny
+                     nieobecne w części partycji mają tam wartości NaN
+
+        Returns:
+            DataFrame z kolumną 'Data' lub None gdy brak danych
+        """
+        partitions = sorted(self.manifest['partitions'])
+        if not partitions:
+            return None
+
+        if date_from or date_to:
+            wanted = set(self._partitions_between(date_from or partitions[0] + '-01',
+                                                  date_to or partitions[-1] + '-01'))
+            partitions = [partition for partition in partitions if partition in wanted]
+
+        read_columns = None if columns is None else ['Data', *[col for col in columns if col != 'Data']]
+        frames = []
+        for partition in partitions:
+            path = self._partition_path(partition)
+            part_columns = read_columns
+            if read_columns is not None:
+                # Kolumny nieobecne w partycji (np. zapisanej bez ENTSO-E) są pomijane
+                # przy odczycie i uzupełniane pustymi wartościami - bez pomijania partycji
+                stored = self.manifest['partitions'][partition].get('columns')
+                if stored is not None:
+                    part_columns = ['Data', *[col for col in read_columns[1:] if col in stored]]
+            try:
+                frame = read_frame(path, columns=part_columns)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  Nie udało się wczytać partycji {partition}: {e}")
+                continue
+            frames.append(frame if read_columns is None else frame.reindex(columns=read_columns))
+
+        if not frames:
+            return None
+
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+        if date_from:
+            df = df[df['Data'] >= pd.Timestamp(date_from)]
+        if date_to:
+            df = df[df['Data'] < pd.Timestamp(date_to) + pd.Timedelta(days=1)]
+
+        if df.empty:
+            return None
+        return df.reset_index(drop=True)
+
+    def day_info(self, date: str) -> Optional[dict]:
+        """Zwraca wpis manifestu dla dnia (rekordy, źródła, wersja) lub None."""
+        partition = self.manifest['partitions'].get(date[:7])
+        if partition is None:
+            return None
+        return partition['days'].get(date)
+
+    def missing_days(self, date_from: str, date_to: str, sources: Optional[list] = None) -> list:
+        """
+        Zwraca dni okresu, których brakuje w magazynie lub które są niekompletne.
+
+        Args:
+            date_from: Data początkowa YYYY-MM-DD
+            date_to: Data końcowa YYYY-MM-DD
+            sources: Wymagane źródła (domyślnie ['pse'])
+
+        Returns:
+            Lista dat YYYY-MM-DD (brak wpisu, brak wymaganego źródła lub dzień ulotny)
+        """
+        return list(self.missing_sources(date_from, date_to, sources))
+
+    def missing_sources(self, date_from: str, date_to: str, sources: Optional[list] = None,
+                        include_volatile: bool = True, include_attempted: bool = False) -> dict:
+        """
+        Zwraca brakujące źródła dni okresu (dni kompletne są pomijane).
+
+        Args:
+            date_from: Data początkowa YYYY-MM-DD
+            date_to: Data końcowa YYYY-MM-DD
+            sources: Wymagane źródła (domyślnie ['pse'])
+            include_volatile: Traktuj dni ulotne jako niekompletne (wszystkie źródła brakujące)
+            include_attempted: Zwracaj także źródła pobrane bez danych, których nie należy
+                               jeszcze (lub już) ponawiać (patrz opis klasy)
+
+        Returns:
+            Słownik {data YYYY-MM-DD: posortowana lista brakujących źródeł}
+        """
+        required = set(sources or ['pse'])
+        now = datetime.now()
+        missing = {}
+        for day in pd.date_range(date_from, date_to, freq='D').strftime('%Y-%m-%d'):
+            info = self.day_info(day)
+            if info is None or (include_volatile and self.is_volatile(day)):
+                missing[day] = sorted(required)
+                continue
+            absent = required - set(info['sources'])
+            if not include_attempted:
+                absent = {source for source in absent if self._retry_due(info, source, now)}
+            if absent:
+                missing[day] = sorted(absent)
+        return missing
+
+    def covers(self, date_from: str, date_to: str, sources: Optional[list] = None) -> bool:
+        """Sprawdza czy magazyn zawiera kompletne dane całego okresu."""
+        return not self.missing_days(date_from, date_to, sources)
+
+    @staticmethod
+    def day_ranges(days: list) -> list:
+        """
+        Grupuje listę dni w ciągłe zakresy (data_od, data_do).
+
+        Przykład: ['2026-01-01', '2026-01-02', '2026-01-05'] ->
+                  [('2026-01-01', '2026-01-02'), ('2026-01-05', '2026-01-05')]
+        """
+        ranges = []
+        for day in sorted(days):
+            if ranges and pd.Timestamp(day) - pd.Timestamp(ranges[-1][1]) == pd.Timedelta(days=1):
+                ranges[-1][1] = day
+            else:
+                ranges.append([day, day])
+        return [tuple(day_range) for day_range in ranges]
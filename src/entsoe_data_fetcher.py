@@ -4,17 +4,38 @@ Moduł do pobierania danych z ENTSO-E Transparency Platform.
 API Documentation: https://transparency.entsoe.eu/content/static_content/Static%20content/web%20api/Guide.html
 """
 
-import requests
 import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, Dict
+from urllib.parse import urlsplit
 import xml.etree.ElementTree as ET
+import multiprocessing
 import os
+import time
 from dotenv import load_dotenv
 
+try:
+    from .data_cache import ENTSOEResponseCache
+    from .http_transport import HTTPClient, set_rate_limit
+    from .instrumentation import metrics
+    from .log_output import get_logger, emit_progress, ProgressCallback, SourceLogBuffer, portable_records, replay
+    from .frame_dtypes import compact_frame
+except ImportError:
+    from data_cache import ENTSOEResponseCache
+    from http_transport import HTTPClient, set_rate_limit
+    from instrumentation import metrics
+    from log_output import get_logger, emit_progress, ProgressCallback, SourceLogBuffer, portable_records, replay
+    from frame_dtypes import compact_frame
+
 # Załaduj zmienne środowiskowe z pliku .env
 load_dotenv()
 
+logger = get_logger('entsoe')
+
 
 class ENTSOEDataFetcher:
     """Klasa do pobierania danych o produkcji energii z ENTSO-E Transparency Platform."""
@@ -35,28 +56,89 @@ class ENTSOEDataFetcher:
         'wind_onshore': 'B19',  # Wiatr lądowy
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Domyślna liczba równolegle pobieranych fragmentów (roczne okna)
+    DEFAULT_MAX_WORKERS = 4
+    
+    # Domyślny budżet zapytań na sekundę (limit platformy: 400 zapytań na minutę na użytkownika)
+    DEFAULT_REQUESTS_PER_SECOND = 5
+    
+    # Kolumny wynikowe -> kody psrType potrzebne do ich wyliczenia (projekcja columns=)
+    COLUMN_PSR_TYPES = {
+        'Biomasa [MW]': ['B01'],
+        'Węgiel brunatny [MW]': ['B02'],
+        'Gaz [MW]': ['B04'],
+        'Węgiel kamienny [MW]': ['B05'],
+        'Magazyny energii [MW]': ['B10'],
+        'Woda (przepływowa) [MW]': ['B11'],
+        'Woda (zbiornikowa) [MW]': ['B12'],
+        'Woda [MW]': ['B11', 'B12'],
+        'Słońce [MW]': ['B16'],
+        'Wiatr lądowy [MW]': ['B19'],
+    }
+    
+    # Kolumny usuwane w trybie kompaktowym - składowe sumy 'Woda [MW]'
+    COMPACT_DROP_COLUMNS = ['Woda (przepływowa) [MW]', 'Woda (zbiornikowa) [MW]']
+    
+    def __init__(self, api_key: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 parse_in_processes: bool = True, use_cache: bool = True,
+                 cache: Optional[ENTSOEResponseCache] = None, offline: bool = False,
+                 requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND,
+                 api_endpoint: Optional[str] = None, progress_callback: Optional[ProgressCallback] = None,
+                 compact_dtypes: bool = False):
         """
         Inicjalizacja z kluczem API.
         
         Args:
             api_key: Klucz API ENTSO-E. Jeśli None, szuka w zmiennych środowiskowych.
+            max_workers: Maksymalna liczba równolegle pobieranych fragmentów
+            parse_in_processes: Parsuj XML fragmentów w osobnych procesach
+                                (parsowanie nie blokuje się wtedy na GIL)
+            use_cache: Czy używać lokalnego cache odpowiedzi XML (domyślnie tak)
+            cache: Własna instancja ENTSOEResponseCache (domyślnie .cache/entsoe)
+            offline: Tryb offline - dane wyłącznie z cache, bez zapytań do API
+                     (klucz API nie jest wtedy wymagany)
+            requests_per_second: Limit zapytań na sekundę do API ENTSO-E - wspólny dla procesu,
+                                 zostaje niższy z limitów fetcherów (None - bez własnego limitu)
+            api_endpoint: Adres API (domyślnie zmienna ENTSOE_API_ENDPOINT lub API_ENDPOINT),
+                          np. lokalny serwer scripts/replay_server.py
+            progress_callback: Funkcja wywoływana po każdym pobranym fragmencie ze zdarzeniem
+                               {'source': 'entsoe', 'event': 'chunk', 'date_from', 'date_to',
+                               'done', 'total', 'ok'} (patrz log_output)
+            compact_dtypes: Zwracaj ramki w kompaktowym układzie typów (float32, bez składowych
+                            'Woda [MW]' - patrz frame_dtypes)
         """
+        self.api_endpoint = api_endpoint or os.getenv('ENTSOE_API_ENDPOINT') or self.API_ENDPOINT
         self.api_key = api_key or os.getenv('ENTSOE_API_KEY')
+        self.max_workers = max(1, int(max_workers))
+        self.parse_in_processes = parse_in_processes
+        self.offline = offline
+        self.progress_callback = progress_callback
+        self.compact_dtypes = compact_dtypes
+        
+        self.cache = None
+        # Odpowiedzi innego serwera (np. odtwarzane fixture'y) nie trafiają do domyślnego cache
+        if cache is not None or offline or (use_cache and self.api_endpoint == self.API_ENDPOINT):
+            try:
+                self.cache = cache or ENTSOEResponseCache()
+            except OSError as e:
+                logger.warning(f"⚠️  Cache ENTSO-E niedostępny: {e}")
         
-        if not self.api_key:
+        if not self.api_key and not offline:
             raise ValueError(
                 "Klucz API ENTSO-E jest wymagany!\n"
                 "Ustaw zmienną środowiskową ENTSOE_API_KEY lub przekaż api_key do konstruktora.\n"
                 "Zarejestruj się na: https://transparency.entsoe.eu/"
             )
         
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Wspólna dla procesu pula połączeń (keep-alive, gzip), rozmiar wg max_workers
+        self.session = HTTPClient(headers={
             'User-Agent': 'Mozilla/5.0 (compatible; PSE-Energy-Scraper/1.3.0)',
-        })
+        }, pool_size=self.max_workers, source='entsoe')
+        set_rate_limit(urlsplit(self.api_endpoint).hostname, requests_per_second)
     
-    def fetch_generation_data(self, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    @metrics.timed('fetch', source='entsoe')
+    def fetch_generation_data(self, date_from: str, date_to: str,
+                              columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera dane o generacji energii dla wszystkich typów źródeł.
         UWAGA: Daty są interpretowane jako czas polski (Europe/Warsaw, UTC+1).
@@ -66,10 +148,18 @@ class ENTSOEDataFetcher:
         Args:
             date_from: Data początkowa w formacie YYYY-MM-DD (w czasie polskim)
             date_to: Data końcowa w formacie YYYY-MM-DD (w czasie polskim)
+            columns: Potrzebne kolumny wynikowe (klucze COLUMN_PSR_TYPES, domyślnie wszystkie).
+                     API nie ma projekcji pól - parser pomija szeregi pozostałych typów
+                     produkcji, więc nie są one materializowane; kolumna 'Data' zawsze
             
         Returns:
             DataFrame z danymi o generacji lub None w przypadku błędu
+            
+        Raises:
+            ValueError: gdy columns zawiera nieznaną kolumnę
         """
+        columns = self._value_columns(columns)
+        
         try:
             dt_from = datetime.strptime(date_from, '%Y-%m-%d')
             dt_to = datetime.strptime(date_to, '%Y-%m-%d')
@@ -80,54 +170,175 @@ class ENTSOEDataFetcher:
             
             if days_diff > 350:
                 # Podziel na roczne fragmenty (max 365 dni każdy)
-                print(f"📥 Pobieranie danych ENTSO-E dla okresu {date_from} - {date_to}...")
-                print(f"   ⏳ Okres {days_diff} dni - dzielę na {(days_diff // 350) + 1} fragmenty...")
+                logger.info(f"📥 Pobieranie danych ENTSO-E dla okresu {date_from} - {date_to}...")
+                logger.info(f"   ⏳ Okres {days_diff} dni - dzielę na {(days_diff // 350) + 1} fragmenty...")
                 
-                all_chunks = []
+                chunks = []
                 current_date = dt_from
                 
                 while current_date < dt_to:
                     chunk_end = min(current_date + timedelta(days=350), dt_to)
-                    chunk_from = current_date.strftime('%Y-%m-%d')
-                    chunk_to = chunk_end.strftime('%Y-%m-%d')
-                    
-                    print(f"   📦 Fragment: {chunk_from} - {chunk_to}")
-                    df_chunk = self._fetch_single_period(chunk_from, chunk_to)
-                    
-                    if df_chunk is not None and not df_chunk.empty:
-                        all_chunks.append(df_chunk)
-                    
+                    chunks.append((current_date.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
                     current_date = chunk_end + timedelta(days=1)
                 
+                for chunk_from, chunk_to in chunks:
+                    logger.info(f"   📦 Fragment: {chunk_from} - {chunk_to}")
+                
+                all_chunks = [
+                    df_chunk for df_chunk in self._fetch_periods_parallel(chunks, columns)
+                    if df_chunk is not None and not df_chunk.empty
+                ]
+                
                 if all_chunks:
                     df_combined = pd.concat(all_chunks, ignore_index=True)
                     # Usuń duplikaty (może być na styku okresów)
                     df_combined = df_combined.drop_duplicates(subset=['Data']).reset_index(drop=True)
-                    print(f"✓ Pobrano łącznie {len(df_combined)} rekordów z ENTSO-E")
+                    logger.info(f"✓ Pobrano łącznie {len(df_combined)} rekordów z ENTSO-E")
                     return df_combined
                 else:
-                    print("⚠️  Brak danych z ENTSO-E")
+                    logger.warning("⚠️  Brak danych z ENTSO-E")
                     return None
             else:
                 # Pojedyncze zapytanie dla krótkiego okresu
-                print(f"📥 Pobieranie danych ENTSO-E dla okresu {date_from} - {date_to}...")
-                return self._fetch_single_period(date_from, date_to)
+                logger.info(f"📥 Pobieranie danych ENTSO-E dla okresu {date_from} - {date_to}...")
+                df = self._fetch_single_period(date_from, date_to, columns)
+                emit_progress(self.progress_callback, source='entsoe', event='chunk', date_from=date_from,
+                              date_to=date_to, done=1, total=1, ok=df is not None and not df.empty)
+                return df
                 
         except Exception as e:
-            print(f"❌ Błąd podczas pobierania danych z ENTSO-E: {e}")
+            logger.error(f"❌ Błąd podczas pobierania danych z ENTSO-E: {e}")
             return None
     
-    def _fetch_single_period(self, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    def _fetch_periods_parallel(self, chunks: list, columns: Optional[list] = None) -> list:
+        """
+        Pobiera fragmenty równolegle i parsuje je w procesach roboczych.
+        
+        Pobieranie odbywa się w puli wątków (max_workers połączeń). Każdy dokument XML
+        trafia do puli procesów zaraz po pobraniu, a wynik parsowania jest odbierany zaraz
+        po zakończeniu (w kolejności zakończenia, nie fragmentów), więc wolny fragment
+        nie wstrzymuje pozostałych, a parsowanie skaluje się z liczbą rdzeni i nakłada
+        się na pobieranie. Wyniki zwracane są w kolejności fragmentów.
+        
+        Args:
+            chunks: Lista krotek (date_from, date_to) w formacie YYYY-MM-DD
+            columns: Potrzebne kolumny wynikowe (None - wszystkie)
+            
+        Returns:
+            Lista DataFrame (lub None) w kolejności fragmentów
+        """
+        workers = min(self.max_workers, len(chunks))
+        results = [None] * len(chunks)
+        done = 0
+        
+        def chunk_done(index: int):
+            nonlocal done
+            done += 1
+            df_chunk = results[index]
+            emit_progress(self.progress_callback, source='entsoe', event='chunk', date_from=chunks[index][0],
+                          date_to=chunks[index][1], done=done, total=len(chunks),
+                          ok=df_chunk is not None and not df_chunk.empty)
+        
+        with ThreadPoolExecutor(max_workers=workers) as downloader, self._create_parse_executor(workers) as parser:
+            downloads = {
+                downloader.submit(self._download_period, chunk_from, chunk_to): index
+                for index, (chunk_from, chunk_to) in enumerate(chunks)
+            }
+            
+            parses = {}
+            documents = {}
+            pending = set(downloads)
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in downloads:
+                        index = downloads[future]
+                        xml_content = future.result()
+                        if xml_content is None:
+                            chunk_done(index)
+                            continue
+                        chunk_from, chunk_to = chunks[index]
+                        documents[index] = xml_content
+                        parse = parser.submit(ENTSOEDataFetcher._parse_xml_timed, xml_content, chunk_from,
+                                              chunk_to, self.compact_dtypes, columns)
+                        parses[parse] = index
+                        pending.add(parse)
+                        continue
+                    
+                    index = parses[future]
+                    try:
+                        # Czas parsowania mierzony w procesie roboczym - rejestr jest w procesie głównym
+                        df_chunk, seconds, records = future.result()
+                    except BrokenProcessPool as e:
+                        # Proces roboczy nie wystartował lub zginął - parsuj w procesie głównym
+                        logger.warning(f"   ⚠️  Pula procesów przerwana ({e}) - parsowanie fragmentu w procesie głównym")
+                        df_chunk, seconds, records = ENTSOEDataFetcher._parse_xml_timed(
+                            documents[index], *chunks[index], self.compact_dtypes, columns)
+                    metrics.record('parse', seconds, source='entsoe')
+                    replay(records)
+                    results[index] = df_chunk
+                    documents.pop(index, None)
+                    chunk_done(index)
+        
+        return results
+    
+    def _create_parse_executor(self, workers: int):
+        """
+        Tworzy pulę do parsowania XML - procesy, a gdy niedostępne - wątki.
+        
+        Procesy nie są tworzone przez fork bieżącego procesu: pula powstaje, gdy działają
+        już wątki pobierania (ENTSO-E i równolegle PSE), a fork procesu z aktywnymi
+        wątkami może skopiować zajęte blokady i zakleszczyć proces roboczy. Używany jest
+        forkserver (proces pomocniczy bez wątków z zaimportowanym parserem - szybki start
+        procesów), a gdzie jest niedostępny - spawn.
+        """
+        if self.parse_in_processes:
+            try:
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = multiprocessing.get_context('spawn')
+                return ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1), mp_context=context)
+            except (OSError, NotImplementedError, ImportError, ValueError) as e:
+                logger.warning(f"   ⚠️  Pula procesów niedostępna ({e}) - parsowanie w wątkach")
+        return ThreadPoolExecutor(max_workers=workers)
+    
+    def _fetch_single_period(self, date_from: str, date_to: str,
+                             columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera dane dla pojedynczego okresu (maksymalnie 1 rok).
         
         Args:
             date_from: Data początkowa w formacie YYYY-MM-DD
             date_to: Data końcowa w formacie YYYY-MM-DD
+            columns: Potrzebne kolumny wynikowe (None - wszystkie)
             
         Returns:
             DataFrame z danymi lub None
         """
+        xml_content = self._download_period(date_from, date_to)
+        if xml_content is None:
+            return None
+        
+        # Parsuj XML
+        with metrics.span('parse', source='entsoe'):
+            df = self._parse_xml_response(xml_content, date_from, date_to, self.compact_dtypes, columns)
+        if df is not None and not df.empty:
+            return df
+        return None
+    
+    def _download_period(self, date_from: str, date_to: str) -> Optional[bytes]:
+        """
+        Pobiera surowy dokument XML A75 dla pojedynczego okresu (maksymalnie 1 rok).
+        
+        Args:
+            date_from: Data początkowa w formacie YYYY-MM-DD
+            date_to: Data końcowa w formacie YYYY-MM-DD
+            
+        Returns:
+            Zawartość XML lub None
+        """
         try:
             # Konwersja dat do formatu ENTSO-E (YYYYMMDDHHMM)
             # Dla czasu polskiego (UTC+1) musimy pobrać dane od UTC-1
@@ -140,13 +351,14 @@ class ENTSOEDataFetcher:
             import pytz
             poland_tz = pytz.timezone('Europe/Warsaw')
             
-            # Sprawdź offset UTC dla początku okresu
+            # Offset UTC osobno dla początku i końca okresu - w dniu zmiany czasu
+            # (i w okresie ją obejmującym) koniec ma inny offset niż początek
             dt_from_local = poland_tz.localize(dt_from)
-            utc_offset_hours = int(dt_from_local.utcoffset().total_seconds() / 3600)
-            
+            dt_to_local = poland_tz.localize(dt_to + timedelta(days=1))
+
             # Pobierz dane z odpowiednim offsetem
-            dt_from_utc = dt_from - timedelta(hours=utc_offset_hours)
-            dt_to_utc = dt_to + timedelta(days=1) - timedelta(hours=utc_offset_hours)
+            dt_from_utc = dt_from - dt_from_local.utcoffset()
+            dt_to_utc = dt_to + timedelta(days=1) - dt_to_local.utcoffset()
             
             period_start = dt_from_utc.strftime('%Y%m%d%H%M')
             period_end = dt_to_utc.strftime('%Y%m%d%H%M')
@@ -161,106 +373,120 @@ class ENTSOEDataFetcher:
                 'periodEnd': period_end
             }
             
-            response = self.session.get(self.API_ENDPOINT, params=params, timeout=60)
+            # Sprawdź lokalny cache odpowiedzi (okna z przeszłości są niezmienne)
+            if self.cache is not None:
+                cached = self.cache.get(params, allow_stale=self.offline)
+                if cached is not None:
+                    metrics.count('cache_hits', source='entsoe')
+                    return cached
+                metrics.count('cache_misses', source='entsoe')
+            
+            if self.offline:
+                logger.warning(f"   ⚠️  Tryb offline: brak odpowiedzi w cache dla {date_from} - {date_to}")
+                return None
+            
+            response = self.session.get(self.api_endpoint, params=params, timeout=60)
             
             if response.status_code == 200:
-                # Parsuj XML
-                df = self._parse_xml_response(response.content, date_from, date_to)
-                if df is not None and not df.empty:
-                    return df
-                else:
-                    return None
+                if self.cache is not None:
+                    self.cache.put(params, response.content)
+                return response.content
             elif response.status_code == 401:
-                print("❌ Błąd autoryzacji - sprawdź klucz API ENTSO-E")
+                logger.error("❌ Błąd autoryzacji - sprawdź klucz API ENTSO-E")
                 return None
             elif response.status_code == 400:
-                print(f"⚠️  Błąd 400 - okres może być zbyt długi lub dane niedostępne")
+                logger.warning(f"⚠️  Błąd 400 - okres może być zbyt długi lub dane niedostępne")
                 return None
             else:
-                print(f"⚠️  Błąd API ENTSO-E: {response.status_code}")
+                logger.warning(f"⚠️  Błąd API ENTSO-E: {response.status_code}")
                 return None
                 
         except Exception as e:
-            print(f"⚠️  Błąd podczas pobierania fragmentu: {e}")
+            logger.warning(f"⚠️  Błąd podczas pobierania fragmentu: {e}")
             return None
     
-    def _parse_xml_response(self, xml_content: bytes, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    @classmethod
+    def _parse_xml_timed(cls, xml_content: bytes, date_from: str, date_to: str, compact: bool = False,
+                         columns: Optional[list] = None) -> tuple:
+        """
+        Parsuje odpowiedź XML w puli roboczej.
+        
+        Returns:
+            Krotka (DataFrame, czas parsowania w sekundach, komunikaty) - w procesie roboczym
+            komunikaty są zbierane i przekazywane do procesu głównego (replay), który
+            wypisuje je razem z pozostałymi komunikatami ENTSO-E
+        """
+        in_worker_process = multiprocessing.parent_process() is not None
+        worker_log = SourceLogBuffer('entsoe')
+        if in_worker_process:
+            worker_log.start()
+        start = time.perf_counter()
+        try:
+            df = cls._parse_xml_response(xml_content, date_from, date_to, compact, columns)
+        finally:
+            records = portable_records(worker_log.detach())
+        return df, time.perf_counter() - start, records
+    
+    @classmethod
+    def _parse_xml_response(cls, xml_content: bytes, date_from: str, date_to: str,
+                            compact: bool = False, columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Parsuje odpowiedź XML z ENTSO-E do DataFrame.
         
+        Metoda klasy (nie wymaga klucza API), więc może działać w procesie roboczym.
+        
         Args:
             xml_content: Zawartość XML z API
             date_from: Data początkowa (do filtrowania)
             date_to: Data końcowa (do filtrowania)
+            compact: Kompaktowy układ typów (float32, bez składowych 'Woda [MW]')
+            columns: Zwracane kolumny wynikowe (None - wszystkie); szeregi pozostałych
+                     typów produkcji są pomijane już przy parsowaniu
             
         Returns:
             DataFrame z danymi czasowymi
         """
         try:
-            root = ET.fromstring(xml_content)
-            
-            # Namespace ENTSO-E
-            ns = {'ns': 'urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0'}
+            psr_types = None if columns is None else {
+                psr_type for column in columns for psr_type in cls.COLUMN_PSR_TYPES[column]
+            }
+            series = cls._parse_a75_stream(xml_content, psr_types)
+            if psr_types is not None and not series:
+                # Brak wybranych typów w dokumencie - oś czasu z pozostałych szeregów,
+                # a wybrane kolumny wypełniane zerami (jak bez projekcji)
+                series = cls._parse_a75_stream(xml_content)
             
-            all_data = []
+            type_series = {}
             
-            # Iteruj po TimeSeries (każdy typ produkcji)
-            for timeseries in root.findall('.//ns:TimeSeries', ns):
-                # Pobierz typ produkcji
-                psr_type_elem = timeseries.find('.//ns:MktPSRType/ns:psrType', ns)
-                if psr_type_elem is None:
-                    continue
-                    
-                psr_type = psr_type_elem.text
-                
+            for psr_type, periods in series.items():
                 # Mapuj kod ENTSO-E na czytelną nazwę
-                type_name = self._get_type_name(psr_type)
+                type_name = cls._get_type_name(psr_type)
                 
-                # Pobierz punkty czasowe
-                for period in timeseries.findall('.//ns:Period', ns):
-                    start_time_elem = period.find('.//ns:timeInterval/ns:start', ns)
-                    if start_time_elem is None:
-                        continue
-                        
-                    start_time = datetime.fromisoformat(start_time_elem.text.replace('Z', '+00:00'))
-                    resolution_elem = period.find('.//ns:resolution', ns)
-                    resolution = resolution_elem.text if resolution_elem is not None else 'PT60M'
-                    
-                    # Parsuj interwał (np. PT15M = 15 minut, PT60M = 60 minut)
-                    interval_minutes = self._parse_resolution(resolution)
-                    
-                    # Pobierz punkty danych
-                    for point in period.findall('.//ns:Point', ns):
-                        position_elem = point.find('ns:position', ns)
-                        quantity_elem = point.find('ns:quantity', ns)
-                        
-                        if position_elem is None or quantity_elem is None:
-                            continue
-                        
-                        position = int(position_elem.text)
-                        quantity = float(quantity_elem.text)
-                        
-                        # Oblicz timestamp
-                        timestamp = start_time + timedelta(minutes=(position - 1) * interval_minutes)
-                        
-                        all_data.append({
-                            'Data': timestamp,
-                            'Typ': type_name,
-                            'Moc [MW]': quantity
-                        })
-            
-            if not all_data:
-                return None
+                # Timestampy całego Period jednym działaniem wektorowym:
+                # start + (pozycja - 1) * rozdzielczość (PT15M i PT60M obsługiwane per Period)
+                timestamps = np.concatenate([
+                    np.datetime64(start_time.astimezone(timezone.utc).replace(tzinfo=None), 'm')
+                    + (positions - 1) * np.timedelta64(interval_minutes, 'm')
+                    for start_time, interval_minutes, positions, _ in periods
+                ])
+                quantities = np.concatenate([period[3] for period in periods])
+                
+                values = pd.Series(quantities, index=pd.DatetimeIndex(timestamps.astype('datetime64[ns]')))
+                # Ten sam timestamp w kilku Period - zachowaj pierwszą wartość
+                type_series[type_name] = values[~values.index.duplicated(keep='first')]
             
-            df = pd.DataFrame(all_data)
+            if not type_series:
+                return None
             
-            # Pivot - zamień typy produkcji na kolumny
-            df_pivot = df.pivot_table(
-                index='Data',
-                columns='Typ',
-                values='Moc [MW]',
-                aggfunc='first'
-            ).reset_index()
+            # Szeroka ramka budowana bezpośrednio (kolumny = typy produkcji, wyrównane po czasie)
+            df_pivot = pd.concat(
+                [type_series[name] for name in sorted(type_series)],
+                axis=1,
+                keys=sorted(type_series)
+            ).sort_index()
+            df_pivot.index = df_pivot.index.tz_localize('UTC')
+            df_pivot.index.name = 'Data'
+            df_pivot = df_pivot.reset_index()
             
             # Dodaj brakujące kolumny i wypełnij NaN zerami
             expected_columns = [
@@ -275,17 +501,26 @@ class ENTSOEDataFetcher:
                 'Biomasa [MW]'
             ]
             
+            if columns is not None:
+                # Projekcja: tylko wybrane kolumny i składowe wody (gdy wybrano jej sumę)
+                expected_columns = [col for col in expected_columns
+                                    if col in columns or ('Woda [MW]' in columns and col.startswith('Woda ('))]
+            
             for col in expected_columns:
                 if col not in df_pivot.columns:
                     df_pivot[col] = 0.0
             
             # Oblicz sumę wody
-            df_pivot['Woda [MW]'] = (
-                df_pivot['Woda (przepływowa) [MW]'].fillna(0) + 
-                df_pivot['Woda (zbiornikowa) [MW]'].fillna(0)
-            )
+            if columns is None or 'Woda [MW]' in columns:
+                df_pivot['Woda [MW]'] = (
+                    df_pivot['Woda (przepływowa) [MW]'].fillna(0) + 
+                    df_pivot['Woda (zbiornikowa) [MW]'].fillna(0)
+                )
+            
+            if columns is not None:
+                df_pivot = df_pivot[['Data', *(col for col in df_pivot.columns if col in columns)]]
             
-            df_pivot.fillna(0, inplace=True)
+            df_pivot = df_pivot.fillna(0)
             
             # Konwertuj timestampy UTC na czas polski (Europe/Warsaw)
             df_pivot['Data'] = pd.to_datetime(df_pivot['Data'])
@@ -295,13 +530,113 @@ class ENTSOEDataFetcher:
             # API już zwraca dane dla żądanego okresu (period_start/period_end)
             # Dodatkowe filtrowanie powodowało utratę godziny 0 (00:00-00:45)
             
+            if compact:
+                # W procesie roboczym - do procesu głównego trafia już mniejsza ramka
+                df_pivot = compact_frame(df_pivot, drop_columns=cls.COMPACT_DROP_COLUMNS)
+            
             return df_pivot
             
         except Exception as e:
-            print(f"❌ Błąd parsowania XML: {e}")
+            logger.error(f"❌ Błąd parsowania XML: {e}")
+            return None
+    
+    @classmethod
+    def _parse_a75_stream(cls, xml_content: bytes, psr_types: Optional[set] = None) -> Dict[str, list]:
+        """
+        Strumieniowo parsuje dokument A75 (iterparse) do tablic NumPy.
+        
+        Elementy są zwalniane zaraz po przetworzeniu, więc pamięć nie rośnie
+        z liczbą punktów w dokumencie (roczne fragmenty mają ich setki tysięcy).
+        
+        Args:
+            xml_content: Zawartość XML z API
+            psr_types: Parsowane typy produkcji (None - wszystkie); punkty pozostałych
+                       szeregów są pomijane bez konwersji wartości
+            
+        Returns:
+            Słownik {psrType: [(start UTC, interwał w minutach, pozycje, moce), ...]}
+            z jednym wpisem listy na każdy Period
+        """
+        series = {}
+        
+        psr_type = None
+        in_period = False
+        start_time = None
+        resolution = 'PT60M'
+        positions = []
+        quantities = []
+        position = None
+        quantity = None
+        root = None
+        
+        for event, elem in ET.iterparse(BytesIO(xml_content), events=('start', 'end')):
+            # Nazwa tagu bez namespace (np. '{urn:...}Point' -> 'Point')
+            tag = elem.tag.rpartition('}')[2]
+            
+            if event == 'start':
+                if root is None:
+                    root = elem
+                elif tag == 'TimeSeries':
+                    psr_type = None
+                elif tag == 'Period':
+                    # psrType poprzedza Period w TimeSeries - pomijane szeregi nie wchodzą w Period
+                    in_period = psr_types is None or psr_type in psr_types
+                    start_time = None
+                    resolution = 'PT60M'
+                    positions = []
+                    quantities = []
+                elif tag == 'Point':
+                    position = None
+                    quantity = None
+                continue
+            
+            if tag == 'psrType':
+                psr_type = elem.text
+            elif not in_period:
+                pass
+            elif tag == 'position':
+                position = elem.text
+            elif tag == 'quantity':
+                quantity = elem.text
+            elif tag == 'Point':
+                if position is not None and quantity is not None:
+                    positions.append(int(position))
+                    quantities.append(float(quantity))
+                elem.clear()
+            elif tag == 'start':
+                start_time = datetime.fromisoformat(elem.text.replace('Z', '+00:00'))
+            elif tag == 'resolution':
+                resolution = elem.text
+            elif tag == 'Period':
+                in_period = False
+                if psr_type is not None and start_time is not None and positions:
+                    series.setdefault(psr_type, []).append((
+                        start_time,
+                        cls._parse_resolution(resolution),
+                        np.array(positions, dtype=np.int64),
+                        np.array(quantities, dtype=np.float64),
+                    ))
+                elem.clear()
+            
+            if tag == 'TimeSeries':
+                # Zwolnij przetworzone TimeSeries z drzewa dokumentu
+                root.clear()
+        
+        return series
+    
+    @classmethod
+    def _value_columns(cls, columns: Optional[list]) -> Optional[list]:
+        """Sprawdza kolumny projekcji i usuwa z nich kolumnę czasu (None - wszystkie kolumny)."""
+        if columns is None:
             return None
+        columns = [column for column in dict.fromkeys(columns) if column != 'Data']
+        unknown = [column for column in columns if column not in cls.COLUMN_PSR_TYPES]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny ENTSO-E: {', '.join(unknown)}")
+        return columns
     
-    def _get_type_name(self, psr_type: str) -> str:
+    @staticmethod
+    def _get_type_name(psr_type: str) -> str:
         """Mapuje kod typu produkcji ENTSO-E na czytelną nazwę."""
         type_mapping = {
             'B01': 'Biomasa [MW]',
@@ -316,7 +651,8 @@ class ENTSOEDataFetcher:
         }
         return type_mapping.get(psr_type, f'Nieznany typ ({psr_type}) [MW]')
     
-    def _parse_resolution(self, resolution: str) -> int:
+    @staticmethod
+    def _parse_resolution(resolution: str) -> int:
         """Parsuje resolution string (np. PT15M) na minuty."""
         if 'PT' in resolution:
             resolution = resolution.replace('PT', '')
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Kompaktowy układ typów kolumn pobranych ramek (opcjonalny).
+
+Domyślnie fetchery zwracają kolumny MW jako float64, marker DST jako tekst
+i surowe kolumny składowe obok ich sum. W trybie kompaktowym
+(compact_dtypes=True w fetcherach PSE, ENTSO-E i połączonym):
+    - kolumny mocy [MW] - float32 (dokładność ~7 cyfr znaczących, z zapasem dla MW)
+    - marker DST '_dst_marker' - int8 (0 - brak, 1 - czas letni, 2 - czas zimowy)
+    - publication_ts - datetime64 zamiast tekstu
+    - pozostałe kolumny tekstowe (np. etykiety źródła) - category
+    - kolumny składowe, których suma jest osobną kolumną, są usuwane
+
+Kilkuletnia ramka połączona zajmuje wtedy ok. połowy pamięci lub mniej.
+Sumy i średnie analizatorów są liczone z akumulacją float64 (pandas/NumPy),
+więc wyniki agregacji praktycznie się nie zmieniają.
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+COMPACT_FLOAT = np.float32
+
+DST_MARKER_COLUMN = '_dst_marker'
+
+# Marker PSE -> kod int8 (odwrotne mapowanie w DST_MARKER_NAMES)
+DST_MARKER_CODES = {'': 0, 'first': 1, 'second': 2}
+DST_MARKER_NAMES = {code: name for name, code in DST_MARKER_CODES.items()}
+
+# Kolumny z czasem zapisanym tekstowo w odpowiedziach API
+DATETIME_TEXT_COLUMNS = ('publication_ts',)
+
+
+def compact_frame(df: pd.DataFrame, drop_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Zwraca ramkę w kompaktowym układzie typów (patrz opis modułu).
+
+    Funkcja jest idempotentna - kolumny już skompaktowane pozostają bez zmian.
+
+    Args:
+        df: Ramka PSE, ENTSO-E lub połączona
+        drop_columns: Kolumny do usunięcia (np. składowe sumowanych kolumn)
+    """
+    df = df.drop(columns=[column for column in drop_columns if column in df.columns])
+
+    converted = {}
+    for column in df.columns:
+        series = df[column]
+        if column == DST_MARKER_COLUMN:
+            if not pd.api.types.is_integer_dtype(series):
+                converted[column] = series.map(DST_MARKER_CODES).fillna(0).astype(np.int8)
+        elif column in DATETIME_TEXT_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                converted[column] = pd.to_datetime(series, errors='coerce')
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            continue
+        elif pd.api.types.is_numeric_dtype(series):
+            if series.dtype != COMPACT_FLOAT:
+                converted[column] = series.astype(COMPACT_FLOAT)
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            converted[column] = series.astype('category')
+
+    if not converted:
+        return df
+    df = df.copy(deep=False)
+    for column, values in converted.items():
+        df[column] = values
+    return df
+
+
+def dst_marker_names(markers) -> np.ndarray:
+    """Zamienia markery DST (tekstowe lub kody int8) na nazwy 'first' / 'second' / ''."""
+    markers = np.asarray(markers)
+    if markers.dtype.kind in 'iu':
+        return np.array([DST_MARKER_NAMES.get(int(code), '') for code in markers], dtype=object)
+    return markers.astype(object)
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Rozmiar ramki w pamięci (MB, z zawartością kolumn tekstowych)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
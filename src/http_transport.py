@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Wspólny transport HTTP dla fetcherów PSE i ENTSO-E.
+
+Wszystkie instancje fetcherów w procesie korzystają z jednej sesji requests
+(jednej puli połączeń keep-alive), więc kolejne operacje - np. w menu
+interaktywnym, które tworzy nowy fetcher dla każdej opcji - nie płacą
+ponownie za nawiązanie połączenia TLS. Pula każdego hosta ma rozmiar
+dopasowany do liczby równoległych zapytań fetchera.
+
+Zapytania do każdego hosta przechodzą przez wspólny limiter (token bucket)
+z budżetem zapytań na sekundę, a błędy przejściowe (429, 5xx, błędy sieci)
+są ponawiane z wykładniczym opóźnieniem z losowym rozrzutem (jitter),
+z uwzględnieniem nagłówka Retry-After.
+"""
+
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .instrumentation import metrics
+except ImportError:
+    from instrumentation import metrics
+
+
+# Domyślny rozmiar puli połączeń na host (równy domyślnej liczbie wątków fetcherów)
+DEFAULT_POOL_SIZE = 4
+
+# Liczba hostów, dla których pule połączeń są utrzymywane jednocześnie
+POOL_HOSTS = 8
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Statusy HTTP traktowane jako przejściowe (zapytanie jest ponawiane)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Domyślne ponawianie: liczba prób, bazowe i maksymalne opóźnienie (sekundy)
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 30.0
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_pool_size = 0
+
+
+def _mount_adapters(session: requests.Session, pool_size: int):
+    """Montuje adaptery HTTP(S) z pulą pool_size połączeń na host (poprzednie są zamykane)."""
+    for prefix in ('https://', 'http://'):
+        previous = session.adapters.get(prefix)
+        session.mount(prefix, HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size))
+        if previous is not None:
+            # Połączenia starej puli nie byłyby już używane ani zamykane
+            previous.close()
+
+
+def shared_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Zwraca wspólną dla procesu sesję HTTP.
+
+    Sesja jest tworzona przy pierwszym wywołaniu. Jeśli kolejny fetcher potrzebuje
+    większej puli (więcej równoległych zapytań), adaptery są wymieniane na większe;
+    mniejsze żądania korzystają z istniejącej puli.
+
+    Args:
+        pool_size: Wymagana liczba połączeń na host
+    """
+    global _session, _pool_size
+    pool_size = max(1, int(pool_size))
+
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(DEFAULT_HEADERS)
+        if pool_size > _pool_size:
+            _mount_adapters(_session, pool_size)
+            _pool_size = pool_size
+        return _session
+
+
+def close_shared_session():
+    """Zamyka wspólną sesję (połączenia); następne wywołanie utworzy nową."""
+    global _session, _pool_size
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _pool_size = 0
+
+
+class TokenBucket:
+    """
+    Limiter zapytań typu token bucket (bezpieczny wątkowo).
+
+    Żetony przybywają ze stałą szybkością rate na sekundę, do pojemności burst.
+    Każde zapytanie zużywa jeden żeton; gdy ich brak, wątek czeka na kolejny.
+    Odpowiedź 429 wstrzymuje cały host (pause) - czekają wszystkie wątki, a nie
+    tylko ten, który dostał odmowę.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Budżet zapytań na sekundę
+            burst: Maksymalna liczba zapytań wysłanych od razu (domyślnie max(1, rate))
+        """
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def configure(self, rate: float, burst: Optional[float] = None):
+        """Zmienia budżet zapytań (np. gdy kolejny fetcher ustawia inny limit)."""
+        with self._lock:
+            self.rate = float(rate)
+            self.burst = float(burst) if burst is not None else max(1.0, self.rate)
+
+    def acquire(self):
+        """Pobiera żeton - czeka, jeśli budżet jest wyczerpany lub host wstrzymany."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Żeton jest rezerwowany od razu (saldo może być ujemne), więc kolejne
+            # wątki ustawiają się w kolejce zamiast wszystkie naraz czekać na ten sam
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate if self._tokens < 0 else 0.0,
+                       self._paused_until - now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Wstrzymuje zapytania do hosta na podany czas (np. po odpowiedzi 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_limiters = {}
+
+
+def set_rate_limit(host: str, rate: Optional[float], burst: Optional[float] = None,
+                   replace: bool = False):
+    """
+    Ustawia wspólny dla procesu budżet zapytań na sekundę dla hosta.
+
+    Limit jest wspólny dla wszystkich fetcherów i klientów hosta, więc nowy fetcher
+    nie może go poluzować: gdy host ma już limiter, zostaje zachowany niższy z budżetów,
+    a rate=None (fetcher bez własnego limitu) nie zmienia istniejącego limitu.
+
+    Args:
+        host: Nazwa hosta (np. 'api.raporty.pse.pl')
+        rate: Zapytania na sekundę (None lub 0 - bez nowego limitu)
+        burst: Maksymalna liczba zapytań wysłanych od razu
+        replace: Ustaw dokładnie podany budżet, także wyższy od obecnego
+                 (usunięcie limitu - clear_rate_limit)
+    """
+    if not rate:
+        return
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            _limiters[host] = TokenBucket(rate, burst)
+        elif replace or rate < limiter.rate:
+            limiter.configure(rate, burst)
+
+
+def clear_rate_limit(host: str):
+    """Usuwa limit zapytań hosta (dla wszystkich fetcherów w procesie)."""
+    with _lock:
+        _limiters.pop(host, None)
+
+
+def rate_limiter(host: str) -> Optional[TokenBucket]:
+    """Zwraca limiter hosta lub None, jeśli host nie ma limitu."""
+    with _lock:
+        return _limiters.get(host)
+
+
+def retry_after_seconds(response: requests.Response, maximum: float = DEFAULT_BACKOFF_MAX) -> Optional[float]:
+    """
+    Odczytuje nagłówek Retry-After (liczba sekund lub data HTTP) - None gdy brak.
+
+    Wartość jest ograniczana do maximum sekund, więc serwer nie może uśpić
+    wątku roboczego na wiele godzin (np. Retry-After: 86400).
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    if math.isnan(seconds):
+        return None
+    return min(max(0.0, seconds), maximum)
+
+
+def wire_bytes(response: requests.Response) -> int:
+    """
+    Liczba bajtów treści odpowiedzi przesłanych przez sieć (przed dekompresją gzip).
+
+    Z nagłówka Content-Length, a bez niego (np. Transfer-Encoding: chunked)
+    z licznika bajtów odczytanych z połączenia.
+    """
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        pass
+    response.content  # treść odczytana w całości
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        try:
+            return int(tell())
+        except (TypeError, ValueError, OSError):
+            pass
+    return len(response.content)
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE,
+                  maximum: float = DEFAULT_BACKOFF_MAX) -> float:
+    """Opóźnienie przed ponowieniem: losowe z przedziału [0, min(maximum, base * 2^attempt)] (full jitter)."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class HTTPClient:
+    """
+    Klient HTTP fetchera - własne nagłówki (np. User-Agent, Accept) przy wspólnej sesji.
+
+    Nagłówki klienta dołączane są do każdego zapytania zamiast do sesji, więc fetchery
+    o różnych nagłówkach mogą bezpiecznie dzielić tę samą pulę połączeń.
+
+    Każde zapytanie czeka na żeton limitera hosta, a odpowiedzi 429/5xx i błędy
+    sieci są ponawiane (wykładnicze opóźnienie z jitterem lub Retry-After).
+
+    Czas zapytań, oczekiwania na limiter i ponowienia, bajty odpowiedzi oraz liczba
+    ponowień trafiają do rejestru instrumentation.metrics (etykieta source).
+    """
+
+    def __init__(self, headers: Optional[dict] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX, source: str = 'http'):
+        """
+        Args:
+            headers: Nagłówki dołączane do każdego zapytania
+            pool_size: Liczba równoległych zapytań fetchera (rozmiar puli na host)
+            max_retries: Liczba prób zapytania (1 = bez ponawiania)
+            backoff_base: Bazowe opóźnienie ponowienia w sekundach
+            backoff_max: Maksymalne opóźnienie ponowienia w sekundach
+            source: Etykieta źródła w pomiarach (np. 'pse', 'entsoe')
+        """
+        self.source = source
+        self.headers = dict(headers or {})
+        self.session = shared_session(pool_size)
+        self.max_retries = max(1, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def get(self, url: str, params: Optional[dict] = None, timeout: float = 30,
+            headers: Optional[dict] = None, max_retries: Optional[int] = None,
+            **kwargs) -> requests.Response:
+        """
+        Wysyła zapytanie GET przez wspólną sesję (nagłówki zapytania nadpisują nagłówki klienta).
+
+        Returns:
+            Odpowiedź - po wyczerpaniu prób także ostatnia odpowiedź błędna (429/5xx)
+
+        Raises:
+            requests.RequestException: gdy wszystkie próby zakończyły się błędem sieci
+        """
+        attempts = self.max_retries if max_retries is None else max(1, int(max_retries))
+        limiter = rate_limiter(urlsplit(url).hostname or '')
+        headers = {**self.headers, **(headers or {})}
+
+        source = self.source
+        for attempt in range(attempts):
+            if attempt:
+                metrics.count('http_retries', source=source)
+            if limiter is not None:
+                with metrics.span('rate_limit_wait', source=source):
+                    limiter.acquire()
+            try:
+                with metrics.span('http_request', source=source):
+                    response = self.session.get(url, params=params, timeout=timeout, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.count('http_network_errors', source=source)
+                if attempt == attempts - 1:
+                    raise
+                with metrics.span('retry_wait', source=source):
+                    time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+
+            metrics.count('http_responses', source=source, status=response.status_code)
+            metrics.count('bytes_received', wire_bytes(response), source=source)
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+
+            delay = retry_after_seconds(response, self.backoff_max)
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            if response.status_code == 429 and limiter is not None:
+                # Serwer ogranicza cały host - wstrzymaj wszystkie wątki, nie tylko ten
+                limiter.pause(delay)
+            response.close()
+            with metrics.span('retry_wait', source=source):
+                time.sleep(delay)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pomiary czasu i liczniki etapów pobierania danych.
+
+Fetchery PSE, ENTSO-E i fetcher połączony rejestrują we wspólnym dla procesu
+rejestrze czasy etapów (spany: zapytania HTTP, parsowanie, łączenie, walidacja)
+oraz liczniki (zapytania, ponowienia, bajty, trafienia cache). Podsumowanie
+pokazuje, czy wolne uruchomienie było ograniczone siecią, czy obliczeniami.
+
+Przykład:
+    from instrumentation import metrics
+    ... pobieranie ...
+    print(metrics.summary_table())
+    metrics.write('metrics.prom')   # format tekstowy Prometheus (lub .json)
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def _format_labels(labels: tuple) -> str:
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+
+class Metrics:
+    """
+    Rejestr spanów (czasy wykonania) i liczników - bezpieczny wątkowo.
+
+    Span i licznik identyfikuje nazwa oraz etykiety (np. source='pse').
+    Dla spanu zapamiętywane są: liczba wywołań, łączny, minimalny i maksymalny czas.
+    """
+
+    PROMETHEUS_PREFIX = 'energy'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Usuwa wszystkie zarejestrowane pomiary."""
+        with self._lock:
+            self._spans = {}
+            self._counters = {}
+            self.started_at = datetime.now()
+
+    def record(self, name: str, seconds: float, **labels):
+        """Rejestruje czas wykonania zmierzony poza spanem (np. w procesie roboczym)."""
+        with self._lock:
+            stats = self._spans.get(_key(name, labels))
+            if stats is None:
+                self._spans[_key(name, labels)] = {'count': 1, 'total': seconds, 'min': seconds, 'max': seconds}
+            else:
+                stats['count'] += 1
+                stats['total'] += seconds
+                stats['min'] = min(stats['min'], seconds)
+                stats['max'] = max(stats['max'], seconds)
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Mierzy czas wykonania bloku: with metrics.span('parse', source='pse'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """Dekorator mierzący czas wykonania funkcji jako span."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Zwiększa licznik (np. metrics.count('cache_hits', source='pse'))."""
+        with self._lock:
+            key = _key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """Zwraca kopię pomiarów: {'spans': [...], 'counters': [...]}."""
+        with self._lock:
+            spans = [{'name': name, 'labels': dict(labels), **stats}
+                     for (name, labels), stats in sorted(self._spans.items())]
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {'started_at': self.started_at.isoformat(timespec='seconds'), 'spans': spans, 'counters': counters}
+
+    def summary_table(self) -> str:
+        """Tabela podsumowania: spany (liczba, suma, średnia, maksimum) i liczniki."""
+        data = self.snapshot()
+        lines = ['=' * 78, '⏱️  POMIARY CZASU I LICZNIKI', '=' * 78]
+
+        if data['spans']:
+            lines.append(f"{'Etap':<34} {'Liczba':>8} {'Suma [s]':>10} {'Średnio [ms]':>12} {'Maks. [ms]':>10}")
+            lines.append('-' * 78)
+            for span in data['spans']:
+                label = ' '.join(f"{value}" for value in span['labels'].values())
+                name = f"{span['name']} ({label})" if label else span['name']
+                lines.append(f"{name:<34} {span['count']:>8} {span['total']:>10.3f} "
+                             f"{span['total'] / span['count'] * 1000:>12.1f} {span['max'] * 1000:>10.1f}")
+
+        if data['counters']:
+            lines.append('-' * 78)
+            for counter in data['counters']:
+                label = ' '.join(f"{value}" for value in counter['labels'].values())
+                name = f"{counter['name']} ({label})" if label else counter['name']
+                value = counter['value']
+                lines.append(f"{name:<34} {value:>8,.0f}".replace(',', ' '))
+
+        if not data['spans'] and not data['counters']:
+            lines.append('Brak pomiarów')
+        lines.append('=' * 78)
+        return '\n'.join(lines)
+
+    def to_json(self) -> str:
+        """Pomiary jako JSON."""
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Pomiary w formacie tekstowym Prometheus (np. dla node_exporter textfile collector)."""
+        prefix = self.PROMETHEUS_PREFIX
+        data = self.snapshot()
+        lines = []
+
+        if data['spans']:
+            lines.append(f"# HELP {prefix}_span_seconds Czas wykonania etapów pobierania i przetwarzania")
+            lines.append(f"# TYPE {prefix}_span_seconds summary")
+            for span in data['spans']:
+                labels = _format_labels((('span', span['name']), *sorted(span['labels'].items())))
+                lines.append(f"{prefix}_span_seconds_sum{{{labels}}} {span['total']:.6f}")
+                lines.append(f"{prefix}_span_seconds_count{{{labels}}} {span['count']}")
+
+        for name in dict.fromkeys(counter['name'] for counter in data['counters']):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for counter in data['counters']:
+                if counter['name'] == name:
+                    labels = _format_labels(sorted(counter['labels'].items()))
+                    lines.append(f"{prefix}_{name}_total{{{labels}}} {counter['value']}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Zapisuje pomiary do pliku - format Prometheus dla .prom, w przeciwnym razie JSON."""
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+# Wspólny rejestr procesu (jak wspólna sesja HTTP w http_transport)
+metrics = Metrics()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Komunikaty fetcherów przez moduł logging oraz zdarzenia postępu.
+
+Wszystkie komunikaty modułów biblioteki (fetchery, cache, magazyn, raport
+jakości danych) trafiają do loggera 'energia' i jego potomków
+('energia.pse', 'energia.entsoe', ...). Domyślnie wypisywane są na stdout
+w dotychczasowej postaci (poziom INFO), więc skrypty i menu działają bez zmian.
+
+Tryb cichy (użycie jako biblioteki, zadania wsadowe):
+    from log_output import configure_output
+    configure_output(quiet=True)          # zero wyjścia na konsolę
+    configure_output(level='WARNING')     # tylko ostrzeżenia i błędy
+
+lub zmienne środowiskowe ENERGY_QUIET=1 / ENERGY_LOG_LEVEL=WARNING.
+W trybie cichym komunikaty są przekazywane do konfiguracji logging aplikacji
+(propagacja do root loggera), jeśli aplikacja ją ustawiła.
+
+Postęp pobierania jest dostępny jako zdarzenia (słowniki) przez argument
+progress_callback fetcherów - niezależnie od poziomu logowania.
+"""
+
+import logging
+import os
+import sys
+import threading
+from typing import Callable, Optional, Union
+
+
+LOGGER_NAME = 'energia'
+
+# Zdarzenie postępu: {'source': 'pse', 'event': 'day', 'done': 10, 'total': 31, ...}
+ProgressCallback = Callable[[dict], None]
+
+
+class ConsoleHandler(logging.Handler):
+    """
+    Wypisuje komunikaty na bieżący sys.stdout (bez prefiksów - jak dotychczasowe print).
+
+    Strumień jest odczytywany przy każdym komunikacie, a nie zapamiętywany,
+    więc przekierowanie sys.stdout przez aplikację (np. contextlib.redirect_stdout)
+    działa także dla logów. Atrybut stream pozwala kierować komunikaty gdzie indziej
+    (np. na stderr, gdy stdout niesie dane - tryb tail).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.stream = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            stream = self.stream or sys.stdout
+            stream.write(self.format(record) + '\n')
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+_root = logging.getLogger(LOGGER_NAME)
+_console = ConsoleHandler()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Zwraca logger modułu, np. get_logger('pse') -> 'energia.pse'."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_output(level: Optional[Union[int, str]] = None, quiet: Optional[bool] = None,
+                     stream=None):
+    """
+    Ustawia poziom komunikatów i tryb cichy.
+
+    Args:
+        level: Minimalny poziom komunikatów (np. 'DEBUG', 'INFO', 'WARNING', logging.ERROR)
+        quiet: True - brak wyjścia na konsolę (komunikaty tylko dla handlerów aplikacji),
+               False - komunikaty na stdout
+        stream: Strumień komunikatów konsoli zamiast stdout (np. sys.stderr)
+    """
+    if stream is not None:
+        _console.stream = stream
+
+    if level is not None:
+        _root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if quiet is not None:
+        _root.removeHandler(_console)
+        if quiet:
+            # Propagacja do konfiguracji aplikacji; NullHandler zapobiega awaryjnemu
+            # wypisywaniu ostrzeżeń na stderr, gdy aplikacja nie ma handlerów
+            _root.propagate = True
+            if not any(isinstance(handler, logging.NullHandler) for handler in _root.handlers):
+                _root.addHandler(logging.NullHandler())
+        else:
+            _root.propagate = False
+            _root.addHandler(_console)
+
+
+def is_quiet() -> bool:
+    """Sprawdza czy komunikaty są wypisywane na konsolę."""
+    return _console not in _root.handlers
+
+
+class SourceLogBuffer(logging.Filter):
+    """
+    Wstrzymuje komunikaty jednego źródła (logger 'energia.<źródło>') i przekazuje je później.
+
+    Filtr zakładany jest na logger źródła, więc obejmuje komunikaty ze wszystkich
+    wątków tego źródła (np. pule pobierania i parsowania ENTSO-E), a nie dotyczy
+    innych źródeł ani reszty programu - sys.stdout nie jest podmieniany.
+
+        with SourceLogBuffer('entsoe') as entsoe_log:
+            ...                      # komunikaty ENTSO-E są zbierane
+            entsoe_log.release()     # wypisz zebrane, dalej na bieżąco
+    """
+
+    def __init__(self, source: str):
+        super().__init__()
+        self.logger = get_logger(source)
+        self._lock = threading.Lock()
+        self._records = []
+        self._buffering = False
+
+    def start(self) -> 'SourceLogBuffer':
+        """Zaczyna zbierać komunikaty źródła (najnowszy bufor loggera ma pierwszeństwo)."""
+        with self._lock:
+            self._buffering = True
+        if self not in self.logger.filters:
+            self.logger.filters.insert(0, self)
+        return self
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            if self._buffering:
+                self._records.append(record)
+                return False
+        return True
+
+    def detach(self) -> list:
+        """Kończy zbieranie i zwraca zebrane komunikaty (bez wypisywania)."""
+        with self._lock:
+            self._buffering = False
+            records, self._records = self._records, []
+        self.logger.removeFilter(self)
+        return records
+
+    def release(self):
+        """Kończy zbieranie i przekazuje zebrane komunikaty do handlerów loggera."""
+        replay(self.detach())
+
+    __enter__ = start
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def portable_records(records: list) -> list:
+    """Przygotowuje komunikaty do przesłania między procesami (treść sformatowana, bez wyjątków)."""
+    for record in records:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+    return records
+
+
+def replay(records: list):
+    """Przekazuje zapisane komunikaty (np. z procesu roboczego) do handlerów ich loggerów."""
+    for record in records:
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def emit_progress(callback: Optional[ProgressCallback], **event):
+    """
+    Przekazuje zdarzenie postępu do callbacku (jeśli ustawiony).
+
+    Błąd w callbacku nie przerywa pobierania - jest tylko logowany.
+    """
+    if callback is None:
+        return
+    try:
+        callback(event)
+    except Exception as e:
+        _root.warning(f"⚠️  Błąd w callbacku postępu: {e}")
+
+
+# Domyślnie: komunikaty na stdout na poziomie INFO (zachowanie jak przy print)
+_root.setLevel(os.getenv('ENERGY_LOG_LEVEL', 'INFO').upper())
+configure_output(quiet=os.getenv('ENERGY_QUIET', '').lower() in ('1', 'true', 'yes', 'tak'))
@@ -4,37 +4,144 @@ Skrypt do pobierania i analizowania danych o produkcji energii wiatrowej i fotow
 Dane źródłowe: https://raporty.pse.pl/report/his-wlk-cal
 """
 
-import requests
+import re
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import json
+import os
 from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pandas.tseries.frequencies import to_offset
+from urllib.parse import urlsplit
 import sys
 
+try:
+    from .data_cache import PSEDayCache
+    from .http_transport import HTTPClient, set_rate_limit
+    from .instrumentation import metrics
+    from .log_output import get_logger, emit_progress, ProgressCallback
+    from .frame_dtypes import compact_frame, dst_marker_names
+except ImportError:
+    from data_cache import PSEDayCache
+    from http_transport import HTTPClient, set_rate_limit
+    from instrumentation import metrics
+    from log_output import get_logger, emit_progress, ProgressCallback
+    from frame_dtypes import compact_frame, dst_marker_names
+
+
+logger = get_logger('pse')
+
 
 class PSEEnergyDataFetcher:
     """Klasa do pobierania danych o produkcji energii z PSE."""
     
     BASE_URL = "https://api.raporty.pse.pl/api"
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    # Domyślna liczba równoległych zapytań przy pobieraniu dzień po dniu
+    DEFAULT_MAX_WORKERS = 4
+    
+    # Domyślny budżet zapytań na sekundę do API PSE (wspólny dla wszystkich wątków i instancji)
+    DEFAULT_REQUESTS_PER_SECOND = 10
+    
+    # Pola pobierane z /his-wlk-cal ($select) - tylko te, które mapuje _parse_data,
+    # oraz publication_ts potrzebny do pobierania przyrostowego
+    SELECT_FIELDS = ['dtime', 'wi', 'pv', 'demand', 'swm_p', 'swm_np', 'publication_ts']
+    
+    # Kolumny wynikowe -> pola API potrzebne do ich wyliczenia (projekcja columns=)
+    COLUMN_FIELDS = {
+        'Sumaryczna generacja źródeł wiatrowych [MW]': ['wi'],
+        'Sumaryczna generacja źródeł fotowoltaicznych [MW]': ['pv'],
+        'Zapotrzebowanie na moc [MW]': ['demand'],
+        'Krajowe saldo wymiany międzysystemowej - równoległa [MW]': ['swm_p'],
+        'Krajowe saldo wymiany międzysystemowej - nierównoległa [MW]': ['swm_np'],
+        'Krajowe saldo wymiany międzysystemowej [MW]': ['swm_p', 'swm_np'],
+    }
+    
+    # Format dtime: "2024-06-14 00:15:00", w dniu zmiany czasu "2024-10-27 02a:15:00" / "02b:15:00"
+    DTIME_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2})([ab]?)(:\d{2}:\d{2})$')
+    DTIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+    DST_MARKERS = {'a': 'first', 'b': 'second', '': ''}
+    
+    # Kanoniczny klucz czasu (UTC, początek przedziału) - jednoznaczny także w dniu
+    # zmiany czasu, gdy lokalna kolumna 'Data' powtarza godzinę 02:00-03:00
+    TIME_KEY = 'Data_UTC'
+    
+    # Kolumny usuwane w trybie kompaktowym - składowe salda wymiany
+    # (ich suma jest w kolumnie 'Krajowe saldo wymiany międzysystemowej [MW]')
+    COMPACT_DROP_COLUMNS = [
+        'Krajowe saldo wymiany międzysystemowej - równoległa [MW]',
+        'Krajowe saldo wymiany międzysystemowej - nierównoległa [MW]',
+    ]
+    
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, use_cache: bool = True,
+                 cache: Optional[PSEDayCache] = None, delta_fetch: bool = True,
+                 requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND,
+                 base_url: Optional[str] = None, progress_callback: Optional[ProgressCallback] = None,
+                 compact_dtypes: bool = False):
+        """
+        Inicjalizacja fetcher'a PSE.
+        
+        Args:
+            max_workers: Maksymalna liczba równoległych zapytań do API PSE
+                         przy pobieraniu dzień po dniu (1 = pobieranie sekwencyjne)
+            use_cache: Czy używać lokalnego cache dni (domyślnie tak)
+            cache: Własna instancja PSEDayCache (domyślnie cache w .cache/pse_days)
+            delta_fetch: Odświeżaj dni ulotne przyrostowo - tylko rekordy z publication_ts
+                         nowszym niż przy poprzedniej synchronizacji
+            requests_per_second: Limit zapytań na sekundę do API PSE - wspólny dla procesu,
+                                 zostaje niższy z limitów fetcherów (None - bez własnego limitu)
+            base_url: Adres API (domyślnie zmienna PSE_API_BASE_URL lub BASE_URL),
+                      np. lokalny serwer scripts/replay_server.py
+            progress_callback: Funkcja wywoływana po każdym pobranym dniu ze zdarzeniem
+                               {'source': 'pse', 'event': 'day', 'date', 'done', 'total', 'ok'}
+                               (postęp bez wypisywania na konsolę, patrz log_output)
+            compact_dtypes: Zwracaj ramki w kompaktowym układzie typów (float32, marker DST
+                            int8, bez składowych salda wymiany - patrz frame_dtypes).
+                            Cache dni przechowuje dane w pełnej precyzji.
+        """
+        self.base_url = (base_url or os.getenv('PSE_API_BASE_URL') or self.BASE_URL).rstrip('/')
+        self.max_workers = max(1, int(max_workers))
+        self.delta_fetch = delta_fetch
+        self.progress_callback = progress_callback
+        self.compact_dtypes = compact_dtypes
+        self._volatile_days = {}  # Dni ulotne z poprzedniej synchronizacji (gdy brak cache)
+        self.cache = None
+        # Dane z innego serwera (np. odtwarzane fixture'y) nie trafiają do domyślnego cache
+        if cache is not None or (use_cache and self.base_url == self.BASE_URL):
+            try:
+                self.cache = cache or PSEDayCache()
+            except OSError as e:
+                logger.warning(f"⚠️  Cache PSE niedostępny: {e}")
+        # Wspólna dla procesu pula połączeń (keep-alive, gzip), rozmiar wg max_workers
+        self.session = HTTPClient(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json',
-        })
+        }, pool_size=self.max_workers, source='pse')
+        set_rate_limit(urlsplit(self.base_url).hostname, requests_per_second)
     
-    def fetch_data(self, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    @metrics.timed('fetch', source='pse')
+    def fetch_data(self, date_from: str, date_to: str, max_workers: Optional[int] = None,
+                   columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera dane z PSE dla podanego zakresu dat.
         
         Args:
             date_from: Data początkowa w formacie YYYY-MM-DD
             date_to: Data końcowa w formacie YYYY-MM-DD
+            max_workers: Liczba równoległych zapytań (domyślnie wartość z konstruktora)
+            columns: Potrzebne kolumny wynikowe (klucze COLUMN_FIELDS, domyślnie wszystkie) -
+                     zapytanie ($select) i parsowanie obejmują tylko pola tych kolumn;
+                     kolumny czasu ('Data', 'Data_UTC') są zawsze zwracane
             
         Returns:
             DataFrame z danymi lub None w przypadku błędu
+            
+        Raises:
+            ValueError: gdy columns zawiera nieznaną kolumnę
         """
+        columns = self._value_columns(columns)
+        
         try:
             # Oblicz liczbę dni
             from datetime import datetime, timedelta
@@ -44,33 +151,43 @@ class PSEEnergyDataFetcher:
             
             # ZAWSZE pobieraj dane dzień po dniu dla pewności (API PSE ma limit ~100 rekordów)
             if days_diff > 1:
-                print(f"📥 Pobieranie danych dla {days_diff} dni...")
+                logger.info(f"📥 Pobieranie danych dla {days_diff} dni...")
                 all_dfs = []
                 failed_days = []  # Śledź dni bez danych
                 
-                current_date = start_date
-                while current_date <= end_date:
-                    date_str = current_date.strftime('%Y-%m-%d')
-                    df_day = self._fetch_single_day(date_str)
-                    
-                    if df_day is not None and not df_day.empty:
-                        all_dfs.append(df_day)
-                    else:
-                        failed_days.append(date_str)
-                    
-                    current_date += timedelta(days=1)
-                    
-                    # Progress indicator
-                    if len(all_dfs) % 10 == 0:
-                        print(f"  ✓ Pobrano {len(all_dfs)} dni...")
+                dates = [
+                    (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
+                    for i in range(days_diff)
+                ]
+                
+                workers = self.max_workers if max_workers is None else max(1, int(max_workers))
+                workers = min(workers, len(dates))
+                
+                # Pula wątków z ograniczoną liczbą równoległych zapytań.
+                # executor.map zwraca wyniki w kolejności dat, więc dane
+                # są składane chronologicznie niezależnie od kolejności odpowiedzi.
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for done, (date_str, df_day) in enumerate(zip(dates, executor.map(lambda day: self._fetch_single_day(day, columns=columns), dates)), 1):
+                        ok = df_day is not None and not df_day.empty
+                        if ok:
+                            # Kompaktowanie każdego dnia przed złączeniem - bez pełnej kopii float64
+                            all_dfs.append(self._compact(df_day))
+                        else:
+                            failed_days.append(date_str)
+                        emit_progress(self.progress_callback, source='pse', event='day', date=date_str,
+                                      done=done, total=len(dates), ok=ok)
+                        
+                        # Progress indicator
+                        if len(all_dfs) % 10 == 0:
+                            logger.info(f"  ✓ Pobrano {len(all_dfs)} dni...")
                 
                 # Raport o brakujących dniach
                 if failed_days:
-                    print(f"  ⚠️  Brak danych PSE dla {len(failed_days)} dni:")
+                    logger.warning(f"  ⚠️  Brak danych PSE dla {len(failed_days)} dni:")
                     for day in failed_days[:10]:  # Pokaż max 10
-                        print(f"     - {day}")
+                        logger.warning(f"     - {day}")
                     if len(failed_days) > 10:
-                        print(f"     ... i {len(failed_days) - 10} więcej")
+                        logger.warning(f"     ... i {len(failed_days) - 10} więcej")
                 
                 if all_dfs:
                     # Użyj concat z ignore_index=True, ale tylko jeśli mamy dane
@@ -78,11 +195,12 @@ class PSEEnergyDataFetcher:
                     
                     # Sprawdź duplikaty przed zwróceniem
                     if not result.empty and 'Data' in result.columns:
-                        duplicates = result['Data'].duplicated().sum()
+                        key = self._time_key(result)
+                        duplicates = result[key].duplicated().sum()
                         if duplicates > 0:
-                            print(f"  ⚠️  Wykryto {duplicates} duplikatów w danych PSE")
-                            result = result.drop_duplicates(subset=['Data'], keep='first')
-                            print(f"     Usunięto duplikaty, pozostało {len(result)} rekordów")
+                            logger.warning(f"  ⚠️  Wykryto {duplicates} duplikatów w danych PSE")
+                            result = result.drop_duplicates(subset=[key], keep='first')
+                            logger.warning(f"     Usunięto duplikaty, pozostało {len(result)} rekordów")
                     
                     # Filtruj dane przyszłościowe (tylko do bieżącej godziny)
                     result = self._filter_future_data(result)
@@ -90,15 +208,56 @@ class PSEEnergyDataFetcher:
                     return result if not result.empty else None
                 else:
                     return None
+            elif days_diff == 1 and self.cache is not None:
+                # Pojedynczy dzień - pobierz przez cache
+                result = self._fetch_single_day(date_from, columns=columns)
+                emit_progress(self.progress_callback, source='pse', event='day', date=date_from,
+                              done=1, total=1, ok=result is not None and not result.empty)
+                return self._filter_future_data(self._compact(result)) if result is not None else None
             else:
                 # Dla krótkich okresów, jeden request
-                result = self._fetch_date_range(date_from, date_to)
+                result = self._fetch_date_range(date_from, date_to, columns)
+                emit_progress(self.progress_callback, source='pse', event='day', date=date_from,
+                              done=1, total=1, ok=result is not None and not result.empty)
                 # Filtruj dane przyszłościowe
-                return self._filter_future_data(result) if result is not None else None
+                return self._filter_future_data(self._compact(result)) if result is not None else None
             
         except Exception as e:
-            print(f"❌ Błąd podczas pobierania danych: {e}")
+            logger.error(f"❌ Błąd podczas pobierania danych: {e}")
+            return None
+    
+    @classmethod
+    def _value_columns(cls, columns: Optional[list]) -> Optional[list]:
+        """Sprawdza kolumny projekcji i usuwa z nich kolumny czasu (None - wszystkie kolumny)."""
+        if columns is None:
             return None
+        columns = [column for column in dict.fromkeys(columns) if column not in ('Data', cls.TIME_KEY)]
+        unknown = [column for column in columns if column not in cls.COLUMN_FIELDS]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny PSE: {', '.join(unknown)}")
+        return columns
+    
+    @classmethod
+    def _select_fields(cls, columns: Optional[list]) -> list:
+        """Pola $select dla kolumn wynikowych - czas, pola kolumn i publication_ts."""
+        if columns is None:
+            return cls.SELECT_FIELDS
+        fields = ['dtime', *(field for column in columns for field in cls.COLUMN_FIELDS[column]), 'publication_ts']
+        return list(dict.fromkeys(fields))
+    
+    @classmethod
+    def _project(cls, df: Optional[pd.DataFrame], columns: Optional[list]) -> Optional[pd.DataFrame]:
+        """Zostawia kolumny czasu, marker DST, publication_ts i wybrane kolumny wynikowe."""
+        if columns is None or df is None:
+            return df
+        keep = {'Data', cls.TIME_KEY, '_dst_marker', 'publication_ts', *columns}
+        return df[[column for column in df.columns if column in keep]]
+    
+    def _compact(self, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Zwraca ramkę w układzie kompaktowym (gdy włączony compact_dtypes)."""
+        if not self.compact_dtypes or df is None or df.empty:
+            return df
+        return compact_frame(df, drop_columns=self.COMPACT_DROP_COLUMNS)
     
     def _filter_future_data(self, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
         """
@@ -177,65 +336,194 @@ class PSEEnergyDataFetcher:
                 if after_count < before_count and after_count > 0:
                     removed = before_count - after_count
                     last_data_time = pd.to_datetime(df_filtered['Data'].iloc[-1])
-                    print(f"  ℹ️  Automatycznie odfiltrowano {removed} pomiarów z przyszłości")
-                    print(f"     (dane tylko do ostatniej aktualizacji PSE: {last_data_time.strftime('%Y-%m-%d %H:%M')})")
+                    logger.info(f"  ℹ️  Automatycznie odfiltrowano {removed} pomiarów z przyszłości")
+                    logger.info(f"     (dane tylko do ostatniej aktualizacji PSE: {last_data_time.strftime('%Y-%m-%d %H:%M')})")
                 
                 return df_filtered
         except Exception as e:
             # Jeśli filtrowanie się nie powiodło, zwróć oryginalne dane
-            print(f"  ⚠️  Nie udało się odfiltrować danych przyszłościowych: {e}")
+            logger.warning(f"  ⚠️  Nie udało się odfiltrować danych przyszłościowych: {e}")
             return df
     
-    def _fetch_single_day(self, date: str, max_retries: int = 3) -> Optional[pd.DataFrame]:
+    def _fetch_single_day(self, date: str, max_retries: int = 3,
+                          columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera dane dla pojedynczego dnia z mechanizmem retry.
         
         Args:
             date: Data w formacie YYYY-MM-DD
             max_retries: Maksymalna liczba prób (domyślnie 3)
+            columns: Potrzebne kolumny wynikowe (None - wszystkie)
             
         Returns:
             DataFrame z danymi lub None
         """
-        endpoint = f"{self.BASE_URL}/his-wlk-cal"
+        fields = self._select_fields(columns)
+        # Dzień pobrany bez części pól nie trafia do cache ani nie jest bazą pobierania przyrostowego
+        partial = set(fields) != set(self.SELECT_FIELDS)
+        
+        # Najpierw sprawdź lokalny cache (zamknięte dni nigdy się nie zmieniają)
+        if self.cache is not None:
+            cached = self.cache.get(date)
+            if cached is not None and cached.empty:
+                # Niedawno sprawdzony dzień bez danych (np. przyszły) - bez ponownego zapytania
+                metrics.count('cache_hits', source='pse')
+                return None
+            if cached is not None and set(columns or []) <= set(cached.columns):
+                metrics.count('cache_hits', source='pse')
+                return self._project(cached, columns)
+            metrics.count('cache_misses', source='pse')
+        
+        # Tryb przyrostowy: dla dni ulotnych pobierz tylko rekordy opublikowane
+        # po ostatniej synchronizacji (high-water mark publication_ts)
+        base_df = self._get_delta_base(date) if self.delta_fetch and not partial else None
+        high_water_mark = self._high_water_mark(base_df)
+        
+        endpoint = f"{self.base_url}/his-wlk-cal"
         odata_filter = f"business_date eq '{date}'"
+        if high_water_mark:
+            odata_filter += f" and publication_ts gt '{high_water_mark}'"
         
-        params = {'$filter': odata_filter}
+        params = {'$filter': odata_filter, '$select': ','.join(fields)}
         
-        for attempt in range(max_retries):
-            try:
-                response = self.session.get(endpoint, params=params, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data and 'value' in data and len(data['value']) > 0:
-                        # Sprawdź czy nie trafiliśmy na limit API
-                        if len(data['value']) >= 100:
-                            print(f"  ⚠️  Uwaga: Otrzymano {len(data['value'])} rekordów dla {date} - możliwy limit API")
-                        return self._parse_data(data)
-                    else:
-                        # API zwróciło sukces, ale brak danych - nie retry
-                        return None
-                elif response.status_code >= 500:
-                    # Błąd serwera - spróbuj ponownie
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(1 * (attempt + 1))  # Exponential backoff
-                        continue
-            except Exception as e:
-                # Błąd sieci - spróbuj ponownie
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(1 * (attempt + 1))
-                    continue
+        # Ponawianie (429, 5xx, błędy sieci) z wykładniczym opóźnieniem i Retry-After
+        # oraz limit zapytań na sekundę obsługuje wspólny transport HTTP
+        try:
+            response = self.session.get(endpoint, params=params, timeout=30, max_retries=max_retries)
+            if response.status_code != 200:
+                return None
+            
+            data = response.json()
+            if data and 'value' in data and len(data['value']) > 0:
+                # Sprawdź czy nie trafiliśmy na limit API
+                if len(data['value']) >= 100:
+                    logger.warning(f"  ⚠️  Uwaga: Otrzymano {len(data['value'])} rekordów dla {date} - możliwy limit API")
+                df = self._parse_data(data, columns if partial else None)
+                if high_water_mark:
+                    df = self._merge_delta(base_df, df)
+            elif high_water_mark:
+                # Brak nowych publikacji - dane z poprzedniej synchronizacji są aktualne
+                df = base_df
+            else:
+                # API zwróciło sukces, ale brak danych - zapamiętaj na krótko
+                if self.cache is not None:
+                    self.cache.put_empty(date)
+                return None
+        except Exception:
+            # Błąd sieci po wyczerpaniu prób lub nieprawidłowa odpowiedź
+            return None
         
-        return None
+        if partial:
+            return df
+        self._store_day(date, df)
+        return self._project(df, columns)
+    
+    def _get_delta_base(self, date: str) -> Optional[pd.DataFrame]:
+        """
+        Zwraca dane dnia z poprzedniej synchronizacji (baza dla pobierania przyrostowego).
+        
+        Dotyczy tylko dni ulotnych - zamknięte dni są pobierane w całości raz
+        i później czytane z cache.
+        """
+        if self.cache is not None:
+            if not self.cache.is_volatile(date):
+                return None
+            base_df = self.cache.get(date, allow_stale=True)
+            if base_df is not None:
+                return base_df
+        return self._volatile_days.get(date)
+    
+    @staticmethod
+    def _high_water_mark(df: Optional[pd.DataFrame]) -> Optional[str]:
+        """Zwraca najnowszy publication_ts z danych (lub None gdy brak)."""
+        if df is None or df.empty or 'publication_ts' not in df.columns:
+            return None
+        publication_ts = df['publication_ts'].dropna()
+        return str(publication_ts.max()) if not publication_ts.empty else None
     
-    def _fetch_date_range(self, date_from: str, date_to: str) -> Optional[pd.DataFrame]:
+    @classmethod
+    def _merge_delta(cls, base_df: pd.DataFrame, delta_df: pd.DataFrame) -> pd.DataFrame:
+        """Dokłada nowe/poprawione rekordy do danych z poprzedniej synchronizacji."""
+        if delta_df is None or delta_df.empty:
+            return base_df
+        merged = pd.concat([base_df, delta_df], ignore_index=True)
+        # Nowsza publikacja zastępuje starszą wersję tego samego kwadransa
+        key = cls._time_key(merged)
+        merged = merged.drop_duplicates(subset=[key], keep='last')
+        return merged.sort_values(key).reset_index(drop=True)
+    
+    @classmethod
+    def _time_key(cls, df: pd.DataFrame) -> str:
+        """Zwraca kolumnę jednoznacznie identyfikującą kwadrans (Data_UTC, a bez niej Data)."""
+        return cls.TIME_KEY if cls.TIME_KEY in df.columns else 'Data'
+    
+    @staticmethod
+    def local_to_utc(times: pd.Series, markers=None) -> pd.Series:
+        """
+        Zamienia czas lokalny (Europe/Warsaw, bez strefy) na UTC.
+        
+        Powtórzoną godzinę dnia zmiany czasu rozstrzyga marker PSE: 'first' (czas letni)
+        lub 'second' (czas zimowy). Bez markera pierwsze wystąpienie powtórzonego
+        czasu traktowane jest jako letni, kolejne jako zimowy.
+        
+        Args:
+            times: Czas lokalny
+            markers: Markery DST ('first', 'second' lub '') dla każdego wiersza
+                     (także kody int8 z układu kompaktowego)
+        """
+        first_pass = ~times.duplicated().to_numpy()
+        if markers is not None:
+            markers = dst_marker_names(markers)
+            first_pass = np.where(markers == 'first', True, np.where(markers == 'second', False, first_pass))
+        return times.dt.tz_localize('Europe/Warsaw', ambiguous=first_pass,
+                                    nonexistent='shift_forward').dt.tz_convert('UTC')
+
+    @staticmethod
+    def utc_to_local(times_utc: pd.Series) -> tuple:
+        """
+        Zamienia czas UTC na lokalny (Europe/Warsaw, bez strefy) z markerami DST.
+
+        Returns:
+            Krotka (czas lokalny, markery) - marker 'first' (czas letni) lub 'second'
+            (czas zimowy) tylko dla czasów z powtórzonej godziny dnia zmiany czasu
+        """
+        local = times_utc.dt.tz_convert('Europe/Warsaw')
+        naive = local.dt.tz_localize(None)
+        markers = np.full(len(naive), '', dtype=object)
+
+        # Powtórzona godzina w strefie Europe/Warsaw to 02:00-03:00 październikowej
+        # zmiany czasu - tylko te wiersze sprawdzane są lokalizacją w obu strefach
+        index = pd.DatetimeIndex(naive)
+        candidates = (index.month == 10) & (index.hour == 2)
+        if candidates.any():
+            times, offsets = naive[candidates], local[candidates]
+            # Czas lokalny jest niejednoznaczny, gdy odpowiada mu chwila w obu strefach
+            summer = times.dt.tz_localize('Europe/Warsaw', ambiguous=np.ones(len(times), dtype=bool),
+                                          nonexistent='NaT')
+            winter = times.dt.tz_localize('Europe/Warsaw', ambiguous=np.zeros(len(times), dtype=bool),
+                                          nonexistent='NaT')
+            repeated = (summer != winter).to_numpy()
+            first_pass = (summer == offsets).to_numpy()
+            markers[candidates] = np.where(repeated, np.where(first_pass, 'first', 'second'), '')
+        return naive, pd.Series(markers, index=times_utc.index, dtype=object)
+
+    def _store_day(self, date: str, df: pd.DataFrame):
+        """Zapisuje pobrany dzień w cache i (dla dni ulotnych) w pamięci."""
+        if self.cache is not None:
+            self.cache.put(date, df)
+            return
+        # Bez cache dyskowego zapamiętaj tylko dni, które mogą się jeszcze zmienić
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        if day >= datetime.now().date() - timedelta(days=1):
+            self._volatile_days[date] = df
+    
+    def _fetch_date_range(self, date_from: str, date_to: str,
+                          columns: Optional[list] = None) -> Optional[pd.DataFrame]:
         """Pobiera dane dla zakresu dat (krótkiego okresu - max 1 dzień)."""
-        endpoint = f"{self.BASE_URL}/his-wlk-cal"
+        endpoint = f"{self.base_url}/his-wlk-cal"
         odata_filter = f"business_date ge '{date_from}' and business_date le '{date_to}'"
         
-        params = {'$filter': odata_filter}
+        params = {'$filter': odata_filter, '$select': ','.join(self._select_fields(columns))}
         
         try:
             response = self.session.get(endpoint, params=params, timeout=30)
@@ -245,22 +533,30 @@ class PSEEnergyDataFetcher:
                 if data and 'value' in data and len(data['value']) > 0:
                     # Sprawdź czy nie trafiliśmy na limit API
                     if len(data['value']) >= 100:
-                        print(f"  ⚠️  OSTRZEŻENIE: Otrzymano dokładnie {len(data['value'])} rekordów!")
-                        print(f"     Prawdopodobnie trafiono na limit API PSE (~100 rekordów)")
-                        print(f"     Dane mogą być niepełne! Użyj pobierania dzień po dniu.")
-                    return self._parse_data(data)
+                        logger.warning(f"  ⚠️  OSTRZEŻENIE: Otrzymano dokładnie {len(data['value'])} rekordów!")
+                        logger.warning(f"     Prawdopodobnie trafiono na limit API PSE (~100 rekordów)")
+                        logger.warning(f"     Dane mogą być niepełne! Użyj pobierania dzień po dniu.")
+                    return self._parse_data(data, columns)
                 else:
-                    print(f"⚠️  Brak danych dla okresu {date_from} - {date_to}")
+                    logger.warning(f"⚠️  Brak danych dla okresu {date_from} - {date_to}")
                     return None
             else:
-                print(f"⚠️  Błąd API: {response.status_code}")
+                logger.warning(f"⚠️  Błąd API: {response.status_code}")
                 return None
         except Exception as e:
-            print(f"❌ Błąd: {e}")
+            logger.error(f"❌ Błąd: {e}")
             return None
     
-    def _parse_data(self, data: dict) -> pd.DataFrame:
-        """Parsuje dane JSON z API do DataFrame."""
+    @metrics.timed('parse', source='pse')
+    def _parse_data(self, data: dict, columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Parsuje dane JSON z API do DataFrame.
+        
+        Args:
+            data: Odpowiedź /his-wlk-cal
+            columns: Zwracane kolumny wynikowe (None - wszystkie pola odpowiedzi);
+                     pola pomocnicze, np. składowe salda wymiany, są usuwane
+        """
         if isinstance(data, dict) and 'value' in data:
             df = pd.DataFrame(data['value'])
             
@@ -289,40 +585,65 @@ class PSEEnergyDataFetcher:
                 # dla godzin w czasie powtórzonym (zmiana czasu zimowego)
                 # Zachowujemy informację czy to "a" czy "b" w osobnej kolumnie
                 df['_dst_marker'] = ''
-                if df['Data'].dtype == 'object':
-                    # Wykryj czy to "a" czy "b" PRZED zamianą
-                    df.loc[df['Data'].str.contains(r'\d{2}a:', regex=True, na=False), '_dst_marker'] = 'first'
-                    df.loc[df['Data'].str.contains(r'\d{2}b:', regex=True, na=False), '_dst_marker'] = 'second'
+                parsed = None
+                if pd.api.types.is_string_dtype(df['Data']):
+                    # Parsowanie w stałym formacie (bez wnioskowania formatu dla każdego wiersza);
+                    # nie pasują tylko wiersze z markerem a/b powtórzonej godziny ("02a:15:00") -
+                    # marker i timestamp bez markera ("02:15:00") wyznaczane są tylko dla nich
+                    parsed = pd.to_datetime(df['Data'], format=self.DTIME_FORMAT, errors='coerce')
+                    marked = parsed.isna().to_numpy()
+                    if marked.any():
+                        parts = df.loc[marked, 'Data'].str.extract(self.DTIME_PATTERN)
+                        if parts.notna().all().all():
+                            parsed[marked] = pd.to_datetime(parts[0] + parts[2], format=self.DTIME_FORMAT,
+                                                            errors='coerce').to_numpy()
+                            df.loc[marked, '_dst_marker'] = parts[1].map(self.DST_MARKERS).to_numpy()
+                    if parsed.notna().all():
+                        df['Data'] = parsed
+                    else:
+                        df['_dst_marker'] = ''
+                        parsed = None
                     
-                    # Zastąp "02a:" i "02b:" przez "02:" - oba będą miały ten sam timestamp
-                    df['Data'] = df['Data'].str.replace(r'(\d{2})a:', r'\1:', regex=True)
-                    df['Data'] = df['Data'].str.replace(r'(\d{2})b:', r'\1:', regex=True)
+                    if parsed is None:
+                        # Nietypowy format dtime - wykryj marker i usuń go z tekstu
+                        marker = df['Data'].str.extract(r'\d{2}([ab]):', expand=False)
+                        df['_dst_marker'] = marker.map(self.DST_MARKERS).fillna('')
+                        df['Data'] = df['Data'].str.replace(r'(\d{2})[ab]:', r'\1:', regex=True)
                 
-                try:
-                    df['Data'] = pd.to_datetime(df['Data'], format='mixed')
-                except Exception as e:
-                    print(f"⚠️  Błąd parsowania dat: {e}")
-                    # Spróbuj bez strict format
+                if parsed is None:
                     try:
-                        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
-                        # Usuń wiersze gdzie data się nie sparsowała
-                        df = df.dropna(subset=['Data'])
-                    except Exception as e2:
-                        print(f"❌ Nie udało się sparsować dat: {e2}")
-                        return pd.DataFrame()
+                        df['Data'] = pd.to_datetime(df['Data'], format='mixed')
+                    except Exception as e:
+                        logger.warning(f"⚠️  Błąd parsowania dat: {e}")
+                        # Spróbuj bez strict format
+                        try:
+                            df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+                            # Usuń wiersze gdzie data się nie sparsowała
+                            df = df.dropna(subset=['Data'])
+                        except Exception as e2:
+                            logger.error(f"❌ Nie udało się sparsować dat: {e2}")
+                            return pd.DataFrame()
+                
+                # Kanoniczny czas UTC liczony z KOŃCA przedziału - marker a/b rozstrzyga
+                # powtórzoną godzinę, a przesunięcie o 15 minut odbywa się już w UTC
+                data_utc = self.local_to_utc(df['Data'], df['_dst_marker']) - pd.Timedelta(minutes=15)
                 
                 # PSE timestamp reprezentuje KONIEC przedziału (np. 00:15 = przedział 00:00-00:15)
-                # Przesuwamy o -15 minut aby timestamp reprezentował POCZĄTEK przedziału
-                # To umożliwia poprawne łączenie z danymi ENTSO-E
-                df['Data'] = df['Data'] - pd.Timedelta(minutes=15)
+                # Data to POCZĄTEK przedziału w czasie lokalnym, wyznaczony z czasu UTC jednym
+                # tz_convert - przedział kończący się o 02b:00 zaczyna się o 02:45 czasu letniego,
+                # nie 01:45. Marker a/b opisuje odtąd powtórzoną godzinę początku przedziału
+                df['Data'], df['_dst_marker'] = self.utc_to_local(data_utc)
+                df.insert(df.columns.get_loc('Data') + 1, self.TIME_KEY, data_utc)
             
-            # Usuń duplikaty (mogą powstać przy łączeniu danych)
+            # Usuń duplikaty (mogą powstać przy łączeniu danych) - po czasie UTC, więc
+            # oba przejścia powtórzonej godziny w dniu zmiany czasu zostają zachowane
             if 'Data' in df.columns:
-                duplicates = df['Data'].duplicated().sum()
+                key = self._time_key(df)
+                duplicates = df[key].duplicated().sum()
                 if duplicates > 0:
-                    df = df.drop_duplicates(subset=['Data'], keep='first')
+                    df = df.drop_duplicates(subset=[key], keep='first')
             
-            return df
+            return self._project(df, columns)
         
         return pd.DataFrame()
     
@@ -331,8 +652,8 @@ class PSEEnergyDataFetcher:
         Generuje przykładowe dane dla testów (gdy API nie zwraca danych).
         UWAGA: To są dane syntetyczne, nie rzeczywiste dane PSE!
         """
-        print("⚠️  UWAGA: Generuję przykładowe dane do testów (brak danych z API)")
-        print("   Dane są syntetyczne i służą wyłącznie do demonstracji")
+        logger.warning("⚠️  UWAGA: Generuję przykładowe dane do testów (brak danych z API)")
+        logger.warning("   Dane są syntetyczne i służą wyłącznie do demonstracji")
         
         date_range = pd.date_range(start=date_from, end=date_to, freq='15min')
         
@@ -377,12 +698,294 @@ class PSEEnergyDataFetcher:
         return df
 
 
+def _float64_columns(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Zwraca kolumny do agregacji w float64.
+    
+    Ramki w układzie kompaktowym (float32) są rzutowane tylko na czas agregacji -
+    sumy wieloletnie liczone i zwracane w float32 traciłyby dokładność.
+    """
+    values = df[columns]
+    if any(dtype == np.float32 for dtype in values.dtypes):
+        values = values.astype(np.float64)
+    return values
+
+
+def compute_period_stats(df: pd.DataFrame, columns: list, date_from: Optional[str] = None,
+                         date_to: Optional[str] = None) -> Optional[dict]:
+    """
+    Liczy sumy i średnie kolumn dla okresu przez filtrowanie ramki (bez indeksu).
+    
+    Args:
+        df: DataFrame z indeksem czasowym
+        columns: Kolumny do zsumowania
+        date_from: Data początkowa (opcjonalna)
+        date_to: Data końcowa (opcjonalna)
+        
+    Returns:
+        Słownik z kluczami 'okres_od', 'okres_do', 'liczba_pomiarów' oraz
+        'stats' ({kolumna: (suma MW, średnia MW)}) lub None gdy brak danych
+    """
+    df_filtered = df
+    
+    if date_from:
+        df_filtered = df_filtered[df_filtered.index >= date_from]
+    if date_to:
+        df_filtered = df_filtered[df_filtered.index <= date_to]
+    
+    if df_filtered.empty:
+        return None
+    
+    values = _float64_columns(df_filtered, list(dict.fromkeys(columns)))
+    return {
+        'okres_od': df_filtered.index.min(),
+        'okres_do': df_filtered.index.max(),
+        'liczba_pomiarów': len(df_filtered),
+        'stats': {col: (values[col].sum(), values[col].mean()) for col in columns},
+    }
+
+
+def resample_energy(df: pd.DataFrame, columns: list, freq: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Agreguje kolumny do zadanej częstotliwości: sumy MW i średnia moc.
+    
+    Jedno grupowanie (wspólny resampler) i natywne redukcje sum/count - średnia
+    liczona jako suma / liczba wartości, bez drugiego przebiegu i bez funkcji
+    Pythona wywoływanej dla każdego przedziału.
+    
+    Args:
+        df: DataFrame z indeksem czasowym
+        columns: Kolumny do agregacji
+        freq: Częstotliwość agregacji ('1h', '1D', '1W', '1ME')
+        
+    Returns:
+        Krotka (sumy MW, średnie MW) - dla danych co 15 min suma * 0.25 = MWh
+    """
+    resampler = _float64_columns(df, columns).resample(freq)
+    sums = resampler.sum()
+    means = sums / resampler.count()
+    return sums, means
+
+
+class PeriodSumIndex:
+    """
+    Indeks sum prefiksowych do szybkich zapytań o sumy w dowolnym okresie.
+    
+    Budowany raz dla ramki danych: dla każdej kolumny przechowuje sumę skumulowaną
+    wartości (NaN liczone jako 0) oraz skumulowaną liczbę wartości nie-NaN.
+    Suma i średnia dla [date_from, date_to] to wtedy dwa wyszukiwania binarne
+    i różnica dwóch wierszy - niezależnie od długości okresu.
+    """
+    
+    def __init__(self, df: pd.DataFrame, columns: list):
+        """
+        Args:
+            df: DataFrame z indeksem czasowym
+            columns: Kolumny objęte indeksem
+        """
+        self.columns = list(columns)
+        
+        index = pd.DatetimeIndex(df.index)
+        order = None if index.is_monotonic_increasing else np.argsort(index.asi8, kind='stable')
+        self.times = index if order is None else index[order]
+        
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        if order is not None:
+            values = values[order]
+        valid = ~np.isnan(values)
+        
+        # Wiersz zerowy na początku: suma dla [start, stop) = cum[stop] - cum[start]
+        zeros = np.zeros((1, len(self.columns)))
+        self._cum_sum = np.vstack([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+        self._cum_count = np.vstack([zeros.astype(np.int64), np.cumsum(valid, axis=0, dtype=np.int64)])
+    
+    def query(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Optional[dict]:
+        """
+        Zwraca sumy i średnie dla okresu (ten sam format co compute_period_stats).
+        
+        Args:
+            date_from: Data początkowa (opcjonalna, włącznie)
+            date_to: Data końcowa (opcjonalna, włącznie)
+        """
+        start = self.times.searchsorted(date_from, side='left') if date_from else 0
+        stop = self.times.searchsorted(date_to, side='right') if date_to else len(self.times)
+        
+        if stop <= start:
+            return None
+        
+        sums = self._cum_sum[stop] - self._cum_sum[start]
+        counts = self._cum_count[stop] - self._cum_count[start]
+        
+        stats = {}
+        for i, col in enumerate(self.columns):
+            mean = sums[i] / counts[i] if counts[i] > 0 else np.nan
+            stats[col] = (sums[i], mean)
+        
+        return {
+            'okres_od': self.times[start],
+            'okres_do': self.times[stop - 1],
+            'liczba_pomiarów': int(stop - start),
+            'stats': stats,
+        }
+
+
+class RollupCube:
+    """
+    Zmaterializowane agregaty danych na kilku poziomach czasowych.
+    
+    Dla każdej kolumny przechowuje sumę, liczbę wartości, minimum i maksimum
+    na poziomie godzinowym, dziennym i miesięcznym. Tylko poziom godzinowy jest
+    liczony z surowych danych 15-minutowych - poziom dzienny powstaje z godzinowego,
+    a miesięczny (i tygodniowy, na żądanie) z dziennego. Średnia to suma / liczba.
+    """
+    
+    STATS = ('sum', 'count', 'min', 'max')
+    
+    # Częstotliwość -> (poziom, poziom źródłowy) - None oznacza dane surowe
+    LEVELS = {
+        'hourly': ('h', None),
+        'daily': ('D', 'hourly'),
+        'weekly': ('W', 'daily'),
+        'monthly': ('ME', 'daily'),
+    }
+    
+    def __init__(self, df: pd.DataFrame, columns: list):
+        """
+        Args:
+            df: DataFrame z indeksem czasowym (dane co 15 min)
+            columns: Kolumny objęte agregacją
+        """
+        self.df = df
+        self.columns = list(dict.fromkeys(columns))
+        self._levels = {}
+        
+        for level in ('hourly', 'daily', 'monthly'):
+            self.level(level)
+    
+    def level(self, name: str) -> dict:
+        """
+        Zwraca agregaty poziomu jako słownik {statystyka: DataFrame}
+        oraz '_rows' (liczba rekordów w przedziale).
+        
+        Args:
+            name: 'hourly', 'daily', 'weekly' lub 'monthly'
+        """
+        if name not in self._levels:
+            freq, source = self.LEVELS[name]
+            
+            if source is None:
+                resampler = _float64_columns(self.df, self.columns).resample(freq)
+                stats = {stat: getattr(resampler, stat)() for stat in self.STATS}
+                stats['_rows'] = self.df.index.to_series().resample(freq).count()
+            else:
+                finer = self.level(source)
+                # Suma sum i liczników, minimum minimów, maksimum maksimów
+                stats = {stat: finer[stat].resample(freq).agg('sum' if stat == 'count' else stat)
+                         for stat in self.STATS}
+                stats['_rows'] = finer['_rows'].resample(freq).sum()
+            
+            self._levels[name] = stats
+        
+        return self._levels[name]
+    
+    @classmethod
+    def level_for(cls, freq: str) -> Optional[str]:
+        """Zwraca nazwę poziomu dla częstotliwości pandas (lub None gdy brak takiego poziomu)."""
+        try:
+            offset = to_offset(freq)
+        except ValueError:
+            return None
+        for name, (level_freq, _) in cls.LEVELS.items():
+            if offset == to_offset(level_freq):
+                return name
+        return None
+    
+    def resample(self, columns: list, freq: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Sumy MW i średnie kolumn dla częstotliwości (ten sam wynik co resample_energy).
+        
+        Częstotliwości spoza kostki (np. '15min', '2D') liczone są z surowych danych.
+        """
+        name = self.level_for(freq)
+        if name is None or not set(columns) <= set(self.columns):
+            return resample_energy(self.df, columns, freq)
+        
+        stats = self.level(name)
+        sums = stats['sum'][columns]
+        return sums, sums / stats['count'][columns]
+    
+    def stats(self, columns: list, freq: str) -> dict:
+        """
+        Suma, średnia, minimum, maksimum i liczba wartości kolumn dla częstotliwości.
+        
+        Returns:
+            Słownik {'sum' | 'mean' | 'min' | 'max' | 'count': DataFrame};
+            częstotliwości spoza kostki liczone są z surowych danych
+        """
+        name = self.level_for(freq)
+        if name is None or not set(columns) <= set(self.columns):
+            resampler = _float64_columns(self.df, columns).resample(freq)
+            result = {stat: getattr(resampler, stat)() for stat in self.STATS}
+        else:
+            level = self.level(name)
+            result = {stat: level[stat][columns] for stat in self.STATS}
+        result['mean'] = result['sum'] / result['count']
+        return result
+    
+    def monthly_sums(self, columns: list, year_from: int, year_to: int) -> pd.DataFrame:
+        """
+        Miesięczne sumy MW kolumn dla lat [year_from, year_to].
+        
+        Zakres miesięcy jak przy resample danych przefiltrowanych do tych lat:
+        od pierwszego do ostatniego miesiąca zawierającego rekordy.
+        """
+        stats = self.level('monthly')
+        in_years = (stats['_rows'].index.year >= year_from) & (stats['_rows'].index.year <= year_to)
+        rows = stats['_rows'][in_years & (stats['_rows'] > 0)]
+        
+        if rows.empty:
+            return stats['sum'][columns].iloc[0:0]
+        return stats['sum'].loc[rows.index[0]:rows.index[-1], columns]
+
+
 class EnergyDataAnalyzer:
     """Klasa do analizy danych o produkcji energii."""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, build_index: bool = False):
+        """
+        Args:
+            df: DataFrame z danymi
+            build_index: Zbuduj od razu indeks sum prefiksowych (szybkie sum_period
+                         przy wielu zapytaniach o różne okresy)
+        """
         self.df = df.copy()
+        self._sum_index = None
+        self._rollup = None
         self._prepare_data()
+        if build_index:
+            self.build_sum_index()
+    
+    @classmethod
+    def from_store(cls, store, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   columns: Optional[list] = None, build_index: bool = False) -> Optional['EnergyDataAnalyzer']:
+        """
+        Tworzy analizator z danych lokalnego magazynu (EnergyDataStore) - wczytuje
+        tylko partycje miesięczne obejmujące okres.
+        
+        Args:
+            store: Magazyn danych (EnergyDataStore)
+            date_from: Data początkowa (opcjonalna)
+            date_to: Data końcowa (opcjonalna, cały dzień włącznie)
+            columns: Wczytaj tylko wybrane kolumny (opcjonalne)
+            build_index: Zbuduj od razu indeks sum prefiksowych
+            
+        Returns:
+            Analizator lub None gdy magazyn nie zawiera danych okresu
+        """
+        df = store.read(date_from, date_to, columns=columns)
+        if df is None:
+            return None
+        return cls(df, build_index=build_index)
     
     def _prepare_data(self):
         """Przygotowuje dane do analizy."""
@@ -392,7 +995,7 @@ class EnergyDataAnalyzer:
         if date_columns:
             self.df['Data'] = pd.to_datetime(self.df[date_columns[0]])
         elif 'Data' not in self.df.columns:
-            print("⚠️  Nie znaleziono kolumny z datą")
+            logger.warning("⚠️  Nie znaleziono kolumny z datą")
             return
         
         self.df.set_index('Data', inplace=True)
@@ -406,9 +1009,9 @@ class EnergyDataAnalyzer:
         self.swm_total_col = self._find_column(['krajowe saldo wymiany międzysystemowej [mw]'])
         
         if not self.wind_col:
-            print("⚠️  Nie znaleziono kolumny z danymi o energii wiatrowej")
+            logger.warning("⚠️  Nie znaleziono kolumny z danymi o energii wiatrowej")
         if not self.solar_col:
-            print("⚠️  Nie znaleziono kolumny z danymi o energii fotowoltaicznej")
+            logger.warning("⚠️  Nie znaleziono kolumny z danymi o energii fotowoltaicznej")
     
     def _find_column(self, keywords: list) -> Optional[str]:
         """Znajduje kolumnę zawierającą którekolwiek ze słów kluczowych."""
@@ -429,15 +1032,13 @@ class EnergyDataAnalyzer:
         Returns:
             Słownik z sumami dla wiatru i PV w MWh
         """
-        df_filtered = self.df
-        
-        if date_from:
-            df_filtered = df_filtered[df_filtered.index >= date_from]
-        if date_to:
-            df_filtered = df_filtered[df_filtered.index <= date_to]
+        if self._sum_index is not None:
+            period = self._sum_index.query(date_from, date_to)
+        else:
+            period = compute_period_stats(self.df, self._value_columns(), date_from, date_to)
         
         # Sprawdź czy są dane
-        if df_filtered.empty:
+        if period is None:
             return {
                 'błąd': 'Brak danych dla podanego okresu',
                 'wiatr_MWh': 0,
@@ -448,49 +1049,43 @@ class EnergyDataAnalyzer:
         
         # Dane co 15 minut, więc mnożymy przez 0.25h aby uzyskać MWh
         results = {
-            'okres_od': df_filtered.index.min().strftime('%Y-%m-%d %H:%M'),
-            'okres_do': df_filtered.index.max().strftime('%Y-%m-%d %H:%M'),
-            'liczba_pomiarów': len(df_filtered),
+            'okres_od': period['okres_od'].strftime('%Y-%m-%d %H:%M'),
+            'okres_do': period['okres_do'].strftime('%Y-%m-%d %H:%M'),
+            'liczba_pomiarów': period['liczba_pomiarów'],
         }
         
-        if self.wind_col:
-            wind_sum_mw = df_filtered[self.wind_col].sum()
-            wind_mwh = wind_sum_mw * 0.25  # Suma MW * 0.25h = MWh (dane co 15 min)
-            wind_mean_mw = df_filtered[self.wind_col].mean()
-            
-            results['wiatr_suma_MW'] = round(wind_sum_mw, 2)
-            results['wiatr_MWh'] = round(wind_mwh, 2)
-            results['wiatr_średnia_MW'] = round(wind_mean_mw, 2)
-        
-        if self.solar_col:
-            solar_sum_mw = df_filtered[self.solar_col].sum()
-            solar_mwh = solar_sum_mw * 0.25
-            solar_mean_mw = df_filtered[self.solar_col].mean()
-            
-            results['fotowoltaika_suma_MW'] = round(solar_sum_mw, 2)
-            results['fotowoltaika_MWh'] = round(solar_mwh, 2)
-            results['fotowoltaika_średnia_MW'] = round(solar_mean_mw, 2)
-        
-        if self.demand_col:
-            demand_sum_mw = df_filtered[self.demand_col].sum()
-            demand_mwh = demand_sum_mw * 0.25
-            demand_mean_mw = df_filtered[self.demand_col].mean()
-            
-            results['zapotrzebowanie_suma_MW'] = round(demand_sum_mw, 2)
-            results['zapotrzebowanie_MWh'] = round(demand_mwh, 2)
-            results['zapotrzebowanie_średnia_MW'] = round(demand_mean_mw, 2)
-        
-        if self.swm_total_col:
-            swm_sum_mw = df_filtered[self.swm_total_col].sum()
-            swm_mwh = swm_sum_mw * 0.25
-            swm_mean_mw = df_filtered[self.swm_total_col].mean()
-            
-            results['saldo_wymiany_suma_MW'] = round(swm_sum_mw, 2)
-            results['saldo_wymiany_MWh'] = round(swm_mwh, 2)
-            results['saldo_wymiany_średnia_MW'] = round(swm_mean_mw, 2)
+        for prefix, col in [('wiatr', self.wind_col), ('fotowoltaika', self.solar_col),
+                            ('zapotrzebowanie', self.demand_col), ('saldo_wymiany', self.swm_total_col)]:
+            if col:
+                sum_mw, mean_mw = period['stats'][col]
+                
+                results[f'{prefix}_suma_MW'] = round(sum_mw, 2)
+                results[f'{prefix}_MWh'] = round(sum_mw * 0.25, 2)  # Suma MW * 0.25h = MWh (dane co 15 min)
+                results[f'{prefix}_średnia_MW'] = round(mean_mw, 2)
         
         return results
     
+    def _value_columns(self) -> list:
+        """Zwraca dostępne kolumny z wartościami (wiatr, PV, zapotrzebowanie, saldo)."""
+        return [col for col in [self.wind_col, self.solar_col, self.demand_col, self.swm_total_col] if col]
+    
+    def build_sum_index(self) -> PeriodSumIndex:
+        """
+        Buduje indeks sum prefiksowych - kolejne wywołania sum_period dla dowolnych
+        okresów działają wtedy w czasie stałym (dwa wyszukiwania binarne).
+        """
+        self._sum_index = PeriodSumIndex(self.df, self._value_columns())
+        return self._sum_index
+    
+    def build_rollup(self) -> RollupCube:
+        """
+        Buduje kostkę agregatów (godzinowe, dzienne, miesięczne) - budowana raz,
+        przy pierwszym wywołaniu get_time_series lub monthly_sums.
+        """
+        if self._rollup is None:
+            self._rollup = RollupCube(self.df, self._value_columns())
+        return self._rollup
+    
     def monthly_sums(self, year_from: int = 2020, year_to: Optional[int] = None) -> pd.DataFrame:
         """
         Generuje miesięczne sumy produkcji.
@@ -505,18 +1100,11 @@ class EnergyDataAnalyzer:
         if year_to is None:
             year_to = datetime.now().year
         
-        df_filtered = self.df[
-            (self.df.index.year >= year_from) & 
-            (self.df.index.year <= year_to)
-        ]
-        
         # Zbierz wszystkie dostępne kolumny do agregacji
         cols_to_agg = [col for col in [self.wind_col, self.solar_col, self.demand_col, self.swm_total_col] if col]
         
-        # Sumy MW (bez przeliczania na MWh)
-        monthly = df_filtered.resample('ME').agg({
-            col: 'sum' for col in cols_to_agg
-        })
+        # Sumy MW (bez przeliczania na MWh) - z poziomu miesięcznego kostki agregatów
+        monthly = self.build_rollup().monthly_sums(cols_to_agg, year_from, year_to)
         
         monthly.index = monthly.index.to_period('M')
         monthly.columns = [f'{col}_suma_MW' for col in monthly.columns]
@@ -535,19 +1123,12 @@ class EnergyDataAnalyzer:
         """
         cols_to_agg = [col for col in [self.wind_col, self.solar_col, self.demand_col, self.swm_total_col] if col]
         
-        if resample_freq in ['1h', 'h', '1D', 'D']:
-            # Dla godzin i dni - suma z przeliczeniem na MWh
-            ts = self.df[cols_to_agg].resample(resample_freq).agg(
-                lambda x: x.sum() * 0.25
-            )
-        else:
-            # Dla dłuższych okresów
-            ts = self.df[cols_to_agg].resample(resample_freq).agg(
-                lambda x: x.sum() * 0.25
-            )
+        sums, ts_mean = self.build_rollup().resample(cols_to_agg, resample_freq)
+        
+        # Suma z przeliczeniem na MWh (dane co 15 min)
+        ts = sums * 0.25
         
         # Dodaj również średnią moc
-        ts_mean = self.df[cols_to_agg].resample(resample_freq).mean()
         ts_mean.columns = [f'{col}_średnia' for col in ts_mean.columns]
         
         result = pd.concat([ts, ts_mean], axis=1)
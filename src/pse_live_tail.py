@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tryb "tail" - monitorowanie bieżącej doby PSE w czasie zbliżonym do rzeczywistego.
+
+Fetcher jest utrzymywany przez cały czas działania, a każde odpytanie API pobiera
+tylko rekordy bieżącej doby biznesowej opublikowane po ostatnim odpytaniu
+(publication_ts > high-water mark). Parsowane są wyłącznie nowe rekordy,
+a nowe kwadranse są dopisywane do ramki w pamięci i przekazywane do callbacku
+lub wypisywane na stdout jako linie JSON. Kwadranse poprawione w nowszej
+publikacji (inny publication_ts) są emitowane ponownie.
+"""
+
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .pse_energy_scraper import PSEEnergyDataFetcher
+    from .log_output import get_logger
+except ImportError:
+    from pse_energy_scraper import PSEEnergyDataFetcher
+    from log_output import get_logger
+
+
+logger = get_logger('tail')
+
+
+class PSELiveTail:
+    """
+    Śledzenie bieżącej doby PSE z pobieraniem przyrostowym.
+
+    Stan między odpytaniami:
+    - received: wszystkie rekordy doby otrzymane z API (także jeszcze nie zmierzone)
+    - frame: wyemitowane kwadranse (rzeczywiste pomiary) w najnowszej wersji
+    - emitted: wersja (publication_ts) każdego wyemitowanego kwadransa (klucz Data_UTC)
+    - high-water mark publication_ts - kolejne zapytanie pobiera tylko nowsze publikacje
+
+    Kwadrans jest emitowany, gdy jego początek jest co najmniej 15 minut
+    w przeszłości (ta sama reguła co w PSEEnergyDataFetcher._filter_future_data),
+    a ponownie - gdy nadejdzie jego poprawiona wersja. Kwadranse opublikowane
+    z opóźnieniem (wcześniejsze niż ostatnio wyemitowane) także są emitowane.
+    """
+
+    def __init__(self, fetcher: Optional[PSEEnergyDataFetcher] = None,
+                 callback: Optional[Callable[[pd.DataFrame], None]] = None,
+                 output=None):
+        """
+        Args:
+            fetcher: Fetcher PSE (sesja HTTP jest używana przez cały czas działania)
+            callback: Funkcja wywoływana z DataFrame nowych kwadransów
+                      (domyślnie: linie JSON na stdout)
+            output: Strumień dla linii JSON (domyślnie sys.stdout)
+        """
+        self.fetcher = fetcher or PSEEnergyDataFetcher(use_cache=False)
+        self.callback = callback or self._emit_json_lines
+        self.output = output
+        self._reset(datetime.now().strftime('%Y-%m-%d'))
+
+    def _reset(self, business_date: str):
+        """Rozpoczyna śledzenie nowej doby biznesowej."""
+        self.business_date = business_date
+        self.received = pd.DataFrame()
+        self.frame = pd.DataFrame()
+        self._high_water_mark = None
+        self.emitted = {}
+
+    def _fetch_delta(self, date: str) -> Optional[pd.DataFrame]:
+        """
+        Pobiera rekordy doby opublikowane po high-water mark.
+
+        Returns:
+            DataFrame nowych rekordów (może być pusty) lub None przy błędzie
+        """
+        odata_filter = f"business_date eq '{date}'"
+        if self._high_water_mark:
+            odata_filter += f" and publication_ts gt '{self._high_water_mark}'"
+        params = {'$filter': odata_filter, '$select': ','.join(self.fetcher.SELECT_FIELDS)}
+
+        try:
+            response = self.fetcher.session.get(f"{self.fetcher.base_url}/his-wlk-cal",
+                                                params=params, timeout=30)
+        except Exception as e:
+            logger.warning(f"⚠️  Błąd połączenia z API PSE: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"⚠️  API PSE zwróciło status {response.status_code}")
+            return None
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            # Ucięta odpowiedź lub strona błędu HTML - pomiń to odpytanie
+            logger.warning(f"⚠️  Niepoprawna odpowiedź API PSE (pominięto odpytanie): {e}")
+            return None
+        if not data or not data.get('value'):
+            return pd.DataFrame()
+        return self.fetcher._parse_data(data)
+
+    def poll(self) -> pd.DataFrame:
+        """
+        Jedno odpytanie API - dopisuje i emituje nowe kwadranse.
+
+        Po północy najpierw domykana jest poprzednia doba (ostatnie kwadranse
+        publikowane są już po zmianie daty), potem śledzenie przechodzi na nową.
+
+        Returns:
+            DataFrame nowych kwadransów (pusty gdy brak nowych)
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        emitted = []
+
+        if today != self.business_date:
+            emitted.append(self._poll_day(self.business_date, closing=True))
+            self._reset(today)
+
+        emitted.append(self._poll_day(self.business_date))
+        emitted = [df for df in emitted if not df.empty]
+        return pd.concat(emitted, ignore_index=True) if emitted else pd.DataFrame()
+
+    def _poll_day(self, date: str, closing: bool = False) -> pd.DataFrame:
+        """Pobiera przyrost doby i emituje kwadranse, które stały się pomiarami."""
+        delta = self._fetch_delta(date)
+        if delta is not None and not delta.empty:
+            self.received = delta if self.received.empty else self.fetcher._merge_delta(self.received, delta)
+            self._high_water_mark = self.fetcher._high_water_mark(self.received)
+
+        if self.received.empty:
+            return pd.DataFrame()
+
+        # Domykana doba jest w całości w przeszłości - wszystkie kwadranse są pomiarami.
+        # Porównania w UTC - lokalna kolumna Data powtarza godzinę w dniu zmiany czasu
+        time_key = self.fetcher.TIME_KEY
+        times = self.received[time_key]
+        ready = np.ones(len(times), dtype=bool) if closing else \
+            (times <= pd.Timestamp.now(tz='UTC') - timedelta(minutes=15)).to_numpy()
+
+        # Wersja kwadransa - nowy kwadrans lub nowsza publikacja już wyemitowanego
+        versions = self._versions(self.received)
+        changed = np.array([slot not in self.emitted or self.emitted[slot] != version
+                            for slot, version in zip(times, versions)], dtype=bool)
+
+        new_rows = self.received[ready & changed]
+        if new_rows.empty:
+            return new_rows
+
+        self.emitted.update(zip(new_rows[time_key], self._versions(new_rows)))
+        self.frame = new_rows.reset_index(drop=True) if self.frame.empty else \
+            pd.concat([self.frame, new_rows], ignore_index=True) \
+            .drop_duplicates(subset=[time_key], keep='last') \
+            .sort_values(time_key).reset_index(drop=True)
+        self.callback(new_rows)
+        return new_rows
+
+    @staticmethod
+    def _versions(df: pd.DataFrame) -> list:
+        """Wersje kwadransów (publication_ts jako tekst, None gdy brak kolumny)."""
+        if 'publication_ts' not in df.columns:
+            return [None] * len(df)
+        return [None if pd.isna(value) else str(value) for value in df['publication_ts']]
+
+    def _emit_json_lines(self, df: pd.DataFrame):
+        """Wypisuje kwadranse jako linie JSON (jeden rekord na linię)."""
+        output = self.output or sys.stdout
+        columns = [col for col in df.columns if not col.startswith('_')]
+        for record in df[columns].to_dict('records'):
+            line = {
+                key: (value.isoformat() if isinstance(value, pd.Timestamp)
+                      else None if isinstance(value, float) and np.isnan(value) else value)
+                for key, value in record.items()
+            }
+            output.write(json.dumps(line, ensure_ascii=False) + '\n')
+        output.flush()
+
+    def run(self, interval: float = 60, max_polls: Optional[int] = None):
+        """
+        Odpytuje API co interval sekund (do przerwania Ctrl+C lub max_polls odpytań).
+
+        Args:
+            interval: Odstęp między odpytaniami w sekundach
+            max_polls: Maksymalna liczba odpytań (domyślnie bez limitu)
+        """
+        logger.info(f"📡 Śledzenie danych PSE dla doby {self.business_date} (co {interval:g} s, Ctrl+C - koniec)")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                self.poll()
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("\n⏹️  Zatrzymano śledzenie")
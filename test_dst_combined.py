@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
-"""Test pobierania i łączenia danych dla okresu z DST."""
+"""
+Test pobierania i łączenia danych dla okresu z DST.
 
+Bez sieci (powtarzalnie) - przez lokalny serwer odtwarzający:
+    python scripts/replay_server.py &
+    PSE_API_BASE_URL=http://127.0.0.1:8765/pse/api \
+    ENTSOE_API_ENDPOINT=http://127.0.0.1:8765/entsoe/api ENTSOE_API_KEY=replay \
+    python test_dst_combined.py
+"""
+
+import os
 import sys
-sys.path.insert(0, '/workspaces/produkcja-energii/src')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
 from pse_energy_scraper import PSEEnergyDataFetcher
 from entsoe_data_fetcher import ENTSOEDataFetcher
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Wspólne elementy skryptów testowych w tests/ (offline, bez dostępu do sieci).
+
+Skrypty testowe uruchamia się bezpośrednio:
+    python tests/test_energy_store.py
+
+lub wszystkie naraz przez pytest (funkcje test_* są zwykłymi sprawdzeniami assert):
+    python -m pytest -q tests
+
+Fetchery kierowane są na lokalny serwer odtwarzający nagrane odpowiedzi
+(scripts/replay_server.py, uruchamiany w wątku w tle), a cache i magazyn
+zapisywane są w katalogach tymczasowych.
+"""
+
+import contextlib
+import os
+import sys
+import traceback
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'scripts', 'fixtures')
+
+# Dodaj ścieżki do src (moduły biblioteki) i scripts (serwer odtwarzający)
+for path in (os.path.join(ROOT_DIR, 'scripts'), os.path.join(ROOT_DIR, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from log_output import configure_output
+from replay_server import ReplayServer
+
+# Komunikaty fetcherów nie mieszają się z wynikami sprawdzeń
+configure_output(quiet=True)
+
+
+@contextlib.contextmanager
+def replay_server(**options):
+    """
+    Uruchamia serwer odtwarzający i kieruje na niego fetchery (zmienne środowiskowe).
+
+    Args:
+        **options: Argumenty ReplayServer (np. latency_ms, rate_limit)
+    """
+    overrides = {'ENTSOE_API_KEY': 'replay'}
+    previous = {}
+    with ReplayServer(**options) as server:
+        overrides['PSE_API_BASE_URL'] = server.pse_base_url
+        overrides['ENTSOE_API_ENDPOINT'] = server.entsoe_endpoint
+        for name, value in overrides.items():
+            previous[name] = os.environ.get(name)
+            os.environ[name] = value
+        try:
+            yield server
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def record_params(fetcher) -> list:
+    """Zapamiętuje parametry zapytań fetchera (np. $filter, $select)."""
+    sent = []
+    get = fetcher.session.get
+
+    def recording_get(url, params=None, **kwargs):
+        sent.append(dict(params or {}))
+        return get(url, params=params, **kwargs)
+
+    fetcher.session.get = recording_get
+    return sent
+
+
+def run_checks(title: str, checks: list) -> int:
+    """
+    Uruchamia sprawdzenia i wypisuje podsumowanie.
+
+    Args:
+        title: Nagłówek skryptu testowego
+        checks: Funkcje sprawdzające (opis - pierwsza linia docstringu)
+
+    Returns:
+        Kod wyjścia: 0 - wszystkie sprawdzenia zaliczone, 1 - są niepowodzenia
+    """
+    print("=" * 80)
+    print(title)
+    print("=" * 80)
+
+    failed = 0
+    for check in checks:
+        description = (check.__doc__ or check.__name__).strip().splitlines()[0]
+        try:
+            check()
+        except Exception:
+            failed += 1
+            print(f"❌ {description}")
+            traceback.print_exc()
+        else:
+            print(f"✅ {description}")
+
+    print("=" * 80)
+    if failed:
+        print(f"❌ Niezaliczone: {failed} z {len(checks)} sprawdzeń")
+    else:
+        print(f"✅ Wszystkie sprawdzenia zaliczone ({len(checks)})")
+    print("=" * 80)
+    return 1 if failed else 0
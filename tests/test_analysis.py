@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test walidacji i agregacji danych (offline, dane syntetyczne).
+
+Użycie:
+    python tests/test_analysis.py
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from checks import run_checks
+from combined_energy_data import validate_data_continuity
+from pse_energy_scraper import (EnergyDataAnalyzer, PeriodSumIndex, RollupCube, compute_period_stats,
+                                resample_energy)
+
+
+PSE_COLUMNS = [
+    'Sumaryczna generacja źródeł wiatrowych [MW]',
+    'Sumaryczna generacja źródeł fotowoltaicznych [MW]',
+    'Zapotrzebowanie na moc [MW]',
+    'Krajowe saldo wymiany międzysystemowej [MW]',
+]
+
+
+def _quarters(date_from: str, date_to: str) -> pd.DataFrame:
+    """Kwadranse czasu polskiego dla dni date_from..date_to (z Data_UTC, także w dniach zmiany czasu)."""
+    start = pd.Timestamp(date_from, tz='Europe/Warsaw')
+    end = pd.Timestamp(date_to, tz='Europe/Warsaw') + pd.DateOffset(days=1)
+    times = pd.date_range(start, end, freq='15min', inclusive='left')
+    return pd.DataFrame({
+        'Data': times.tz_localize(None),
+        'Data_UTC': times.tz_convert('UTC'),
+        'Zapotrzebowanie na moc [MW]': np.linspace(15000, 20000, len(times)),
+    })
+
+
+def _pse_frame(date_from: str, days: int) -> pd.DataFrame:
+    """Losowe dane PSE co 15 min z brakującymi wartościami (NaN) i brakującym dniem."""
+    rng = np.random.default_rng(days)
+    times = pd.date_range(date_from, periods=days * 96, freq='15min')
+    values = rng.uniform(-500, 20000, size=(len(times), len(PSE_COLUMNS)))
+    values[rng.random(values.shape) < 0.02] = np.nan
+    df = pd.DataFrame(values, columns=PSE_COLUMNS)
+    df.insert(0, 'Data', times)
+    return df[df['Data'].dt.date != (pd.Timestamp(date_from) + pd.Timedelta(days=days // 2)).date()]
+
+
+def test_continuity_detects_gaps_and_duplicates():
+    """Walidacja ciągłości: brakujące dni i kwadranse, duplikaty"""
+    df = _quarters('2024-06-11', '2024-06-14')
+    df = df[df['Data'].dt.date != pd.Timestamp('2024-06-12').date()]
+    df = df.drop(df.index[(df['Data'] >= '2024-06-13 10:00') & (df['Data'] < '2024-06-13 12:00')])
+    df = pd.concat([df, df.iloc[[-1]]], ignore_index=True)
+
+    result = validate_data_continuity(df, '2024-06-11', '2024-06-14')
+
+    assert not result['is_complete']
+    assert result['expected_records'] == 4 * 96
+    assert result['actual_records'] == 96 + 88 + 97
+    assert [(day['date'], day['missing']) for day in result['missing_days']] == [
+        ('2024-06-12', 96), ('2024-06-13', 8)]
+    assert result['duplicate_timestamps'] == 1
+    assert [day['date'] for day in result['duplicate_days']] == ['2024-06-14']
+    assert result['records_per_day'][pd.Timestamp('2024-06-11').date()] == 96
+    assert pd.Timestamp('2024-06-12').date() not in result['records_per_day']
+
+
+def test_continuity_dst_days():
+    """Dni zmiany czasu (92 i 100 kwadransów) nie są brakami ani duplikatami"""
+    for day, records in (('2024-03-31', 92), ('2024-10-27', 100)):
+        result = validate_data_continuity(_quarters(day, day), day, day)
+        assert result['missing_days'] == [] and result['days_with_excess'] == [], day
+        assert result['dst_transition_days'] == [{'date': day, 'expected': 96, 'actual': records,
+                                                  'note': 'Prawdopodobnie dzień zmiany czasu'}]
+        # Powtórzona godzina 02:00-03:00 rozróżniona przez Data_UTC
+        assert result['duplicate_timestamps'] == 0, day
+
+
+def test_sum_index_matches_filtering():
+    """Indeks sum prefiksowych: sumy i średnie jak przy filtrowaniu ramki, także dla nieposortowanych danych"""
+    df = _pse_frame('2024-01-01', 60).set_index('Data')
+    shuffled = df.sample(frac=1, random_state=1)
+    index = PeriodSumIndex(shuffled, PSE_COLUMNS)
+
+    periods = [(None, None), ('2024-01-10', '2024-02-03 13:45'), ('2024-01-30', '2024-01-31'),
+               ('2024-02-15 00:05', None), (None, '2023-12-31'), ('2024-02-03', '2024-02-02')]
+    for date_from, date_to in periods:
+        expected = compute_period_stats(df, PSE_COLUMNS, date_from, date_to)
+        result = index.query(date_from, date_to)
+        if expected is None:
+            assert result is None, (date_from, date_to)
+            continue
+        for key in ('okres_od', 'okres_do', 'liczba_pomiarów'):
+            assert result[key] == expected[key], (date_from, date_to, key)
+        for column in PSE_COLUMNS:
+            np.testing.assert_allclose(result['stats'][column], expected['stats'][column], rtol=1e-9)
+
+
+def test_analyzer_sum_period_with_index():
+    """EnergyDataAnalyzer.sum_period z indeksem daje ten sam wynik co bez indeksu"""
+    df = _pse_frame('2024-01-01', 40)
+    plain = EnergyDataAnalyzer(df)
+    indexed = EnergyDataAnalyzer(df, build_index=True)
+    for date_from, date_to in [(None, None), ('2024-01-05', '2024-01-25'), ('2025-01-01', None)]:
+        assert indexed.sum_period(date_from, date_to) == plain.sum_period(date_from, date_to)
+
+
+def test_resample_matches_lambda_aggregation():
+    """resample_energy: sumy i średnie jak dotychczasowe resample().agg(lambda) i mean()"""
+    df = _pse_frame('2024-01-01', 75).set_index('Data')
+    for freq in ('1h', '1D', '1W', '1ME', '2D'):
+        sums, means = resample_energy(df, PSE_COLUMNS, freq)
+        pd.testing.assert_frame_equal(sums, df[PSE_COLUMNS].resample(freq).agg(lambda x: x.sum()))
+        pd.testing.assert_frame_equal(means, df[PSE_COLUMNS].resample(freq).mean())
+
+
+def test_analyzer_time_series():
+    """get_time_series: MWh (suma * 0.25) i kolumny średniej mocy"""
+    df = _pse_frame('2024-01-01', 20)
+    result = EnergyDataAnalyzer(df).get_time_series('1D')
+    daily = df.set_index('Data')[PSE_COLUMNS].resample('1D')
+
+    pd.testing.assert_frame_equal(result[PSE_COLUMNS], daily.sum() * 0.25)
+    means = result[[f'{column}_średnia' for column in PSE_COLUMNS]]
+    np.testing.assert_allclose(means.to_numpy(), daily.mean().to_numpy())
+
+
+def test_rollup_matches_resample():
+    """Kostka agregatów: sumy, średnie, minima i maksima każdego poziomu jak resample surowych danych"""
+    df = _pse_frame('2023-11-15', 120).set_index('Data')
+    cube = RollupCube(df, PSE_COLUMNS)
+    assert set(cube._levels) == {'hourly', 'daily', 'monthly'}
+
+    for freq in ('1h', '1D', '1W', 'ME', '15min', '2D'):
+        sums, means = cube.resample(PSE_COLUMNS, freq)
+        expected_sums, expected_means = resample_energy(df, PSE_COLUMNS, freq)
+        pd.testing.assert_frame_equal(sums, expected_sums, check_freq=False)
+        pd.testing.assert_frame_equal(means, expected_means, check_freq=False)
+
+        stats = cube.stats(PSE_COLUMNS, freq)
+        resampler = df[PSE_COLUMNS].resample(freq)
+        for stat in ('min', 'max', 'count'):
+            pd.testing.assert_frame_equal(stats[stat], getattr(resampler, stat)(), check_freq=False)
+        pd.testing.assert_frame_equal(stats['mean'], expected_means, check_freq=False)
+    assert set(cube._levels) == {'hourly', 'daily', 'weekly', 'monthly'}
+
+
+def test_rollup_monthly_sums():
+    """Miesięczne sumy z kostki jak resample danych przefiltrowanych do lat"""
+    df = _pse_frame('2023-11-15', 120)
+    analyzer = EnergyDataAnalyzer(df)
+    monthly = analyzer.monthly_sums(2024, 2024)
+
+    in_year = df.set_index('Data').loc['2024', PSE_COLUMNS]
+    expected = in_year.resample('ME').sum()
+    np.testing.assert_allclose(monthly.to_numpy(), expected.to_numpy())
+    assert [str(period) for period in monthly.index] == ['2024-01', '2024-02', '2024-03']
+    assert analyzer.monthly_sums(2030, 2030).empty
+
+
+CHECKS = [
+    test_continuity_detects_gaps_and_duplicates,
+    test_continuity_dst_days,
+    test_sum_index_matches_filtering,
+    test_analyzer_sum_period_with_index,
+    test_resample_matches_lambda_aggregation,
+    test_analyzer_time_series,
+    test_rollup_matches_resample,
+    test_rollup_monthly_sums,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Walidacja i agregacja danych", CHECKS))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test skryptu pomiarów wydajności (scripts/benchmark.py) w najmniejszej skali.
+
+Użycie:
+    python tests/test_benchmark.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from checks import ROOT_DIR, run_checks
+
+
+BENCHMARK = os.path.join(ROOT_DIR, 'scripts', 'benchmark.py')
+
+
+def _run(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, BENCHMARK, *args], capture_output=True, text=True, timeout=300)
+
+
+def test_benchmark_report():
+    """Pomiary skali 1d: plik wyników JSON ze wszystkimi ścieżkami i porównanie z poprzednim plikiem"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, 'wyniki.json')
+        result = _run('--scales', '1d', '--repeat', '1', '--output', output)
+        assert result.returncode == 0, result.stderr
+        with open(output, encoding='utf-8') as f:
+            report = json.load(f)
+
+        compared = _run('--scales', '1d', '--repeat', '1', '--output', os.path.join(tmp_dir, 'nowe.json'),
+                        '--compare', output)
+        assert compared.returncode == 0, compared.stderr
+
+    benchmarks = {row['benchmark'] for row in report['results']}
+    assert {'pse_parse_data', 'combined_merge', 'validate_data_continuity', 'sum_period_indexed',
+            'monthly_sums', 'entsoe_parse_xml_response'} <= benchmarks
+    for row in report['results']:
+        assert row['scale'] == '1d' and row['rows'] == 96 and row['repeat'] == 1
+        assert 0 <= row['min_s'] <= row['median_s']
+    assert {'commit', 'python', 'pandas', 'numpy'} <= set(report)
+    assert 'Porównanie z' in compared.stdout and 'pse_parse_data' in compared.stdout
+
+
+def test_unknown_scale():
+    """Nieznana skala - błąd argumentów zamiast pomiarów"""
+    result = _run('--scales', '1d,2w')
+    assert result.returncode == 2 and 'nieznane skale: 2w' in result.stderr
+
+
+CHECKS = [
+    test_benchmark_report,
+    test_unknown_scale,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Pomiary wydajności (benchmark)", CHECKS))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test projekcji kolumn (columns=) w fetcherach i magazynie (offline, przez serwer odtwarzający).
+
+Użycie:
+    python tests/test_column_projection.py
+"""
+
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from checks import record_params, replay_server, run_checks
+from combined_energy_data import CombinedEnergyDataFetcher
+from energy_store import EnergyDataStore
+from pse_energy_scraper import PSEEnergyDataFetcher
+
+
+WIND = 'Sumaryczna generacja źródeł wiatrowych [MW]'
+SALDO = 'Krajowe saldo wymiany międzysystemowej [MW]'
+DEMAND = 'Zapotrzebowanie na moc [MW]'
+
+
+def test_pse_projection():
+    """PSE: $select tylko z pól wybranych kolumn, wartości jak w pełnym pobraniu; nieznana kolumna - ValueError"""
+    with replay_server():
+        projected_fetcher = PSEEnergyDataFetcher(use_cache=False)
+        sent = record_params(projected_fetcher)
+        projected = projected_fetcher.fetch_data('2024-06-13', '2024-06-14', columns=[WIND, SALDO])
+        full = PSEEnergyDataFetcher(use_cache=False).fetch_data('2024-06-13', '2024-06-14')
+
+    assert {params['$select'] for params in sent} == {'dtime,wi,swm_p,swm_np,publication_ts'}
+    assert [column for column in projected.columns if column.endswith('[MW]')] == [WIND, SALDO]
+    pd.testing.assert_frame_equal(projected, full[projected.columns])
+
+    try:
+        PSEEnergyDataFetcher(use_cache=False).fetch_data('2024-06-13', '2024-06-14', columns=[WIND, 'Wiatr [MW]'])
+    except ValueError as e:
+        assert 'Wiatr [MW]' in str(e)
+    else:
+        raise AssertionError("brak ValueError dla nieznanej kolumny")
+
+
+def test_combined_projection():
+    """Połączone pobieranie: kolumny dzielone na źródła, ENTSO-E pomijane bez swoich kolumn"""
+    assert CombinedEnergyDataFetcher._split_columns(None) == (None, None)
+    assert CombinedEnergyDataFetcher._split_columns(['Data', DEMAND, 'Wiatr lądowy [MW]']) == (
+        [DEMAND], ['Wiatr lądowy [MW]'])
+
+    with replay_server() as server:
+        fetcher = CombinedEnergyDataFetcher()
+        pse_only = fetcher.fetch_combined_data('2024-06-13', '2024-06-13', columns=[DEMAND])
+        assert server.stats['entsoe'] == 0
+        both = fetcher.fetch_combined_data('2024-06-13', '2024-06-13', columns=[DEMAND, 'Słońce [MW]'])
+        assert server.stats['entsoe'] == 1
+
+        try:
+            fetcher.fetch_combined_data('2024-06-13', '2024-06-13', columns=[DEMAND, 'Atom [MW]'])
+        except ValueError as e:
+            assert 'Atom [MW]' in str(e)
+        else:
+            raise AssertionError("brak ValueError dla nieznanej kolumny")
+
+    assert len(pse_only) == len(both) == 96
+    assert DEMAND in pse_only.columns and 'Słońce [MW]' not in pse_only.columns
+    assert both['Słońce [MW]'].notna().all()
+    np.testing.assert_allclose(both[DEMAND], pse_only[DEMAND])
+
+
+def test_store_read_columns():
+    """Odczyt wybranych kolumn z magazynu: kolumna nieobecna w partycji daje NaN, bez pomijania wierszy"""
+    times = pd.date_range('2024-05-31', '2024-06-02', freq='15min', inclusive='left')
+    df = pd.DataFrame({'Data': times, 'Data_UTC': times.tz_localize('Europe/Warsaw').tz_convert('UTC'),
+                       DEMAND: np.arange(len(times), dtype=np.float64)})
+    june = df['Data'] >= '2024-06-01'
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(df[~june], sources=['pse'], source_columns={'pse': [DEMAND]})
+        store.write(df[june].assign(**{'Wiatr lądowy [MW]': 5.0}), source_columns={
+            'pse': [DEMAND], 'entsoe': ['Wiatr lądowy [MW]']})
+
+        result = store.read(columns=[DEMAND, 'Wiatr lądowy [MW]'])
+        assert store.read('2024-05-31', '2024-05-31', columns=['Gaz [MW]'])['Gaz [MW]'].isna().all()
+
+    assert list(result.columns) == ['Data', DEMAND, 'Wiatr lądowy [MW]']
+    assert len(result) == 2 * 96
+    np.testing.assert_allclose(result[DEMAND], df[DEMAND])
+    assert result.loc[~june.to_numpy(), 'Wiatr lądowy [MW]'].isna().all()
+    assert (result.loc[june.to_numpy(), 'Wiatr lądowy [MW]'] == 5).all()
+
+
+CHECKS = [
+    test_pse_projection,
+    test_combined_projection,
+    test_store_read_columns,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Projekcja kolumn", CHECKS))
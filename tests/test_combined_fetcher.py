@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test pobierania połączonych danych PSE + ENTSO-E (offline, przez serwer odtwarzający).
+
+Użycie:
+    python tests/test_combined_fetcher.py
+"""
+
+import contextlib
+import io
+import logging
+import sys
+import tempfile
+
+from checks import replay_server, run_checks
+from combined_energy_data import CombinedEnergyDataFetcher
+from energy_store import EnergyDataStore
+from log_output import SourceLogBuffer, configure_output, get_logger
+
+
+@contextlib.contextmanager
+def console_output():
+    """Włącza komunikaty na konsolę i zbiera je (przekierowany stdout)."""
+    output = io.StringIO()
+    configure_output(quiet=False)
+    try:
+        with contextlib.redirect_stdout(output):
+            yield output
+    finally:
+        configure_output(quiet=True)
+
+
+def test_combined_fetch_merges_sources():
+    """PSE i ENTSO-E pobierane równolegle i łączone - komplet kwadransów z obu źródeł"""
+    pse_finished = []
+
+    def progress(event):
+        # Pozycja w wyjściu, gdy PSE pobrało ostatni dzień
+        if event['source'] == 'pse' and event['done'] == event['total']:
+            pse_finished.append(len(output.getvalue()))
+
+    with replay_server(latency_ms=50):
+        with console_output() as output:
+            df = CombinedEnergyDataFetcher(progress_callback=progress).fetch_combined_data('2024-06-13', '2024-06-14')
+
+    assert len(df) == 2 * 96
+    assert not df['Data_UTC'].duplicated().any()
+    for column in ('Zapotrzebowanie na moc [MW]', 'Wiatr lądowy [MW]', 'Węgiel kamienny [MW]'):
+        assert df[column].notna().all(), column
+
+    # ENTSO-E pobierane jest w tym samym czasie co PSE, ale jego komunikaty
+    # są wypisywane dopiero po zakończeniu PSE, nie przeplatane z komunikatami PSE
+    text = output.getvalue()
+    assert 0 < text.index('PSE - Dane rynkowe') < pse_finished[0] <= text.index('ENTSO-E - Dane o produkcji')
+
+
+def test_combined_dst_day():
+    """Dzień zmiany czasu zimowego: 100 kwadransów po połączeniu, ENTSO-E dopasowane po czasie UTC"""
+    with replay_server():
+        df = CombinedEnergyDataFetcher().fetch_combined_data('2024-10-27', '2024-10-27')
+
+    assert len(df) == 100
+    assert df['Data_UTC'].is_unique and df['Data_UTC'].is_monotonic_increasing
+    assert df['Wiatr lądowy [MW]'].notna().all()
+    # Powtórzona godzina 02:00-02:45 dwukrotnie - w czasie letnim i zimowym
+    assert df['Data'].dt.strftime('%H').eq('02').sum() == 8
+    assert df['Data'].value_counts().max() == 2
+
+
+def test_source_log_buffer():
+    """Bufor źródła wstrzymuje tylko komunikaty tego źródła i przekazuje je po release()"""
+    records = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    root = logging.getLogger('energia')
+    handler = Collect()
+    root.addHandler(handler)
+    try:
+        buffer = SourceLogBuffer('entsoe').start()
+        get_logger('entsoe').info('entsoe 1')
+        get_logger('pse').info('pse 1')
+        get_logger('entsoe').warning('entsoe 2')
+        assert records == ['pse 1']
+
+        buffer.release()
+        get_logger('entsoe').info('entsoe 3')
+    finally:
+        root.removeHandler(handler)
+
+    assert records == ['pse 1', 'entsoe 1', 'entsoe 2', 'entsoe 3']
+    assert buffer not in get_logger('entsoe').filters
+
+
+def test_sync_store_fetches_only_missing_days():
+    """Synchronizacja magazynu: pobierane tylko brakujące dni i dni z lukami ENTSO-E, potem nic"""
+    with tempfile.TemporaryDirectory() as store_dir, replay_server() as server:
+        store = EnergyDataStore(store_dir)
+
+        # Dzień zapisany bez danych ENTSO-E (źródło niedostępne)
+        pse_only = CombinedEnergyDataFetcher(store=store)
+        pse_only.entsoe_available = False
+        pse_only.fetch_combined_data('2024-06-12', '2024-06-12')
+        assert store.day_info('2024-06-12')['sources'] == ['pse']
+
+        fetcher = CombinedEnergyDataFetcher(store=store)
+        summary = fetcher.sync_store('2024-06-11', '2024-06-13')
+        assert summary['brakujące_dni'] == 3 and summary['luki_źródeł'] == 1
+        assert summary['zakresy'] == [('2024-06-11', '2024-06-13')]
+        assert summary['nieudane_zakresy'] == [] and summary['tylko_pse'] == []
+        assert store.covers('2024-06-11', '2024-06-13', ['pse', 'entsoe'])
+        assert store.read('2024-06-11', '2024-06-13')['Wiatr lądowy [MW]'].notna().all()
+
+        requests = dict(server.stats)
+        summary = fetcher.sync_store('2024-06-11', '2024-06-13')
+        assert summary['brakujące_dni'] == 0 and summary['zakresy'] == []
+        assert server.stats == requests
+
+
+CHECKS = [
+    test_combined_fetch_merges_sources,
+    test_combined_dst_day,
+    test_source_log_buffer,
+    test_sync_store_fetches_only_missing_days,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Połączone dane PSE + ENTSO-E (serwer odtwarzający)", CHECKS))
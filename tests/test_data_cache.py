@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test lokalnego cache danych (dni PSE, odpowiedzi ENTSO-E) - zapis, odczyt i polityka ważności.
+
+Użycie:
+    python tests/test_data_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from checks import replay_server, run_checks
+from data_cache import ENTSOEResponseCache, PSEDayCache
+from pse_energy_scraper import PSEEnergyDataFetcher
+
+
+def _day_frame(date: str) -> pd.DataFrame:
+    times = pd.date_range(date, periods=96, freq='15min')
+    return pd.DataFrame({'Data': times, 'Zapotrzebowanie na moc [MW]': range(96)})
+
+
+def _age(path: str, seconds: float):
+    """Cofa czas zapisu pliku (wpis starszy niż volatile_ttl)."""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_closed_day_round_trip():
+    """Zamknięty dzień: zapis i odczyt bez zmian, wpis nie wygasa"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PSEDayCache(cache_dir, volatile_ttl=60)
+        df = _day_frame('2024-06-14')
+        assert cache.get('2024-06-14') is None
+
+        cache.put('2024-06-14', df)
+        _age(cache._path('2024-06-14', volatile=False), 10 * 24 * 3600)
+        pd.testing.assert_frame_equal(cache.get('2024-06-14'), df)
+        assert cache.size_bytes() > 0
+
+
+def test_volatile_day_expires():
+    """Dzień ulotny (dzisiaj) wygasa po volatile_ttl, ale jest bazą pobierania przyrostowego"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PSEDayCache(cache_dir, volatile_ttl=60)
+        assert cache.is_volatile(today)
+        cache.put(today, _day_frame(today))
+        assert cache.get(today) is not None
+
+        _age(cache._path(today, volatile=True), 120)
+        assert cache.get(today) is None
+        assert cache.get(today, allow_stale=True) is not None
+
+
+def test_empty_day_marker():
+    """Dzień bez danych zapamiętany na volatile_ttl, usuwany przy zapisie danych"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PSEDayCache(cache_dir, volatile_ttl=60)
+        cache.put_empty('2030-01-01')
+        cached = cache.get('2030-01-01')
+        assert cached is not None and cached.empty
+
+        _age(cache._empty_path('2030-01-01'), 120)
+        assert cache.get('2030-01-01') is None
+
+        cache.put_empty('2030-01-01')
+        cache.put('2030-01-01', _day_frame('2030-01-01'))
+        assert not os.path.exists(cache._empty_path('2030-01-01'))
+        assert len(cache.get('2030-01-01')) == 96
+
+
+def test_lru_eviction():
+    """Po przekroczeniu limitu rozmiaru usuwane są najdawniej używane wpisy"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PSEDayCache(cache_dir)
+        cache.put('2024-06-01', _day_frame('2024-06-01'))
+        entry_size = cache.size_bytes()
+        cache.max_size_bytes = int(entry_size * 2.5)
+
+        cache.put('2024-06-02', _day_frame('2024-06-02'))
+        _age(cache._path('2024-06-01', volatile=False), 3600)
+        cache.get('2024-06-02')
+        cache.put('2024-06-03', _day_frame('2024-06-03'))
+
+        assert cache.get('2024-06-01') is None
+        assert cache.get('2024-06-02') is not None and cache.get('2024-06-03') is not None
+        assert cache.size_bytes() <= cache.max_size_bytes
+
+
+def test_fetcher_reads_cached_days():
+    """Ponowne pobranie zamkniętych dni nie wysyła zapytań do API"""
+    with tempfile.TemporaryDirectory() as cache_dir, replay_server() as server:
+        fetcher = PSEEnergyDataFetcher(cache=PSEDayCache(cache_dir), base_url=server.pse_base_url)
+        first = fetcher.fetch_data('2024-06-12', '2024-06-14')
+        requests_sent = server.stats['pse']
+        second = fetcher.fetch_data('2024-06-12', '2024-06-14')
+
+        assert requests_sent == 3
+        assert server.stats['pse'] == requests_sent
+        pd.testing.assert_frame_equal(first, second)
+
+
+def test_fetcher_remembers_empty_days():
+    """Dzień bez danych (przyszły) nie jest odpytywany ponownie w czasie volatile_ttl"""
+    with tempfile.TemporaryDirectory() as cache_dir, replay_server() as server:
+        fetcher = PSEEnergyDataFetcher(cache=PSEDayCache(cache_dir), base_url=server.pse_base_url)
+        assert fetcher.fetch_data('2030-01-01', '2030-01-01') is None
+        assert fetcher.fetch_data('2030-01-01', '2030-01-01') is None
+        assert server.stats['pse'] == 1
+
+
+def _entsoe_params(period_end: datetime, token: str = 'klucz-1') -> dict:
+    return {'securityToken': token, 'documentType': 'A75', 'processType': 'A16',
+            'in_Domain': '10YPL-AREA-----S', 'periodStart': '202406132200',
+            'periodEnd': period_end.strftime('%Y%m%d%H%M')}
+
+
+def test_entsoe_response_round_trip():
+    """Odpowiedź ENTSO-E: klucz bez securityToken, zapis skompresowany i odczyt bez zmian"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ENTSOEResponseCache(cache_dir)
+        params = _entsoe_params(datetime(2024, 6, 14, 22, 0))
+        content = b'<GL_MarketDocument>' + b'x' * 10000 + b'</GL_MarketDocument>'
+        assert cache.get(params) is None
+
+        cache.put(params, content)
+        assert cache.get(_entsoe_params(datetime(2024, 6, 14, 22, 0), token='klucz-2')) == content
+        assert cache.key(params) != cache.key({**params, 'periodStart': '202406122200'})
+        assert os.path.getsize(cache._path(params)) < len(content)
+
+
+def test_entsoe_recent_window_expires():
+    """Okno sprzed mniej niż doby wygasa po volatile_ttl (w trybie offline nadal dostępne)"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ENTSOEResponseCache(cache_dir, volatile_ttl=60)
+        recent = _entsoe_params(datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=2))
+        closed = _entsoe_params(datetime(2024, 6, 14, 22, 0))
+        assert not cache.is_immutable(recent) and cache.is_immutable(closed)
+
+        for params in (recent, closed):
+            cache.put(params, b'<xml/>')
+            _age(cache._path(params), 120)
+        assert cache.get(recent) is None
+        assert cache.get(recent, allow_stale=True) == b'<xml/>'
+        assert cache.get(closed) == b'<xml/>'
+
+
+def test_entsoe_acknowledgement_not_cached():
+    """Odpowiedź "brak danych" (Acknowledgement_MarketDocument) nie trafia do cache ENTSO-E"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ENTSOEResponseCache(cache_dir)
+        params = _entsoe_params(datetime(2024, 6, 14, 22, 0))
+        acknowledgement = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                           b'<Acknowledgement_MarketDocument xmlns="urn:iec62325.351:tc57wg16:451-1:'
+                           b'acknowledgementdocument:7:0"><Reason><code>999</code>'
+                           b'<text>No matching data found</text></Reason></Acknowledgement_MarketDocument>')
+        cache.put(params, acknowledgement)
+        assert cache.get(params) is None and cache.size_bytes() == 0
+
+
+def test_entsoe_lru_eviction():
+    """Cache ENTSO-E: po przekroczeniu limitu rozmiaru usuwane są najdawniej używane odpowiedzi"""
+    content = os.urandom(4096)
+    windows = [_entsoe_params(datetime(2024, 6, day, 22, 0)) for day in (1, 2, 3)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ENTSOEResponseCache(cache_dir)
+        cache.put(windows[0], content)
+        cache.max_size_bytes = int(cache.size_bytes() * 2.5)
+
+        cache.put(windows[1], content)
+        _age(cache._path(windows[0]), 3600)
+        cache.get(windows[1])
+        cache.put(windows[2], content)
+
+        assert cache.get(windows[0]) is None
+        assert cache.get(windows[1]) == content and cache.get(windows[2]) == content
+        assert cache.size_bytes() <= cache.max_size_bytes
+        assert ENTSOEResponseCache(cache_dir).size_bytes() == cache.size_bytes()
+
+
+CHECKS = [
+    test_closed_day_round_trip,
+    test_volatile_day_expires,
+    test_empty_day_marker,
+    test_lru_eviction,
+    test_fetcher_reads_cached_days,
+    test_fetcher_remembers_empty_days,
+    test_entsoe_response_round_trip,
+    test_entsoe_recent_window_expires,
+    test_entsoe_acknowledgement_not_cached,
+    test_entsoe_lru_eviction,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Lokalny cache danych", CHECKS))
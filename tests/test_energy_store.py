@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test lokalnego magazynu danych (partycje miesięczne i manifest pokrycia).
+
+Użycie:
+    python tests/test_energy_store.py
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from checks import run_checks
+from energy_store import EnergyDataStore
+
+
+PSE_COLUMNS = ['Zapotrzebowanie na moc [MW]', 'Sumaryczna generacja źródeł wiatrowych [MW]']
+ENTSOE_COLUMNS = ['Węgiel kamienny [MW]', 'Wiatr lądowy [MW]']
+SOURCE_COLUMNS = {'pse': PSE_COLUMNS, 'entsoe': ENTSOE_COLUMNS}
+
+
+def _combined(date_from: str, date_to: str) -> pd.DataFrame:
+    """Połączone dane PSE + ENTSO-E co 15 min (czas polski, z Data_UTC)."""
+    start = pd.Timestamp(date_from, tz='Europe/Warsaw')
+    end = pd.Timestamp(date_to, tz='Europe/Warsaw') + pd.DateOffset(days=1)
+    times = pd.date_range(start, end, freq='15min', inclusive='left')
+    values = np.arange(len(times), dtype=np.float64)
+    df = pd.DataFrame({'Data': times.tz_localize(None), 'Data_UTC': times.tz_convert('UTC')})
+    for offset, column in enumerate(PSE_COLUMNS + ENTSOE_COLUMNS):
+        df[column] = values + offset * 1000
+    return df
+
+
+def test_write_read_round_trip():
+    """Zapis i odczyt: dane bez zmian, partycje miesięczne, manifest zachowany po ponownym otwarciu"""
+    df = _combined('2024-05-30', '2024-06-02')
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        assert store.write(df, source_columns=SOURCE_COLUMNS) == ['2024-05', '2024-06']
+        pd.testing.assert_frame_equal(store.read(), df)
+
+        reopened = EnergyDataStore(store_dir)
+        june = reopened.read('2024-06-01', '2024-06-01')
+        pd.testing.assert_frame_equal(june, df[df['Data'].dt.day == 1].reset_index(drop=True))
+        assert reopened.read('2024-07-01', '2024-07-31') is None
+        assert reopened.day_info('2024-05-31')['rows'] == 96
+
+
+def test_write_keeps_existing_values():
+    """Zapis samego PSE nie usuwa zapisanych danych ENTSO-E, NaN ich nie nadpisuje, nowe wartości zastępują stare"""
+    df = _combined('2024-06-01', '2024-06-01')
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(df, source_columns=SOURCE_COLUMNS)
+
+        pse_only = df[['Data', 'Data_UTC', *PSE_COLUMNS]].copy()
+        pse_only[PSE_COLUMNS[0]] += 0.5
+        pse_only.loc[:9, PSE_COLUMNS[1]] = float('nan')
+        store.write(pse_only, sources=['pse'], source_columns={'pse': PSE_COLUMNS})
+
+        stored = store.read()
+        assert len(stored) == 96
+        np.testing.assert_allclose(stored[PSE_COLUMNS[0]], df[PSE_COLUMNS[0]] + 0.5)
+        np.testing.assert_allclose(stored[[PSE_COLUMNS[1], *ENTSOE_COLUMNS]], df[[PSE_COLUMNS[1], *ENTSOE_COLUMNS]])
+        assert store.day_info('2024-06-01')['sources'] == ['entsoe', 'pse']
+
+
+def test_day_sources_from_data():
+    """Źródła dnia z jego danych - dzień z lukami ENTSO-E jest niekompletny i wraca w missing_days"""
+    df = _combined('2024-06-01', '2024-06-03')
+    gap = (df['Data'] >= '2024-06-02 23:00') & (df['Data'] < '2024-06-03')
+    df.loc[gap, ENTSOE_COLUMNS] = np.nan
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(df, sources=['pse', 'entsoe'], source_columns=SOURCE_COLUMNS)
+
+        assert store.day_info('2024-06-01')['sources'] == ['entsoe', 'pse']
+        assert store.day_info('2024-06-02')['sources'] == ['pse']
+        assert store.missing_days('2024-05-31', '2024-06-03') == ['2024-05-31']
+        assert store.missing_sources('2024-05-31', '2024-06-03', ['pse', 'entsoe']) == {
+            '2024-05-31': ['entsoe', 'pse'], '2024-06-02': ['entsoe']}
+        assert store.day_ranges(store.missing_days('2024-05-30', '2024-06-03', ['pse', 'entsoe'])) == [
+            ('2024-05-30', '2024-05-31'), ('2024-06-02', '2024-06-02')]
+
+        # Uzupełnienie luki ENTSO-E oznacza dzień jako kompletny
+        store.write(_combined('2024-06-02', '2024-06-02'), source_columns=SOURCE_COLUMNS)
+        assert store.covers('2024-06-01', '2024-06-03', ['pse', 'entsoe'])
+
+
+def test_empty_source_attempts_bounded():
+    """Źródło pobrane bez danych zamkniętego dnia: ponawiane po odstępie, najwyżej MAX_SOURCE_ATTEMPTS razy"""
+    df = _combined('2024-06-01', '2024-06-02')
+    df.loc[df['Data'] >= '2024-06-02', ENTSOE_COLUMNS] = np.nan
+    today = datetime.now().strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(df, source_columns=SOURCE_COLUMNS, attempted=['pse', 'entsoe'])
+        assert store.day_info('2024-06-02')['source_attempts']['entsoe']['count'] == 1
+        assert 'source_attempts' not in store.day_info('2024-06-01')
+        assert store.covers('2024-06-01', '2024-06-02', ['pse', 'entsoe'])
+        assert store.missing_sources('2024-06-01', '2024-06-02', ['pse', 'entsoe'], include_attempted=True) == {
+            '2024-06-02': ['entsoe']}
+
+        # Po odstępie ponawiania dzień wraca do pobrania - do wyczerpania prób
+        store.SOURCE_RETRY_INTERVAL = timedelta(0)
+        for attempt in range(2, store.MAX_SOURCE_ATTEMPTS + 1):
+            assert store.missing_days('2024-06-02', '2024-06-02', ['pse', 'entsoe']) == ['2024-06-02']
+            store.write(df, source_columns=SOURCE_COLUMNS, attempted=['pse', 'entsoe'])
+            assert store.day_info('2024-06-02')['source_attempts']['entsoe']['count'] == attempt
+        assert store.missing_days('2024-06-02', '2024-06-02', ['pse', 'entsoe']) == []
+
+        # Dane źródła usuwają próby; dni ulotne prób nie zapisują
+        store.write(_combined('2024-06-02', '2024-06-02'), source_columns=SOURCE_COLUMNS, attempted=['entsoe'])
+        assert 'source_attempts' not in store.day_info('2024-06-02')
+        volatile = _combined(today, today)
+        volatile[ENTSOE_COLUMNS] = np.nan
+        store.write(volatile, source_columns=SOURCE_COLUMNS, attempted=['pse', 'entsoe'])
+        assert 'source_attempts' not in store.day_info(today)
+
+
+def test_volatile_days_never_complete():
+    """Dzisiaj i wczoraj są zawsze do pobrania, nawet gdy zapisane"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(_combined(today, today), source_columns=SOURCE_COLUMNS)
+        assert store.day_info(today) is not None
+        assert store.missing_days(today, today) == [today]
+        assert store.missing_sources(today, today, include_volatile=False) == {}
+
+
+def test_dst_day_keys():
+    """Dzień zmiany czasu: 100 kwadransów zapisanych osobno (klucz Data_UTC)"""
+    df = _combined('2024-10-27', '2024-10-27')
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = EnergyDataStore(store_dir)
+        store.write(df, source_columns=SOURCE_COLUMNS)
+        store.write(df, source_columns=SOURCE_COLUMNS)
+        assert store.day_info('2024-10-27')['rows'] == 100
+        pd.testing.assert_frame_equal(store.read('2024-10-27', '2024-10-27'), df)
+
+
+CHECKS = [
+    test_write_read_round_trip,
+    test_write_keeps_existing_values,
+    test_day_sources_from_data,
+    test_empty_source_attempts_bounded,
+    test_volatile_days_never_complete,
+    test_dst_day_keys,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Lokalny magazyn danych", CHECKS))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test pobierania danych ENTSO-E (offline, przez serwer odtwarzający).
+
+Użycie:
+    python tests/test_entsoe_fetcher.py
+"""
+
+import sys
+import tempfile
+
+import pandas as pd
+
+from checks import replay_server, run_checks
+from data_cache import ENTSOEResponseCache
+from entsoe_data_fetcher import ENTSOEDataFetcher
+
+
+def test_parallel_chunks_match_sequential():
+    """Fragmenty okresu > 350 dni pobierane równolegle i parsowane w procesach - wynik jak sekwencyjnie"""
+    with replay_server() as server:
+        events = []
+        parallel = ENTSOEDataFetcher(max_workers=2, api_endpoint=server.entsoe_endpoint,
+                                     progress_callback=events.append)
+        sequential = ENTSOEDataFetcher(max_workers=1, parse_in_processes=False,
+                                       api_endpoint=server.entsoe_endpoint)
+        df_parallel = parallel.fetch_generation_data('2023-06-01', '2024-06-01')
+        df_sequential = sequential.fetch_generation_data('2023-06-01', '2024-06-01')
+
+    # 367 dni po 96 kwadransów (zmiany czasu: +4 w październiku, -4 w marcu)
+    assert len(df_parallel) == 367 * 96
+    assert df_parallel['Data'].is_monotonic_increasing
+    assert df_parallel['Data'].iloc[0] == pd.Timestamp('2023-06-01 00:00', tz='Europe/Warsaw')
+    pd.testing.assert_frame_equal(df_parallel, df_sequential)
+
+    # Zdarzenie postępu po każdym fragmencie (w kolejności zakończenia)
+    assert sorted(event['date_from'] for event in events) == ['2023-06-01', '2024-05-17']
+    assert [event['done'] for event in events] == [1, 2]
+    assert all(event['ok'] and event['total'] == 2 for event in events)
+
+
+def test_offline_mode_reads_cached_responses():
+    """Tryb offline: dane z cache odpowiedzi, bez klucza API i bez zapytań"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with replay_server() as server:
+            online = ENTSOEDataFetcher(cache=ENTSOEResponseCache(cache_dir), api_endpoint=server.entsoe_endpoint)
+            df_online = online.fetch_generation_data('2024-06-13', '2024-06-14')
+            df_cached = online.fetch_generation_data('2024-06-13', '2024-06-14')
+            assert server.stats['entsoe'] == 1
+
+        offline = ENTSOEDataFetcher(api_key=None, offline=True, cache=ENTSOEResponseCache(cache_dir),
+                                    api_endpoint='http://127.0.0.1:9/entsoe/api')
+        df_offline = offline.fetch_generation_data('2024-06-13', '2024-06-14')
+        assert offline.fetch_generation_data('2024-06-01', '2024-06-02') is None
+
+    assert len(df_online) == 2 * 96
+    pd.testing.assert_frame_equal(df_online, df_cached)
+    pd.testing.assert_frame_equal(df_online, df_offline)
+
+
+CHECKS = [
+    test_parallel_chunks_match_sequential,
+    test_offline_mode_reads_cached_responses,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Pobieranie danych ENTSO-E (serwer odtwarzający)", CHECKS))
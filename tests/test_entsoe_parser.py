@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test parsowania dokumentów XML A75 ENTSO-E (offline, nagrany fixture).
+
+Użycie:
+    python tests/test_entsoe_parser.py
+"""
+
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from checks import FIXTURES_DIR, run_checks
+from entsoe_data_fetcher import ENTSOEDataFetcher
+
+
+FIXTURE_XML = os.path.join(FIXTURES_DIR, 'entsoe_a75_2024-06-14.xml')
+
+
+def _fixture() -> bytes:
+    with open(FIXTURE_XML, 'rb') as f:
+        return f.read()
+
+
+def _a75_document(series: dict) -> bytes:
+    """Dokument A75 z szeregów {psrType: [(start UTC, rozdzielczość, [moce]), ...]}."""
+    parts = ['<GL_MarketDocument xmlns="urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0">']
+    for psr_type, periods in series.items():
+        parts.append(f"<TimeSeries><MktPSRType><psrType>{psr_type}</psrType></MktPSRType>")
+        for start, resolution, values in periods:
+            points = ''.join(f"<Point><position>{position}</position><quantity>{value}</quantity></Point>"
+                             for position, value in enumerate(values, 1))
+            parts.append(f"<Period><timeInterval><start>{start}</start></timeInterval>"
+                         f"<resolution>{resolution}</resolution>{points}</Period>")
+        parts.append("</TimeSeries>")
+    parts.append('</GL_MarketDocument>')
+    return ''.join(parts).encode('utf-8')
+
+
+def _tree_points(xml_content: bytes) -> dict:
+    """Punkty dokumentu odczytane pełnym drzewem XML: {psrType: {czas UTC: moc}}."""
+    root = ET.fromstring(xml_content)
+    namespace = {'ns': root.tag[1:].partition('}')[0]}
+    points = {}
+    for series in root.findall('ns:TimeSeries', namespace):
+        psr_type = series.find('ns:MktPSRType/ns:psrType', namespace).text
+        for period in series.findall('ns:Period', namespace):
+            start = pd.Timestamp(period.find('ns:timeInterval/ns:start', namespace).text)
+            minutes = ENTSOEDataFetcher._parse_resolution(period.find('ns:resolution', namespace).text)
+            for point in period.findall('ns:Point', namespace):
+                position = int(point.find('ns:position', namespace).text)
+                time = start + pd.Timedelta(minutes=(position - 1) * minutes)
+                points.setdefault(psr_type, {})[time] = float(point.find('ns:quantity', namespace).text)
+    return points
+
+
+def test_stream_parser_matches_tree():
+    """Parser strumieniowy (iterparse) zwraca te same punkty co pełne drzewo XML"""
+    xml_content = _fixture()
+    expected = _tree_points(xml_content)
+    series = ENTSOEDataFetcher._parse_a75_stream(xml_content)
+
+    assert set(series) == set(expected)
+    for psr_type, periods in series.items():
+        parsed = {}
+        for start_time, minutes, positions, quantities in periods:
+            for position, quantity in zip(positions, quantities):
+                parsed[pd.Timestamp(start_time) + pd.Timedelta(minutes=int(position - 1) * minutes)] = quantity
+        assert parsed == expected[psr_type], psr_type
+
+
+def test_fixture_frame():
+    """Doba z fixture'u: 96 kwadransów czasu polskiego, kolumny typów produkcji i suma wody"""
+    df = ENTSOEDataFetcher._parse_xml_response(_fixture(), '2024-06-14', '2024-06-14')
+
+    assert len(df) == 96
+    assert str(df['Data'].dt.tz) == 'Europe/Warsaw'
+    assert df['Data'].iloc[0] == pd.Timestamp('2024-06-14 00:00', tz='Europe/Warsaw')
+    assert df['Data'].iloc[-1] == pd.Timestamp('2024-06-14 23:45', tz='Europe/Warsaw')
+    assert set(ENTSOEDataFetcher.COLUMN_PSR_TYPES) <= set(df.columns)
+    np.testing.assert_allclose(df['Woda [MW]'], df['Woda (przepływowa) [MW]'] + df['Woda (zbiornikowa) [MW]'])
+    assert not df.isna().any().any()
+
+
+def test_mixed_resolution_periods():
+    """Timestampy Period liczone z rozdzielczości (PT60M i PT15M), pierwsza wartość przy powtórzeniu"""
+    xml_content = _a75_document({
+        'B19': [('2024-06-13T22:00Z', 'PT60M', [100, 200]),
+                ('2024-06-14T00:00Z', 'PT15M', [300, 310, 320, 330]),
+                ('2024-06-14T00:45Z', 'PT15M', [999, 340])],
+        'B16': [('2024-06-13T22:00Z', 'PT15M', [1, 2, 3, 4, 5, 6, 7, 8])],
+    })
+    df = ENTSOEDataFetcher._parse_xml_response(xml_content, '2024-06-14', '2024-06-14')
+    wind = df.set_index(df['Data'].dt.tz_convert('UTC'))['Wiatr lądowy [MW]']
+
+    expected = {'2024-06-13 22:00': 100, '2024-06-13 23:00': 200, '2024-06-14 00:00': 300,
+                '2024-06-14 00:15': 310, '2024-06-14 00:45': 330, '2024-06-14 01:00': 340}
+    for time, value in expected.items():
+        assert wind[pd.Timestamp(time, tz='UTC')] == value, time
+    # Kwadranse między punktami PT60M nie mają wartości wiatru - wypełnione zerem jak brakujące typy
+    assert wind[pd.Timestamp('2024-06-13 22:15', tz='UTC')] == 0
+    assert df['Data'].is_monotonic_increasing and not df['Data'].duplicated().any()
+    assert (df['Gaz [MW]'] == 0).all()
+
+
+def test_column_projection():
+    """Projekcja kolumn: tylko wybrane kolumny, typy nieobecne w dokumencie wypełnione zerami"""
+    xml_content = _a75_document({'B19': [('2024-06-13T22:00Z', 'PT15M', list(range(96)))]})
+    df = ENTSOEDataFetcher._parse_xml_response(xml_content, '2024-06-14', '2024-06-14',
+                                               columns=['Wiatr lądowy [MW]', 'Woda [MW]', 'Gaz [MW]'])
+
+    assert set(df.columns) == {'Data', 'Wiatr lądowy [MW]', 'Woda [MW]', 'Gaz [MW]'}
+    assert len(df) == 96 and df['Wiatr lądowy [MW]'].tolist() == list(range(96))
+    assert (df['Woda [MW]'] == 0).all() and (df['Gaz [MW]'] == 0).all()
+
+    full = ENTSOEDataFetcher._parse_xml_response(_fixture(), '2024-06-14', '2024-06-14')
+    projected = ENTSOEDataFetcher._parse_xml_response(_fixture(), '2024-06-14', '2024-06-14',
+                                                      columns=['Woda [MW]', 'Słońce [MW]'])
+    pd.testing.assert_frame_equal(projected, full[['Data', 'Woda [MW]', 'Słońce [MW]']], check_like=True)
+
+
+def test_invalid_document():
+    """Niepoprawny XML - None zamiast wyjątku"""
+    assert ENTSOEDataFetcher._parse_xml_response(b'<GL_MarketDocument><TimeSeries>', '2024-06-14', '2024-06-14') is None
+
+
+CHECKS = [
+    test_stream_parser_matches_tree,
+    test_fixture_frame,
+    test_mixed_resolution_periods,
+    test_column_projection,
+    test_invalid_document,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Parsowanie XML A75 ENTSO-E", CHECKS))
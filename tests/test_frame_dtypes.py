@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test kompaktowego układu typów kolumn (frame_dtypes.py).
+
+Użycie:
+    python tests/test_frame_dtypes.py
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from checks import replay_server, run_checks
+from combined_energy_data import CombinedEnergyDataFetcher
+from entsoe_data_fetcher import ENTSOEDataFetcher
+from frame_dtypes import compact_frame, dst_marker_names, frame_memory_mb
+from pse_energy_scraper import EnergyDataAnalyzer, PSEEnergyDataFetcher
+from replay_server import ReplayFixtures
+
+
+def _pse_dst_day() -> pd.DataFrame:
+    fetcher = PSEEnergyDataFetcher(use_cache=False)
+    df = fetcher._parse_data({'value': ReplayFixtures().pse_rows('2024-10-27', '2024-10-27')})
+    df['Źródło'] = 'PSE'
+    return df
+
+
+def test_compact_dtypes():
+    """Układ kompaktowy: float32, marker int8, publication_ts jako czas, tekst jako category; idempotentny"""
+    df = _pse_dst_day()
+    compact = compact_frame(df, drop_columns=PSEEnergyDataFetcher.COMPACT_DROP_COLUMNS)
+
+    assert not set(PSEEnergyDataFetcher.COMPACT_DROP_COLUMNS) & set(compact.columns)
+    assert compact['Zapotrzebowanie na moc [MW]'].dtype == np.float32
+    assert compact['_dst_marker'].dtype == np.int8
+    assert compact['_dst_marker'].value_counts().to_dict() == {0: 92, 1: 4, 2: 4}
+    assert pd.api.types.is_datetime64_any_dtype(compact['publication_ts'])
+    assert isinstance(compact['Źródło'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_series_equal(compact['Data_UTC'], df['Data_UTC'])
+    np.testing.assert_allclose(compact['Zapotrzebowanie na moc [MW]'], df['Zapotrzebowanie na moc [MW]'], rtol=1e-6)
+
+    pd.testing.assert_frame_equal(compact_frame(compact), compact)
+    assert frame_memory_mb(compact) < frame_memory_mb(df) / 2
+
+
+def test_dst_marker_codes():
+    """Kody markerów DST zamieniane z powrotem na nazwy - czas UTC z kodów jak z nazw"""
+    df = _pse_dst_day()
+    compact = compact_frame(df)
+
+    assert list(dst_marker_names(compact['_dst_marker'])) == list(df['_dst_marker'])
+    assert list(dst_marker_names(['', 'first', 'second'])) == ['', 'first', 'second']
+    pd.testing.assert_series_equal(PSEEnergyDataFetcher.local_to_utc(compact['Data'], compact['_dst_marker']),
+                                   df['Data_UTC'], check_names=False)
+
+
+def test_compact_fetch_sums():
+    """Połączone pobieranie w układzie kompaktowym: te same kwadranse, sumy jak w pełnym układzie"""
+    with replay_server():
+        full = CombinedEnergyDataFetcher().fetch_combined_data('2024-10-26', '2024-10-28')
+        compact = CombinedEnergyDataFetcher(compact_dtypes=True).fetch_combined_data('2024-10-26', '2024-10-28')
+
+    assert len(compact) == len(full) == 3 * 96 + 4
+    pd.testing.assert_series_equal(compact['Data_UTC'], full['Data_UTC'])
+    dropped = PSEEnergyDataFetcher.COMPACT_DROP_COLUMNS + ENTSOEDataFetcher.COMPACT_DROP_COLUMNS
+    assert not set(dropped) & set(compact.columns)
+
+    columns = ['Zapotrzebowanie na moc [MW]', 'Wiatr lądowy [MW]', 'Krajowe saldo wymiany międzysystemowej [MW]']
+    assert all(compact[column].dtype == np.float32 for column in columns)
+    np.testing.assert_allclose(compact[columns].sum(), full[columns].sum(), rtol=1e-6)
+
+    sums_full = EnergyDataAnalyzer(full).sum_period()
+    sums_compact = EnergyDataAnalyzer(compact).sum_period()
+    assert sums_compact.keys() == sums_full.keys()
+    for key, value in sums_full.items():
+        if isinstance(value, float):
+            np.testing.assert_allclose(sums_compact[key], value, rtol=1e-6, err_msg=key)
+
+
+CHECKS = [
+    test_compact_dtypes,
+    test_dst_marker_codes,
+    test_compact_fetch_sums,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Kompaktowy układ typów", CHECKS))
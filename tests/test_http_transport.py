@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test wspólnego transportu HTTP (offline, przez serwer odtwarzający).
+
+Użycie:
+    python tests/test_http_transport.py
+"""
+
+import sys
+import time
+from email.utils import formatdate
+
+import requests
+
+from checks import replay_server, run_checks
+
+import http_transport
+from entsoe_data_fetcher import ENTSOEDataFetcher
+from http_transport import (HTTPClient, clear_rate_limit, rate_limiter, retry_after_seconds, set_rate_limit,
+                            shared_session)
+from instrumentation import metrics
+from pse_energy_scraper import PSEEnergyDataFetcher
+
+
+def test_fetchers_share_session():
+    """Fetchery PSE i ENTSO-E oraz kolejne instancje korzystają z jednej sesji HTTP"""
+    with replay_server():
+        clients = [fetcher.session for fetcher in (PSEEnergyDataFetcher(use_cache=False),
+                                                   PSEEnergyDataFetcher(use_cache=False), ENTSOEDataFetcher())]
+        sessions = {id(client.session) for client in [*clients, HTTPClient()]}
+    assert sessions == {id(shared_session())}
+
+
+def test_larger_pool_remounts_adapters():
+    """Większa pula wymienia adaptery i zamyka połączenia poprzednich, mniejsza używa istniejącej"""
+    with replay_server() as server:
+        client = HTTPClient()
+        assert client.get(f"{server.url}/unknown").status_code == 404
+        previous = client.session.get_adapter(server.url)
+        assert previous.poolmanager.pools
+
+        pool_size = http_transport._pool_size
+        HTTPClient(pool_size=pool_size + 4)
+        adapter = client.session.get_adapter(server.url)
+        assert adapter is not previous and adapter._pool_maxsize == pool_size + 4
+        assert not previous.poolmanager.pools
+
+        HTTPClient(pool_size=1)
+        assert client.session.get_adapter(server.url) is adapter
+
+
+def test_client_headers_per_request():
+    """Nagłówki klienta dołączane do jego zapytań, bez zmiany nagłówków wspólnej sesji"""
+    with replay_server() as server:
+        first = HTTPClient(headers={'User-Agent': 'klient-1', 'Accept': 'application/json'})
+        second = HTTPClient(headers={'User-Agent': 'klient-2'})
+        sent_first = first.get(f"{server.url}/unknown").request.headers
+        sent_second = second.get(f"{server.url}/unknown", headers={'Accept': 'text/xml'}).request.headers
+
+    assert sent_first['User-Agent'] == 'klient-1' and sent_first['Accept'] == 'application/json'
+    assert sent_second['User-Agent'] == 'klient-2' and sent_second['Accept'] == 'text/xml'
+    assert sent_first['Accept-Encoding'] == 'gzip, deflate'
+    assert shared_session().headers['User-Agent'] not in ('klient-1', 'klient-2')
+
+
+def _response(retry_after=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 429
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+
+def _counter(name: str, **labels) -> float:
+    return sum(counter['value'] for counter in metrics.snapshot()['counters']
+               if counter['name'] == name and labels.items() <= counter['labels'].items())
+
+
+def test_retry_after_parsing():
+    """Retry-After: sekundy lub data HTTP, ograniczone do maksimum; niepoprawne wartości ignorowane"""
+    assert retry_after_seconds(_response('5')) == 5
+    assert retry_after_seconds(_response('86400'), maximum=30) == 30
+    assert retry_after_seconds(_response('-3')) == 0
+    assert retry_after_seconds(_response(formatdate(time.time() - 3600, usegmt=True))) == 0
+    assert 5 < retry_after_seconds(_response(formatdate(time.time() + 10, usegmt=True))) <= 10
+    for value in (None, '', 'nan', 'soon'):
+        assert retry_after_seconds(_response(value)) is None, value
+
+
+def test_shared_rate_limit():
+    """Limit hosta wspólny dla fetcherów: zachowany niższy budżet, None bez zmian, replace i usunięcie"""
+    host = 'limit.example.test'
+    try:
+        set_rate_limit(host, 10)
+        set_rate_limit(host, 20)
+        set_rate_limit(host, None)
+        assert rate_limiter(host).rate == 10
+        set_rate_limit(host, 4)
+        assert rate_limiter(host).rate == 4
+        set_rate_limit(host, 20, replace=True)
+        assert rate_limiter(host).rate == 20 and rate_limiter(host).burst == 20
+    finally:
+        clear_rate_limit(host)
+    assert rate_limiter(host) is None
+
+    # Budżet 20/s i burst 1: pięć żetonów to co najmniej cztery odstępy po 50 ms
+    set_rate_limit(host, 20, burst=1)
+    try:
+        start = time.monotonic()
+        for _ in range(5):
+            rate_limiter(host).acquire()
+        assert time.monotonic() - start >= 0.19
+    finally:
+        clear_rate_limit(host)
+
+
+def test_throttled_requests_retried():
+    """Odpowiedzi 429 z serwera ponawiane po Retry-After - wszystkie zapytania kończą się sukcesem"""
+    retries = _counter('http_retries', source='retry-check')
+    with replay_server(rate_limit=3) as server:
+        client = HTTPClient(source='retry-check', max_retries=4)
+        statuses = [client.get(f"{server.pse_base_url}/his-wlk-cal",
+                               params={'$filter': "business_date eq '2024-06-14'"}).status_code
+                    for _ in range(6)]
+
+    assert statuses == [200] * 6
+    assert server.stats['throttled'] >= 1
+    assert _counter('http_retries', source='retry-check') - retries == server.stats['throttled']
+
+
+CHECKS = [
+    test_fetchers_share_session,
+    test_larger_pool_remounts_adapters,
+    test_client_headers_per_request,
+    test_retry_after_parsing,
+    test_shared_rate_limit,
+    test_throttled_requests_retried,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Wspólny transport HTTP", CHECKS))
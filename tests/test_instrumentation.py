@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test pomiarów czasu i liczników (instrumentation.py).
+
+Użycie:
+    python tests/test_instrumentation.py
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import requests
+import urllib3
+
+from checks import replay_server, run_checks
+from http_transport import wire_bytes
+from instrumentation import Metrics, metrics
+from pse_energy_scraper import PSEEnergyDataFetcher
+
+
+def test_spans_and_counters():
+    """Spany (także przerwane wyjątkiem i z dekoratora) oraz liczniki z etykietami w migawce"""
+    registry = Metrics()
+    registry.record('parse', 0.5, source='pse')
+    registry.record('parse', 0.25, source='pse')
+    try:
+        with registry.span('merge', source='combined'):
+            raise RuntimeError('przerwany etap')
+    except RuntimeError:
+        pass
+
+    @registry.timed('validate')
+    def validate(value):
+        return value * 2
+
+    assert validate(21) == 42 and validate.__name__ == 'validate'
+    registry.count('cache_hits', source='pse')
+    registry.count('bytes_received', 2048, source='pse')
+    registry.count('bytes_received', 1024, source='pse')
+
+    snapshot = registry.snapshot()
+    spans = {(span['name'], tuple(span['labels'].items())): span for span in snapshot['spans']}
+    parse = spans[('parse', (('source', 'pse'),))]
+    assert (parse['count'], parse['total'], parse['min'], parse['max']) == (2, 0.75, 0.25, 0.5)
+    assert spans[('merge', (('source', 'combined'),))]['count'] == 1
+    assert spans[('validate', ())]['count'] == 1
+    assert {(c['name'], c['value']) for c in snapshot['counters']} == {('cache_hits', 1), ('bytes_received', 3072)}
+
+    table = registry.summary_table()
+    assert 'parse (pse)' in table and 'bytes_received (pse)' in table
+    registry.reset()
+    assert 'Brak pomiarów' in registry.summary_table()
+
+
+def test_counts_from_threads():
+    """Liczniki i spany z wielu wątków bez utraconych aktualizacji"""
+    registry = Metrics()
+
+    def work():
+        for _ in range(1000):
+            registry.count('requests', source='pse')
+            registry.record('request', 0.001, source='pse')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'][0]['value'] == 8000
+    assert snapshot['spans'][0]['count'] == 8000
+
+
+def test_export_formats():
+    """Eksport: format tekstowy Prometheus (.prom) i JSON (inne rozszerzenia)"""
+    registry = Metrics()
+    registry.record('http_request', 1.5, source='entsoe')
+    registry.count('http_responses', source='entsoe', status=200)
+    registry.count('bytes_received', 12345678, source='entsoe')
+
+    lines = registry.to_prometheus().splitlines()
+    assert 'energy_span_seconds_sum{span="http_request",source="entsoe"} 1.500000' in lines
+    assert 'energy_span_seconds_count{span="http_request",source="entsoe"} 1' in lines
+    assert '# TYPE energy_http_responses_total counter' in lines
+    assert 'energy_http_responses_total{source="entsoe",status="200"} 1' in lines
+    assert 'energy_bytes_received_total{source="entsoe"} 12345678' in lines
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry.write(os.path.join(tmp_dir, 'metrics.prom'))
+        registry.write(os.path.join(tmp_dir, 'metrics.json'))
+        with open(os.path.join(tmp_dir, 'metrics.prom'), encoding='utf-8') as f:
+            assert f.read() == registry.to_prometheus()
+        with open(os.path.join(tmp_dir, 'metrics.json'), encoding='utf-8') as f:
+            data = json.load(f)
+    assert data['spans'][0]['labels'] == {'source': 'entsoe'}
+    assert {c['name']: c['value'] for c in data['counters']} == {'http_responses': 1, 'bytes_received': 12345678}
+
+
+def test_wire_bytes():
+    """Bajty odpowiedzi liczone przed dekompresją gzip: z Content-Length, bez niego z połączenia"""
+    body = json.dumps({'value': [{'wi': 1234.5}] * 500}).encode()
+    compressed = gzip.compress(body)
+
+    def response(headers: dict) -> requests.Response:
+        raw = urllib3.HTTPResponse(body=io.BytesIO(compressed), headers=headers, preload_content=False)
+        result = requests.Response()
+        result.raw, result.status_code = raw, 200
+        result.headers = requests.structures.CaseInsensitiveDict(headers)
+        return result
+
+    chunked = response({'Content-Encoding': 'gzip'})
+    assert chunked.content == body and wire_bytes(chunked) == len(compressed) < len(body)
+    assert wire_bytes(response({'Content-Encoding': 'gzip', 'Content-Length': str(len(compressed))})) == len(compressed)
+
+
+def test_fetcher_records_metrics():
+    """Pobieranie PSE rejestruje we wspólnym rejestrze czasy zapytań i parsowania oraz liczniki odpowiedzi"""
+    metrics.reset()
+    with replay_server():
+        PSEEnergyDataFetcher(use_cache=False).fetch_data('2024-06-13', '2024-06-14')
+
+    snapshot = metrics.snapshot()
+    spans = {span['name']: span for span in snapshot['spans'] if span['labels'].get('source') == 'pse'}
+    assert spans['http_request']['count'] == 2
+    assert spans['parse']['count'] == 2 and spans['fetch']['count'] == 1
+    responses = [c for c in snapshot['counters'] if c['name'] == 'http_responses']
+    assert [(c['labels'], c['value']) for c in responses] == [({'source': 'pse', 'status': 200}, 2)]
+
+
+CHECKS = [
+    test_spans_and_counters,
+    test_counts_from_threads,
+    test_export_formats,
+    test_wire_bytes,
+    test_fetcher_records_metrics,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Pomiary czasu i liczniki", CHECKS))
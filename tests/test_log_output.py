@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test komunikatów przez logging: tryb cichy, poziomy, zdarzenia postępu (log_output.py).
+
+Użycie:
+    python tests/test_log_output.py
+"""
+
+import contextlib
+import io
+import logging
+import os
+import pickle
+import subprocess
+import sys
+
+from checks import ROOT_DIR, replay_server, run_checks
+from combined_energy_data import CombinedEnergyDataFetcher
+from log_output import configure_output, emit_progress, get_logger, is_quiet, portable_records, replay
+
+
+class Collect(logging.Handler):
+    """Handler aplikacji zbierający komunikaty."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@contextlib.contextmanager
+def app_handler(logger_name: str = ''):
+    handler = Collect()
+    logger = logging.getLogger(logger_name)
+    logger.addHandler(handler)
+    try:
+        yield handler
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_quiet_fetch_has_no_output():
+    """Tryb cichy: pobieranie bez wyjścia na konsolę, komunikaty trafiają do handlerów aplikacji"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with replay_server(), app_handler() as handler, \
+            contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        df = CombinedEnergyDataFetcher().fetch_combined_data('2024-06-13', '2024-06-14')
+
+    assert is_quiet() and len(df) == 2 * 96
+    assert stdout.getvalue() == '' and stderr.getvalue() == ''
+    assert any(record.name == 'energia.pse' for record in handler.records)
+    assert any(record.name == 'energia.entsoe' for record in handler.records)
+
+
+def test_console_level():
+    """Komunikaty na stdout w dotychczasowej postaci, poziom WARNING pomija informacje"""
+    output = io.StringIO()
+    try:
+        configure_output(quiet=False)
+        with contextlib.redirect_stdout(output):
+            get_logger('pse').info('📊 informacja')
+            configure_output(level='WARNING')
+            get_logger('pse').info('📊 pominięta informacja')
+            get_logger('entsoe').warning('⚠️  ostrzeżenie')
+    finally:
+        configure_output(level='INFO', quiet=True)
+
+    assert output.getvalue() == '📊 informacja\n⚠️  ostrzeżenie\n'
+    assert logging.getLogger('energia').level == logging.INFO
+
+
+def test_progress_callback_errors():
+    """Błąd w callbacku postępu nie przerywa pobierania - jest tylko logowany"""
+    events = []
+    emit_progress(events.append, source='pse', event='day', done=1, total=2)
+    emit_progress(None, source='pse', event='day', done=2, total=2)
+    assert events == [{'source': 'pse', 'event': 'day', 'done': 1, 'total': 2}]
+
+    def failing(event):
+        raise RuntimeError('błąd aplikacji')
+
+    with app_handler('energia') as handler:
+        emit_progress(failing, source='pse', event='day', done=1, total=2)
+    assert [record.getMessage() for record in handler.records] == ['⚠️  Błąd w callbacku postępu: błąd aplikacji']
+
+
+def test_records_between_processes():
+    """Komunikaty procesu roboczego: sformatowane, bez wyjątków, odtwarzane w loggerach źródła"""
+    logger = get_logger('entsoe')
+    try:
+        raise ValueError('niepoprawny XML')
+    except ValueError:
+        record = logger.makeRecord(logger.name, logging.WARNING, __file__, 0, '⚠️  Fragment %s: %s',
+                                   ('2024-06-01', 'błąd'), sys.exc_info())
+
+    records = pickle.loads(pickle.dumps(portable_records([record])))
+    assert records[0].msg == '⚠️  Fragment 2024-06-01: błąd' and records[0].exc_info is None
+
+    debug = logger.makeRecord(logger.name, logging.DEBUG, __file__, 0, 'szczegóły', None, None)
+    with app_handler('energia') as handler:
+        replay(records + [debug])
+    assert [record.getMessage() for record in handler.records] == ['⚠️  Fragment 2024-06-01: błąd']
+
+
+def test_environment_variables():
+    """ENERGY_QUIET i ENERGY_LOG_LEVEL ustawiają tryb cichy i poziom przy imporcie"""
+    env = {**os.environ, 'ENERGY_QUIET': 'tak', 'ENERGY_LOG_LEVEL': 'warning'}
+    script = ("import logging, log_output; "
+              "print(log_output.is_quiet(), logging.getLogger('energia').level == logging.WARNING)")
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                            cwd=os.path.join(ROOT_DIR, 'src'))
+    assert result.stdout.strip() == 'True True', result.stderr
+
+
+CHECKS = [
+    test_quiet_fetch_has_no_output,
+    test_console_level,
+    test_progress_callback_errors,
+    test_records_between_processes,
+    test_environment_variables,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Komunikaty i zdarzenia postępu", CHECKS))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test pobierania danych PSE dzień po dniu (offline, przez serwer odtwarzający).
+
+Użycie:
+    python tests/test_pse_fetcher.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from checks import record_params, replay_server, run_checks
+from data_cache import PSEDayCache
+from pse_energy_scraper import PSEEnergyDataFetcher
+
+
+def test_concurrent_days_match_sequential():
+    """Równoległe pobieranie dni daje te same dane co sekwencyjne, w kolejności dat"""
+    with replay_server() as server:
+        events = []
+        fetcher = PSEEnergyDataFetcher(use_cache=False, base_url=server.pse_base_url,
+                                       progress_callback=events.append)
+        parallel = fetcher.fetch_data('2024-06-10', '2024-06-14', max_workers=4)
+        sequential = fetcher.fetch_data('2024-06-10', '2024-06-14', max_workers=1)
+
+    assert len(parallel) == 5 * 96
+    assert parallel['Data_UTC'].is_monotonic_increasing
+    assert parallel['Data'].iloc[0] == pd.Timestamp('2024-06-10 00:00')
+    assert parallel['Data'].iloc[-1] == pd.Timestamp('2024-06-14 23:45')
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+    # Zdarzenia postępu: po jednym na dzień, w kolejności dat
+    first_run = events[:5]
+    assert [event['date'] for event in first_run] == [f'2024-06-{day}' for day in range(10, 15)]
+    assert [event['done'] for event in first_run] == [1, 2, 3, 4, 5]
+    assert all(event['ok'] and event['total'] == 5 for event in first_run)
+
+
+def test_select_trims_payload():
+    """Zapytania zawierają $select z polami mapowanymi przez parser i publication_ts"""
+    with replay_server() as server:
+        fetcher = PSEEnergyDataFetcher(use_cache=False, base_url=server.pse_base_url)
+        sent = record_params(fetcher)
+        df = fetcher.fetch_data('2024-06-13', '2024-06-14')
+
+    assert len(sent) == 2
+    assert all(params['$select'] == ','.join(PSEEnergyDataFetcher.SELECT_FIELDS) for params in sent)
+    assert 'publication_ts' in df.columns
+    assert not {'business_date', 'dtime_utc'} & set(df.columns)
+
+
+def test_volatile_day_delta_refresh():
+    """Dzień ulotny odświeżany przyrostowo: publication_ts gt <high-water mark>, dane bez zmian"""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as cache_dir, replay_server() as server:
+        cache = PSEDayCache(cache_dir, volatile_ttl=60)
+        fetcher = PSEEnergyDataFetcher(cache=cache, base_url=server.pse_base_url)
+        sent = record_params(fetcher)
+        first = fetcher.fetch_data(yesterday, yesterday)
+
+        # Wpis dnia ulotnego wygasł - kolejne pobranie pyta tylko o nowsze publikacje
+        path = cache._path(yesterday, volatile=True)
+        mtime = time.time() - 120
+        os.utime(path, (mtime, mtime))
+        second = fetcher.fetch_data(yesterday, yesterday)
+
+    assert first is not None and len(sent) == 2
+    assert 'publication_ts' not in sent[0]['$filter']
+    high_water_mark = str(first['publication_ts'].max())
+    assert f"publication_ts gt '{high_water_mark}'" in sent[1]['$filter']
+    pd.testing.assert_frame_equal(first.reset_index(drop=True), second.reset_index(drop=True))
+
+
+def test_merge_delta_replaces_revisions():
+    """Poprawiona publikacja kwadransa zastępuje poprzednią wersję, nowe kwadranse są dopisywane"""
+    times = pd.date_range('2024-06-14 00:00', periods=3, freq='15min', tz='UTC')
+    base = pd.DataFrame({'Data_UTC': times, 'Zapotrzebowanie na moc [MW]': [1.0, 2.0, 3.0],
+                         'publication_ts': ['2024-06-14 00:32'] * 3})
+    delta = pd.DataFrame({'Data_UTC': [times[1], times[2] + pd.Timedelta(minutes=15)],
+                          'Zapotrzebowanie na moc [MW]': [20.0, 4.0],
+                          'publication_ts': ['2024-06-14 01:02', '2024-06-14 01:17']})
+
+    merged = PSEEnergyDataFetcher._merge_delta(base, delta)
+    assert merged['Zapotrzebowanie na moc [MW]'].tolist() == [1.0, 20.0, 3.0, 4.0]
+    assert merged['Data_UTC'].is_monotonic_increasing
+    assert PSEEnergyDataFetcher._high_water_mark(merged) == '2024-06-14 01:17'
+
+
+CHECKS = [
+    test_concurrent_days_match_sequential,
+    test_select_trims_payload,
+    test_volatile_day_delta_refresh,
+    test_merge_delta_replaces_revisions,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Pobieranie danych PSE (serwer odtwarzający)", CHECKS))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test śledzenia bieżącej doby PSE (offline, odpowiedzi API z kolejki).
+
+Użycie:
+    python tests/test_pse_live_tail.py
+"""
+
+import sys
+
+from checks import run_checks
+from pse_energy_scraper import PSEEnergyDataFetcher
+from pse_live_tail import PSELiveTail
+from replay_server import ReplayFixtures
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+class FakeSession:
+    """Sesja HTTP zwracająca kolejne odpowiedzi z listy i zapisująca parametry zapytań."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.params = []
+
+    def get(self, url, params=None, timeout=None):
+        self.params.append(params)
+        return self.responses.pop(0)
+
+
+def _tail(responses) -> tuple:
+    fetcher = PSEEnergyDataFetcher(use_cache=False)
+    session = FakeSession(responses)
+    fetcher.session = session
+    batches = []
+    return PSELiveTail(fetcher, callback=batches.append), session, batches
+
+
+def test_emits_new_and_revised_slots():
+    """Kwadranse emitowane raz, ponownie tylko po nowszej publikacji; kolejne zapytanie od high-water mark"""
+    rows = ReplayFixtures().pse_rows('2024-06-14', '2024-06-14')
+    revised = dict(rows[40], publication_ts='2024-06-15 08:00:00.000', demand=rows[40]['demand'] + 100)
+    tail, session, batches = _tail([FakeResponse({'value': rows}), FakeResponse({'value': [revised]}),
+                                    FakeResponse({'value': []})])
+
+    assert len(tail._poll_day('2024-06-14', closing=True)) == 96
+    assert "publication_ts" not in session.params[0]['$filter']
+
+    again = tail._poll_day('2024-06-14', closing=True)
+    assert len(again) == 1 and again['Data_UTC'].iloc[0] == tail.frame['Data_UTC'].iloc[40]
+    assert tail.frame['Zapotrzebowanie na moc [MW]'].iloc[40] == revised['demand']
+    assert session.params[1]['$filter'] == (
+        "business_date eq '2024-06-14' and publication_ts gt '2024-06-15 00:17:00.000'")
+
+    assert tail._poll_day('2024-06-14', closing=True).empty
+    assert "'2024-06-15 08:00:00.000'" in session.params[2]['$filter']
+    assert [len(batch) for batch in batches] == [96, 1]
+    assert len(tail.frame) == 96 and len(tail.emitted) == 96
+
+
+def test_invalid_response_skipped():
+    """Niepoprawny JSON lub błąd HTTP - odpytanie pominięte, bez wyjątku i bez zmiany stanu"""
+    rows = ReplayFixtures().pse_rows('2024-06-14', '2024-06-14')
+    tail, session, batches = _tail([FakeResponse(ValueError('Expecting value')), FakeResponse(status_code=503),
+                                    FakeResponse({'value': rows})])
+
+    assert tail._poll_day('2024-06-14', closing=True).empty
+    assert tail._poll_day('2024-06-14', closing=True).empty
+    assert batches == [] and tail._high_water_mark is None
+    assert len(tail._poll_day('2024-06-14', closing=True)) == 96
+
+
+CHECKS = [
+    test_emits_new_and_revised_slots,
+    test_invalid_response_skipped,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Śledzenie bieżącej doby PSE", CHECKS))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test parsowania odpowiedzi /his-wlk-cal PSE (offline, nagrany fixture i dni zmiany czasu).
+
+Użycie:
+    python tests/test_pse_parser.py
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+from checks import FIXTURES_DIR, run_checks
+from pse_energy_scraper import PSEEnergyDataFetcher
+from replay_server import ReplayFixtures
+
+
+FIXTURE_JSON = os.path.join(FIXTURES_DIR, 'pse_his_wlk_cal_2024-06-14.json')
+
+
+def _parse(rows: list) -> pd.DataFrame:
+    return PSEEnergyDataFetcher(use_cache=False)._parse_data({'value': rows})
+
+
+def test_fixture_frame():
+    """Doba z fixture'u: 96 kwadransów od 00:00 (początek przedziału), suma sald wymiany"""
+    with open(FIXTURE_JSON, encoding='utf-8') as f:
+        rows = json.load(f)['value']
+    df = _parse(rows)
+
+    assert len(df) == 96
+    assert df['Data'].iloc[0] == pd.Timestamp('2024-06-14 00:00')
+    assert df['Data'].iloc[-1] == pd.Timestamp('2024-06-14 23:45')
+    assert (df['Data'].diff().dropna() == pd.Timedelta(minutes=15)).all()
+    assert (df['_dst_marker'] == '').all()
+    saldo = df['Krajowe saldo wymiany międzysystemowej [MW]']
+    pd.testing.assert_series_equal(saldo, df['Krajowe saldo wymiany międzysystemowej - równoległa [MW]']
+                                   + df['Krajowe saldo wymiany międzysystemowej - nierównoległa [MW]'],
+                                   check_names=False)
+
+
+def test_dst_markers():
+    """Dni zmiany czasu: markery 02a/02b rozpoznane, 100 i 92 kwadranse bez utraty wierszy"""
+    fixtures = ReplayFixtures()
+
+    autumn = _parse(fixtures.pse_rows('2024-10-27', '2024-10-27'))
+    assert len(autumn) == 100
+    assert autumn['_dst_marker'].value_counts().to_dict() == {'': 92, 'first': 4, 'second': 4}
+    # Powtórzona godzina: te same czasy lokalne, różne czasy UTC
+    repeated = autumn[autumn['_dst_marker'] != '']
+    assert repeated['Data'].nunique() == 4 and repeated['Data_UTC'].nunique() == 8
+
+    spring = _parse(fixtures.pse_rows('2024-03-31', '2024-03-31'))
+    assert len(spring) == 92 and (spring['_dst_marker'] == '').all()
+
+
+def test_fallback_format_matches():
+    """dtime w nietypowym formacie (bez sekund) parsowany wolniejszą ścieżką daje ten sam wynik"""
+    rows = ReplayFixtures().pse_rows('2024-10-27', '2024-10-27')
+    short = [dict(row, dtime=row['dtime'][:-3]) for row in rows]
+    pd.testing.assert_frame_equal(_parse(short), _parse(rows))
+
+
+def test_utc_key():
+    """Data_UTC: czas UTC początku przedziału (z dtime_utc API), unikalny i co 15 min także w dniu zmiany czasu"""
+    for day in ('2024-06-14', '2024-10-27', '2024-03-31'):
+        rows = ReplayFixtures().pse_rows(day, day)
+        df = _parse(rows)
+        assert str(df['Data_UTC'].dt.tz) == 'UTC', day
+        expected = pd.to_datetime([row['dtime_utc'] for row in rows]).tz_localize('UTC') - pd.Timedelta(minutes=15)
+        assert (df['Data_UTC'].to_numpy() == expected.to_numpy()).all(), day
+        assert (df['Data_UTC'].diff().dropna() == pd.Timedelta(minutes=15)).all(), day
+        # Data - ten sam początek przedziału w czasie lokalnym (także na granicy zmiany czasu)
+        pd.testing.assert_series_equal(df['Data'], df['Data_UTC'].dt.tz_convert('Europe/Warsaw').dt.tz_localize(None),
+                                       check_names=False)
+
+
+CHECKS = [
+    test_fixture_frame,
+    test_dst_markers,
+    test_fallback_format_matches,
+    test_utc_key,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Parsowanie danych PSE", CHECKS))
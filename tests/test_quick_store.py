@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test odczytu z lokalnego magazynu w scripts/quick.py (--store) przez serwer odtwarzający.
+
+Użycie:
+    python tests/test_quick_store.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from checks import replay_server, run_checks
+from energy_store import EnergyDataStore
+import quick
+
+
+SOURCE_COLUMNS = {'pse': ['Zapotrzebowanie na moc [MW]'], 'entsoe': ['Wiatr lądowy [MW]']}
+
+
+def _closed_days(date_from: str, date_to: str) -> pd.DataFrame:
+    """Dane obu źródeł co 15 min dla zamkniętych dni (czas polski, z Data_UTC)."""
+    start = pd.Timestamp(date_from, tz='Europe/Warsaw')
+    end = pd.Timestamp(date_to, tz='Europe/Warsaw') + pd.DateOffset(days=1)
+    times = pd.date_range(start, end, freq='15min', inclusive='left')
+    df = pd.DataFrame({'Data': times.tz_localize(None), 'Data_UTC': times.tz_convert('UTC')})
+    for column in sum(SOURCE_COLUMNS.values(), []):
+        df[column] = np.float64(100)
+    return df
+
+
+def test_store_range_until_today():
+    """Wieloletni okres do dzisiaj z --store: pobierane tylko dni ulotne, reszta wczytywana z dysku"""
+    today = datetime.now().date()
+    last_closed = (today - timedelta(days=2)).strftime('%Y-%m-%d')
+    date_from = f"{today.year - 2}-01-01"
+
+    with tempfile.TemporaryDirectory() as store_dir, replay_server() as server:
+        EnergyDataStore(store_dir).write(_closed_days(date_from, last_closed), source_columns=SOURCE_COLUMNS)
+        previous = os.environ.get('ENERGY_STORE_DIR')
+        os.environ['ENERGY_STORE_DIR'] = store_dir
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                df, analyzer_class, _ = quick.pobierz_dane(date_from, today.strftime('%Y-%m-%d'), use_store=True)
+        finally:
+            if previous is None:
+                os.environ.pop('ENERGY_STORE_DIR')
+            else:
+                os.environ['ENERGY_STORE_DIR'] = previous
+
+    # Jeden zakres (wczoraj - dzisiaj): zapytanie PSE na dzień i jedno ENTSO-E
+    assert server.stats['pse'] == 2 and server.stats['entsoe'] == 1
+    assert analyzer_class is quick.CombinedEnergyDataAnalyzer
+    assert df['Data'].min() == pd.Timestamp(date_from)
+    closed = df['Data'] < pd.Timestamp(today - timedelta(days=1))
+    assert (df.loc[closed, 'Zapotrzebowanie na moc [MW]'] == 100).all()
+    assert df.loc[~closed, 'Zapotrzebowanie na moc [MW]'].notna().any()
+
+
+CHECKS = [
+    test_store_range_until_today,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Skrypt quick.py z lokalnym magazynem", CHECKS))
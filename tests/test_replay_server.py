@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test serwera odtwarzającego nagrane odpowiedzi API (scripts/replay_server.py).
+
+Użycie:
+    python tests/test_replay_server.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+import requests
+
+from checks import run_checks
+from entsoe_data_fetcher import ENTSOEDataFetcher
+from replay_server import ReplayFixtures, ReplayServer
+
+
+def test_pse_rows_per_day():
+    """Rekordy PSE: 96 kwadransów, 92 i 100 w dniach zmiany czasu, markery 02a/02b, $select i publication_ts"""
+    fixtures = ReplayFixtures()
+    for day, count in (('2024-06-14', 96), ('2024-03-31', 92), ('2024-10-27', 100)):
+        assert len(fixtures.pse_rows(day, day)) == count, day
+    markers = [row['dtime'][11:14] for row in fixtures.pse_rows('2024-10-27', '2024-10-27')
+               if row['dtime'][13] in 'ab']
+    assert sorted(markers) == ['02a'] * 4 + ['02b'] * 4
+    assert len(fixtures.pse_rows('2024-06-13', '2024-06-14')) == 192
+
+    selected = fixtures.pse_rows('2024-06-14', '2024-06-14', select=['dtime', 'demand'])
+    assert all(set(row) == {'dtime', 'demand'} for row in selected)
+    late = fixtures.pse_rows('2024-06-14', '2024-06-14', published_after='2024-06-14 23:00:00.000')
+    assert len(late) == 6 and all(row['publication_ts'] > '2024-06-14 23:00:00.000' for row in late)
+
+    # Kwadranse jeszcze nieopublikowane nie są zwracane
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    future = (now + timedelta(days=2)).strftime('%Y-%m-%d')
+    assert all(row['publication_ts'] <= now.strftime('%Y-%m-%d %H:%M:%S.000')
+               for row in fixtures.pse_rows(today, today))
+    assert fixtures.pse_rows(future, future) == []
+
+
+def test_entsoe_document():
+    """Dokument A75: kwadranse okresu dla każdego typu produkcji"""
+    xml_content = ReplayFixtures().entsoe_xml('202406132200', '202406142200')
+    series = ENTSOEDataFetcher._parse_a75_stream(xml_content)
+
+    assert len(series) == 9
+    for psr_type, periods in series.items():
+        assert sum(len(positions) for _, _, positions, _ in periods) == 96, psr_type
+
+    # Doba zmiany czasu zimowego: 25 godzin
+    df = ENTSOEDataFetcher._parse_xml_response(ReplayFixtures().entsoe_xml('202410262200', '202410272300'),
+                                               '2024-10-27', '2024-10-27')
+    assert len(df) == 100
+
+
+def test_routes_and_errors():
+    """Trasy serwera: 404 dla nieznanej, 400 bez filtra dat, liczniki zapytań i wstrzykiwane błędy"""
+    with ReplayServer(error_rate=1, error_status=503) as failing, ReplayServer() as server:
+        assert requests.get(f"{server.url}/unknown").status_code == 404
+        assert requests.get(f"{server.pse_base_url}/his-wlk-cal").status_code == 400
+        assert requests.get(server.entsoe_endpoint, params={'documentType': 'A65'}).status_code == 400
+
+        response = requests.get(f"{server.pse_base_url}/his-wlk-cal",
+                                params={'$filter': "business_date eq '2024-06-14'", '$select': 'dtime,demand'})
+        assert response.status_code == 200 and len(response.json()['value']) == 96
+        assert server.stats == {'pse': 2, 'entsoe': 1, 'errors': 0, 'throttled': 0}
+
+        assert requests.get(f"{failing.pse_base_url}/his-wlk-cal").status_code == 503
+        assert failing.stats['errors'] == 1
+
+
+CHECKS = [
+    test_pse_rows_per_day,
+    test_entsoe_document,
+    test_routes_and_errors,
+]
+
+
+if __name__ == '__main__':
+    sys.exit(run_checks("TEST: Serwer odtwarzający API", CHECKS))